@@ -103,13 +103,20 @@ with bluecat_bam.BAM(args.server, args.username, args.password) as conn:
     )
 
     # add access rights to to_group
-    for accessright in accessrights:
-        print("add access right: %s" % (accessright))
-        accessrightid = conn.do(
+    calls = (
+        (
             "addAccessRight",
-            entityId=accessright["entityId"],
-            userId=to_group_id,
-            value=accessright["value"],
-            overrides=accessright["overrides"],
-            properties=accessright["properties"],
+            {
+                "entityId": accessright["entityId"],
+                "userId": to_group_id,
+                "value": accessright["value"],
+                "overrides": accessright["overrides"],
+                "properties": accessright["properties"],
+            },
         )
+        for accessright in accessrights
+    )
+    for index, _, error in conn.do_many(calls, workers=10):
+        print("add access right: %s" % (accessrights[index]))
+        if error:
+            print("error: %s" % (error))
@@ -44,7 +44,12 @@ def main():
     logging.basicConfig(format="%(asctime)s %(levelname)s: %(message)s")
     logger.setLevel(args.logging)
 
-    with bluecat_bam.BAM(args.server, args.username, args.password) as conn:
+    with bluecat_bam.BAM(
+        args.server,
+        args.username,
+        args.password,
+        transport=bluecat_bam.BAM.transport_from_args(args),
+    ) as conn:
         (configuration_id, _) = conn.get_config_and_view(args.configuration)
 
         network_obj_list = conn.get_obj_list(
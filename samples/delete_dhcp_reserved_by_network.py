@@ -83,6 +83,12 @@ def main():
         + "or a filename or stdin('-') with any of those on each line "
         + "unless 'type' is set to override the pattern matching",
     )
+    config.add_argument(
+        "--workers",
+        type=int,
+        default=10,
+        help="number of deletes to run at the same time, default 10",
+    )
     args = config.parse_args()
 
     logger = logging.getLogger()
@@ -110,10 +116,12 @@ def main():
             entityId = entity["id"]
 
             reserved_list = get_dhcp_reserved(entityId, conn)
-            for ip in reserved_list:
-                print_ip(ip)
-                result = conn.do("delete", objectId=ip["id"])
-                if result:
+            calls = (("delete", {"objectId": ip["id"]}) for ip in reserved_list)
+            for index, result, error in conn.do_many(calls, workers=args.workers):
+                print_ip(reserved_list[index])
+                if error:
+                    print("error: ", error)
+                elif result:
                     print("result: ", result)
 
 
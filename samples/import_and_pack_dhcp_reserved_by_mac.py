@@ -218,7 +218,12 @@ def main():
     logging.basicConfig(format="%(asctime)s %(levelname)s: %(message)s")
     logger.setLevel(args.logging)
 
-    with bluecat_bam.BAM(args.server, args.username, args.password) as conn:
+    with bluecat_bam.BAM(
+        args.server,
+        args.username,
+        args.password,
+        transport=bluecat_bam.BAM.transport_from_args(args),
+    ) as conn:
         (configuration_id, view_id) = conn.get_config_and_view(
             args.configuration, args.view
         )
@@ -13,6 +13,7 @@ tests_require = (
         "pytest",
         "pytest_mock",
         "requests_mock",
+        "pytest-benchmark",
         "flake8",
         "bandit",
         "pylint",
@@ -27,6 +28,7 @@ setup(
     package_dir={"": "src"},
     packages=find_packages("src"),
     include_package_data=True,
+    package_data={name: ["VERSION", "commands.json"]},
     zip_safe=False,
     setup_requires=["pytest-runner"],
     tests_require=tests_require,
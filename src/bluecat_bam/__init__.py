@@ -1,2 +1,41 @@
 """package bluecat_bam"""
-from bluecat_bam.api import BAM, DhcpRangeList  # noqa: F401
+
+import importlib
+import sys
+
+# name: module, imported when the name is first used, so that "bam" does not
+# pay for requests and asyncio when a daemon answers, or to print help
+EXPORTS = {
+    "BAM": "bluecat_bam.api",
+    "DhcpRangeList": "bluecat_bam.api",
+    "AsyncBAM": "bluecat_bam.async_api",
+    "TokenCache": "bluecat_bam.token_cache",
+    "ResponseCache": "bluecat_bam.cache",
+    "Metrics": "bluecat_bam.metrics",
+    "Tracer": "bluecat_bam.tracing",
+    "RecordingAdapter": "bluecat_bam.transport",
+    "ReplayAdapter": "bluecat_bam.transport",
+    "ConcurrencyLimiter": "bluecat_bam.limiter",
+    "RetryPolicy": "bluecat_bam.retry",
+    "SingleFlight": "bluecat_bam.singleflight",
+}
+
+__all__ = sorted(EXPORTS)
+
+
+def __getattr__(name):
+    """import the module of an exported name on first use"""
+    if name not in EXPORTS:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module(EXPORTS[name]), name)
+    globals()[name] = value  # later uses do not come here
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(EXPORTS))
+
+
+if sys.version_info < (3, 7):  # no module __getattr__, import all now
+    for _name in EXPORTS:
+        __getattr__(_name)
@@ -57,11 +57,22 @@ from __future__ import unicode_literals
 import sys
 import logging
 import json
-import argparse
 import os
 import re
-import ipaddress
+import collections
+import copy
+import importlib
+import itertools
+import threading
+import time
 import requests
+from bluecat_bam.cache import ResponseCache
+from bluecat_bam.entity import LazyProperties, json_default
+from bluecat_bam.tracing import traced, traced_command
+
+# argparse, ipaddress, concurrent.futures, and the modules of the optional
+# collaborators, are imported where they are used, so that a session that does
+# not use them, like most "bam" calls, does not wait for them
 
 
 # double underscore names
@@ -74,12 +85,87 @@ try:
 except NameError:
     basestring = str  # pylint: disable=invalid-name,redefined-builtin
 
+# writes that can give an entity a new parent, or remove it, so the parent
+# cache is cleared
+REPARENT_PREFIXES = ("move", "split", "merge", "resize", "reparent", "delete")
+
+# parent cache entries, and seconds each is kept, see get_parent
+PARENT_CACHE_SIZE = 10000
+PARENT_CACHE_TTL = 300
+
+# for match_type, see compiled()
+PATTERNS = {
+    "ip": (
+        r"^(?P<start>(?:\d{1,3}\.){3}\d{1,3})"
+        r"(?:\/(?P<prefix>\d{1,2})|"
+        r"-(?P<end>(?:\d{1,3}\.){3}\d{1,3})|)$"
+    ),
+    "id": r"\d+$",
+    "mac": (
+        r"^((?:[0-9a-fA-F]{1,2}[:-]){5}[0-9a-fA-F]{1,2}|"
+        "[0-9a-fA-F]{12}|(?:[0-9a-fA-F]{4}[.]){2}[0-9a-fA-F]{4})"
+    ),
+}
+COMPILED_PATTERNS = {}
+
+# records propagate to the root logger, so logging setup is the same as before
+LOGGER = logging.getLogger(__name__)
+
+
+def log_event(level, event, **fields):
+    """log a structured event like 'response command=getEntities status=200',
+    only if level is enabled.  Field values that are callables are called
+    only then, so expensive ones (like response.text) cost nothing otherwise.
+    Handlers can find the event name and fields in record.bam_event and
+    record.bam_fields"""
+    if not LOGGER.isEnabledFor(level):
+        return
+    fields = {
+        name: value() if callable(value) else value for name, value in fields.items()
+    }
+    LOGGER.log(
+        level,
+        "%s %s",
+        event,
+        " ".join("%s=%s" % (name, value) for name, value in fields.items()),
+        extra={"bam_event": event, "bam_fields": fields},
+    )
+
+
+def compiled(name):
+    """PATTERNS[name], compiled the first time it is used,
+    so a session that never calls match_type does not pay for it"""
+    pattern = COMPILED_PATTERNS.get(name)
+    if pattern is None:
+        pattern = COMPILED_PATTERNS[name] = re.compile(PATTERNS[name])
+    return pattern
+
+
+def option(value, module, name, *args):
+    """value of a BAM option, or if it is True, a new name(*args) from module,
+    which is imported only then"""
+    if value is not True:
+        return value
+    return getattr(importlib.import_module(module), name)(*args)
+
+
+class LazyJson:  # pylint: disable=R0903
+    """log argument that runs json.dumps only if the message is formatted"""
+
+    __slots__ = ("obj",)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self):
+        return json.dumps(self.obj)
+
 
 class BAM(requests.Session):  # pylint: disable=R0902,R0904
     """subclass requests and
     redefine requests.request to a simpler BlueCat interface"""
 
-    def __init__(
+    def __init__(  # pylint: disable=too-many-arguments
         self,
         server,
         username,
@@ -89,45 +175,181 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
         timeout=None,
         max_retries=None,
         verify=True,
+        pool_maxsize=None,
+        token_cache=None,
+        cache=None,
+        result_factory=None,
+        metrics=None,
+        tracer=None,
+        transport=None,
+        limiter=None,
+        retry=None,
+        coalesce=None,
     ):
-        """login to BlueCat server API, get token, set header"""
+        """login to BlueCat server API, get token, set header
+        pool_maxsize sets the number of pooled connections to keep,
+        raise it above the requests default (10) when calling from many threads.
+        token_cache, a TokenCache or a file name for one, reuses a saved token
+        instead of logging in, and skips logout so the token stays valid.
+        cache, a ResponseCache or True for the default one, saves responses
+        to GET commands, see cache.py
+        result_factory, like entity.make_entity, is called with each entity
+        returned, and returns what to use instead, see do()
+        metrics, a Metrics, or False to not keep any, counts calls, errors,
+        bytes, and latency of each command, see stats() and metrics.py
+        tracer, a Tracer, records a span for each helper and API call,
+        see tracing.py
+        transport, a RecordingAdapter or ReplayAdapter, records the session
+        to a file, or plays one back without a server, see transport.py
+        limiter, a ConcurrencyLimiter, or True for the one shared by all
+        sessions to this server, adapts how many calls are in flight at once
+        to what the server sustains, see limiter.py
+        retry, a RetryPolicy, or True for the default one, sends read-only
+        commands again after server errors and timeouts, see retry.py
+        coalesce, a SingleFlight, or True for a new one, sends identical reads
+        from several threads at the same time only once, see singleflight.py"""
         self.username = username
         self.password = password
         self.timeout = timeout
         self.verify = verify
         self.raw = bool(raw)
-        self.parentviewcache = {}  # zoneid: viewid
-        logging.info("raw: %s", self.raw)
+        # ("getParent", entity id): parent entity, ("View", entity id): view id
+        self.parent_cache = ResponseCache(PARENT_CACHE_SIZE, PARENT_CACHE_TTL)
+        LOGGER.info("raw: %s", self.raw)
         self.raw_in = bool(raw_in)
-        logging.info("raw_in: %s", self.raw_in)
+        LOGGER.info("raw_in: %s", self.raw_in)
+        if isinstance(token_cache, basestring):
+            token_cache = option(
+                True, "bluecat_bam.token_cache", "TokenCache", token_cache
+            )
+        self.token_cache = token_cache
+        self.cache = option(cache, "bluecat_bam.cache", "ResponseCache")
+        self.result_factory = result_factory
+        if metrics is None:  # kept unless turned off
+            metrics = option(True, "bluecat_bam.metrics", "Metrics")
+        self.metrics = metrics or None
+        self.tracer = tracer
+        self.login_lock = threading.Lock()
+        # reauth: logged in again after the token was rejected,
+        # reauth_failed: that login failed,
+        # parent_cache_hits, parent_cache_misses: see get_parent
+        self.counters = collections.Counter()  # changed under counters_lock
+        self.counters_lock = threading.Lock()
+        # writes sent, or being sent, so that a read does not share the
+        # response of one in flight since before a write, see send_shared
+        self.writes = 0
+        self.write_count = itertools.count(1)
         if not (server and username and password):
             print("server, username, and password are required.\n")
             raise requests.RequestException
         self.mainurl = self.convert_url(server)
-        logging.info("url: %s", self.mainurl)
+        LOGGER.info("url: %s", self.mainurl)
+        self.limiter = option(
+            limiter, "bluecat_bam.limiter", "shared_limiter", self.mainurl
+        )
+        self.retry = option(retry, "bluecat_bam.retry", "RetryPolicy")
+        self.coalesce = option(coalesce, "bluecat_bam.singleflight", "SingleFlight")
 
         requests.Session.__init__(self)
-        if max_retries:
-            adapter = requests.adapters.HTTPAdapter(max_retries=max_retries)
-            url_prefix = self.mainurl.split("://", 1)[0] + "://"
-            self.mount(url_prefix, adapter)
-        self.login()
-        # set up compiled patterns once at start for later .match
-        self.ip_pattern = re.compile(
-            r"^(?P<start>(?:\d{1,3}\.){3}\d{1,3})"
-            r"(?:\/(?P<prefix>\d{1,2})|"
-            r"-(?P<end>(?:\d{1,3}\.){3}\d{1,3})|)$"
-        )
-        self.id_pattern = re.compile(r"\d+$")
-        self.mac_pattern = re.compile(
-            r"^((?:[0-9a-fA-F]{1,2}[:-]){5}[0-9a-fA-F]{1,2}|"
-            "[0-9a-fA-F]{12}|(?:[0-9a-fA-F]{4}[.]){2}[0-9a-fA-F]{4})"
-        )
+        self.max_retries = max_retries
+        self.pool_maxsize = pool_maxsize or requests.adapters.DEFAULT_POOLSIZE
+        self.transport = transport
+        if max_retries or pool_maxsize or transport is not None:
+            self.mount_adapter()
+        if self.limiter is not None:
+            self.grow_pool(self.limiter.max_limit)
+        token = None
+        if self.token_cache:
+            token = self.token_cache.get(self.mainurl, self.username)
+        if token:
+            self.set_token(token)
+        else:
+            self.login()
+
+    # patterns for match_type, compiled on first use, once for all sessions
+    @property
+    def ip_pattern(self):
+        """compiled pattern for an IP address, CIDR, or start-end range"""
+        return compiled("ip")
+
+    @property
+    def id_pattern(self):
+        """compiled pattern for an entity id"""
+        return compiled("id")
+
+    @property
+    def mac_pattern(self):
+        """compiled pattern for a MAC address"""
+        return compiled("mac")
 
     # __enter__ from our parent class returns the Session object for us
 
     def __exit__(self, *args):
-        self.logout()
+        try:
+            self.logout()
+        finally:
+            self.close()
+
+    def close(self):
+        """save metrics, if asked to, and close the connection pool"""
+        if self.metrics is not None and self.metrics.path:
+            self.metrics.dump()
+        if self.tracer is not None and self.tracer.path:
+            self.tracer.dump()
+        requests.Session.close(self)
+
+    def stats(self):
+        """dict of metrics by command, counters, and cache stats"""
+        with self.counters_lock:
+            stats = {"counters": dict(self.counters)}
+        if self.metrics is not None:
+            stats["commands"] = self.metrics.stats()
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        if self.limiter is not None:
+            stats["limiter"] = self.limiter.stats()
+        if self.coalesce is not None:
+            stats["coalesce"] = self.coalesce.stats()
+        return stats
+
+    def reset_stats(self):
+        """start metrics and counters again from zero"""
+        if self.metrics is not None:
+            self.metrics.reset()
+        with self.counters_lock:
+            self.counters.clear()
+
+    def count(self, name):
+        """add one to a counter, from any thread, like do_many workers"""
+        with self.counters_lock:
+            self.counters[name] += 1
+
+    def mount_adapter(self):
+        """mount an HTTPAdapter for our url prefix,
+        using self.max_retries and self.pool_maxsize,
+        behind self.transport, if any, and close the one it replaces,
+        which closes its idle connections, and the rest as they come back"""
+        adapter_args = {"pool_maxsize": self.pool_maxsize}
+        if self.max_retries:
+            adapter_args["max_retries"] = self.max_retries
+        adapter = requests.adapters.HTTPAdapter(**adapter_args)
+        url_prefix = self.mainurl.split("://", 1)[0] + "://"
+        if self.transport is not None:
+            replaced = self.transport.inner
+            self.transport.inner = adapter
+            adapter = self.transport
+        else:
+            replaced = self.adapters.get(url_prefix)
+        self.mount(url_prefix, adapter)
+        if replaced is not None and replaced is not adapter:
+            replaced.close()
+
+    def grow_pool(self, workers):
+        """make sure there is a pooled connection for each worker thread,
+        so that none are thrown away"""
+        if workers > self.pool_maxsize:
+            self.pool_maxsize = workers
+            self.mount_adapter()
 
     @staticmethod
     def convert_url(server):
@@ -158,8 +380,15 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
         if response.status_code != 200:
             print(response.json(), file=sys.stderr)
             raise requests.HTTPError
-        self.token = str(response.json())
-        self.token = self.token.split()[2] + " " + self.token.split()[3]
+        token = str(response.json())
+        token = token.split()[2] + " " + token.split()[3]
+        self.set_token(token)
+        if self.token_cache:
+            self.token_cache.put(self.mainurl, self.username, token)
+
+    def set_token(self, token):
+        """use token, like 'BAMAuthToken: xyz', on following requests"""
+        self.token = token
         self.token_header = {
             "Authorization": self.token,
             "Content-Type": "application/json",
@@ -171,11 +400,18 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
 
     def logout(self):
         """log out of BlueCat server, return nothing"""
+        if self.token_cache:
+            LOGGER.info("token is cached, so not logging out")
+            return
         self.get(self.mainurl + "logout?", headers=self.token_header)
 
-    def do(self, command, method=None, data=None, **kwargs):
+    @traced_command
+    def do(self, command, method=None, data=None, result_factory=None, **kwargs):
         # pylint: disable=invalid-name,R0912
-        """run any BlueCat REST API command"""
+        """run any BlueCat REST API command
+        result_factory, or self.result_factory, is called with each entity
+        in the response, or the response itself if not a list,
+        after any conversion, to return something else, like a compact Entity"""
         # method = kwargs.pop("method")
         # Convert properties from dict-in-string to dict if needed
         # if properties:
@@ -198,9 +434,9 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             if not self.raw_in:
                 properties = self.convert_dict_in_str_to_dict(properties)
                 kwargs["properties"] = self.convert_dict_to_str(properties)
-            logging.debug("properties converted: %s", properties)
+            LOGGER.debug("properties converted: %s", properties)
         except KeyError:
-            logging.debug("no properties")
+            LOGGER.debug("no properties")
         try:
             overrides = kwargs.get("overrides")
             if not self.raw_in:
@@ -208,34 +444,263 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
                 kwargs["overrides"] = self.convert_dict_to_str(overrides)
         except KeyError:
             pass
-        response = self.request(
-            method,
-            self.mainurl + command + "?",
-            # params={"properties": properties, kwargs},
-            # headers=self.token_header,
-            data=data,
-            params=kwargs,
-            timeout=self.timeout,
-            verify=self.verify,
-        )
-        logging.info(vars(response.request))
-        logging.info("response: %s", response.text)
-        logging.debug("headers: %s", response.headers)
-        logging.debug("len: %s", response.headers.get("Content-Length"))
+        self.invalidate(method, command, kwargs)
+        cache_key, text = self.cache_lookup(method, command, kwargs, data)
+        if text is not None:
+            if self.tracer is not None:
+                self.tracer.annotate(cached=True)
+            obj = json.loads(text) if text else None
+            if not self.raw:
+                obj = self.convert_response(obj)
+            return self.make_result(obj, result_factory)
+        obj = self.send_parsed(method, command, data, kwargs, cache_key)
+        if not self.raw:
+            obj = self.convert_response(obj)
+        return self.make_result(obj, result_factory)
+        # pylint: enable=invalid-name,R0912
+
+    def send_parsed(self, method, command, data, params, cache_key):
+        """send_shared, raise for an error status, and return the response
+        parsed from JSON, saved in the cache under cache_key, if not None"""
+        generation = self.cache.generation if cache_key is not None else None
+        try:
+            response = self.send_shared(method, command, data, params)
+        finally:  # for a write, also forget reads answered while it ran
+            self.invalidate(method, command, params)
         # print("status_code: %s" % response.status_code)
         if response.status_code != 200:
             print(response.text, file=sys.stderr)
         response.raise_for_status()
         # check type of response
-        logging.info(response)
         if response.headers.get("Content-Length") == "0":
             obj = None  # void (null) response
         else:
             obj = response.json()
-        if not self.raw:
-            obj = self.convert_response(obj)
+        if cache_key is not None:
+            self.cache.put(cache_key, "" if obj is None else response.text, generation)
         return obj
-        # pylint: enable=invalid-name,R0912
+
+    def invalidate(self, method, command, params):
+        """for a write, forget cached reads it may change,
+        called before it is sent, and after it returns"""
+        if method.upper() == "GET":
+            return
+        self.writes = next(self.write_count)  # atomic, unlike += 1
+        if self.cache is not None:
+            self.cache.invalidate(command, params)
+        if command.startswith(REPARENT_PREFIXES):
+            self.parent_cache.clear()
+
+    def cache_lookup(self, method, command, params, data):
+        """(key to save the response under, cached response text),
+        either None if not cached"""
+        if self.cache is None or method.upper() != "GET":
+            return None, None
+        if not self.cache.cacheable(command):
+            return None, None
+        cache_key = self.cache.key(command, params, data)
+        return cache_key, self.cache.get(cache_key)
+
+    def make_result(self, obj, result_factory=None):
+        """apply result_factory, or self.result_factory, to the response,
+        or to each item if it is a list"""
+        result_factory = result_factory or self.result_factory
+        if result_factory is None:
+            return obj
+        if isinstance(obj, list):
+            return [result_factory(item) for item in obj]
+        return result_factory(obj)
+
+    def send_shared(self, method, command, data, params):
+        """send_retried, sharing the response of an identical read
+        in flight in another thread, if self.coalesce is set,
+        and no write was sent since that read was"""
+        if self.coalesce is None or method.upper() != "GET":
+            return self.send_retried(method, command, data, params)
+        # pylint: disable=import-outside-toplevel
+        from bluecat_bam.registry import get_registry
+
+        if not get_registry().read_only(command):
+            return self.send_retried(method, command, data, params)
+        response, coalesced = self.coalesce.do(
+            (self.writes, ResponseCache.key(command, params, data)),
+            lambda: self.send_retried(method, command, data, params),
+        )
+        if coalesced:
+            if self.metrics is not None:
+                self.metrics.count(command, "coalesced")
+            if self.tracer is not None:
+                self.tracer.annotate(coalesced=True)
+        return response
+
+    def send_retried(self, method, command, data, params):
+        """send_measured, and again as self.retry allows, if it failed"""
+        if self.retry is None:
+            return self.send_measured(method, command, data, params)
+        started = time.perf_counter()
+        attempt = 1
+        while True:
+            response = failure = None
+            try:
+                response = self.send_measured(method, command, data, params)
+            except requests.RequestException as error:
+                failure = error
+            delay = self.retry.wait(
+                command, method, attempt, started, response, failure, self.metrics
+            )
+            if delay is None:
+                if failure is not None:
+                    raise failure
+                return response
+            LOGGER.info("retry %s %s in %.3fs", command, attempt, delay)
+            time.sleep(delay)
+            attempt += 1
+
+    def send_measured(self, method, command, data, params):
+        """send_command, within the limiter, if any,
+        recording the time, size, and status in metrics and the trace"""
+        if self.limiter is not None:
+            self.limiter.acquire()
+        started = time.perf_counter()
+        response = failure = None
+        try:
+            response = self.send_command(method, command, data, params)
+        except requests.RequestException as error:
+            failure = error
+            if self.metrics is not None:
+                self.metrics.record(command, time.perf_counter() - started, error=True)
+            raise
+        finally:
+            if self.limiter is not None:
+                status = None if response is None else response.status_code
+                self.limiter.release(started, command, status, failure)
+        if self.metrics is not None:
+            self.metrics.record(
+                command,
+                time.perf_counter() - started,
+                len(response.content),
+                error=response.status_code != 200,
+            )
+        if self.tracer is not None:
+            self.tracer.annotate(
+                method=method,
+                status=response.status_code,
+                bytes=len(response.content),
+            )
+        log_event(
+            logging.INFO,
+            "request",
+            method=method,
+            url=lambda: response.request.url,
+            body=lambda: response.request.body,
+        )
+        log_event(
+            logging.INFO,
+            "response",
+            command=command,
+            status=response.status_code,
+            length=response.headers.get("Content-Length"),
+            text=lambda: response.text,
+        )
+        log_event(logging.DEBUG, "response headers", headers=response.headers)
+        return response
+
+    def send_command(self, method, command, data, params):
+        """send request, and if the token was rejected (expired, or logged out),
+        log in again and send it once more"""
+        token = self.token
+        response = self.request(
+            method,
+            self.mainurl + command + "?",
+            # params={"properties": properties, kwargs},
+            # headers=self.token_header,
+            data=data,
+            params=params,
+            timeout=self.timeout,
+            verify=self.verify,
+        )
+        if response.status_code == 401:
+            self.relogin(token)
+            response = self.request(
+                method,
+                self.mainurl + command + "?",
+                data=data,
+                params=params,
+                timeout=self.timeout,
+                verify=self.verify,
+            )
+        return response
+
+    def relogin(self, rejected_token):
+        """log in again after rejected_token was refused,
+        unless another thread already did"""
+        with self.login_lock:
+            if self.token != rejected_token:
+                return
+            LOGGER.warning("token rejected by %s, logging in again", self.mainurl)
+            if self.token_cache:
+                self.token_cache.remove(self.mainurl, self.username)
+            try:
+                self.login()
+            except requests.RequestException:
+                self.count("reauth_failed")
+                raise
+            self.count("reauth")
+
+    def do_many(self, calls, workers=10, ordered=True):
+        """run many independent commands in a thread pool,
+        calls is an iterable of (command, kwargs) tuples,
+        yields (index, result, error) tuples, where index is the position in calls,
+        and error is the exception raised by that call, or None if it succeeded.
+        Results come in the order of calls, or as they finish if ordered=False.
+        usage:
+        calls = (("delete", {"objectId": ip["id"]}) for ip in ip_list)
+        for index, result, error in conn.do_many(calls, workers=20):
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.grow_pool(workers)
+        window = workers * 2  # calls submitted ahead, without reading all of calls
+        calls = enumerate(calls)
+        do_one = self.in_current_span(self.do_one)
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            if ordered:
+                pending = collections.deque()
+                for index, (command, kwargs) in calls:
+                    pending.append(executor.submit(do_one, index, command, kwargs))
+                    if len(pending) >= window:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            else:
+                pending = set()
+                for index, (command, kwargs) in calls:
+                    pending.add(executor.submit(do_one, index, command, kwargs))
+                    if len(pending) >= window:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield future.result()
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+
+    def in_current_span(self, func):
+        """func, to run in a worker thread, traced inside the current span"""
+        if self.tracer is None:
+            return func
+        return self.tracer.wrap(func)
+
+    def do_one(self, index, command, kwargs):
+        """run one command for do_many, returns (index, result, error)"""
+        try:
+            return index, self.do(command, **kwargs), None
+        except Exception as error:  # pylint: disable=broad-except
+            LOGGER.info("do_many call %s %s failed: %s", index, command, error)
+            return index, None, error
 
     @staticmethod
     def convert_dict_in_str_to_dict(data):
@@ -250,14 +715,16 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
 
     # @staticmethod
     def convert_data(self, data):
-        """data is always None or dict or a json string containing a dict
-        only need to call this if data is not None"""
-        logging.debug("data type is: %s", type(data).__name__)
-        logging.debug(data)
+        """data is always None or dict or a json string containing a dict,
+        or an Entity, only need to call this if data is not None"""
+        LOGGER.debug("data type is: %s", type(data).__name__)
+        LOGGER.debug(data)
         # convert string to dict if needed
         if data:
             if isinstance(data, basestring):
                 data = json.loads(data)
+            elif hasattr(data, "as_dict"):  # a compact Entity
+                data = data.as_dict()
             newdata = {}
             # convert inside dict
             for key, value in data.items():
@@ -266,14 +733,16 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
                     value = self.convert_dict_to_str(value)
                 newdata[key] = value
             data = newdata
-        logging.debug("converted data type is: %s", type(data).__name__)
-        logging.debug(data)
+        LOGGER.debug("converted data type is: %s", type(data).__name__)
+        LOGGER.debug(data)
         return json.dumps(data)
 
     @staticmethod
     def convert_dict_to_str(value):
         """convert dict to string name=value|..."""
-        if isinstance(value, dict):
+        if isinstance(value, LazyProperties) and value.raw is not None:
+            value = value.raw  # never split, so still the original string
+        elif isinstance(value, dict):
             value = "|".join(k + "=" + str(v) for k, v in value.items()) + "|"
             # value = "|".join([k + "=" + str(v) for k, v in value.items()]) + "|"
         return value
@@ -282,20 +751,20 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
     def convert_response(self, obj):
         """check types of response and convert if needed"""
         if obj is None:
-            logging.info("response is null")
+            LOGGER.info("response is null")
         elif isinstance(obj, basestring):
-            logging.info("response is string")
+            LOGGER.info("response is string")
             obj = self.convert_str_to_dict(obj)
         elif isinstance(obj, dict):
-            logging.info("response is dict")
+            LOGGER.info("response is dict")
             obj = self.convert_dict_entries(obj)
         elif isinstance(obj, list):
-            logging.info("response is list")
+            LOGGER.info("response is list")
             obj = [self.convert_dict_entries(item) for item in obj]
         elif isinstance(obj, bool):
-            logging.info("response is bool")
+            LOGGER.info("response is bool")
         elif isinstance(obj, int):  # note that bool is subset of int, so order is key
-            logging.info("response is int")
+            LOGGER.info("response is int")
         else:
             print("ERROR - response not recognized", file=sys.stderr)
             raise ValueError
@@ -303,8 +772,17 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
 
     # @staticmethod
     def convert_dict_entries(self, obj):
-        """convert each value string in dict"""
-        return {k: self.convert_str_to_dict(v) for k, v in obj.items()}
+        """convert each value string in dict,
+        properties are split on first use, see entity.LazyProperties"""
+        newobj = dict(obj)
+        for key, value in obj.items():
+            # same test as convert_str_to_dict, most values are skipped here
+            if isinstance(value, basestring) and "|" in value and "=" in value:
+                if key == "properties":
+                    newobj[key] = LazyProperties(value)
+                else:
+                    newobj[key] = self.convert_str_to_dict(value)
+        return newobj
 
     @staticmethod
     def convert_str_to_dict(value):
@@ -320,76 +798,18 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
 
     @staticmethod
     def get_method_from_command(command):
-        """choose http method based on the command name"""
-        # in most cases, the first three characters of the command name are enough
-        # to determine the http method
-        # this list was generated from the wadl files in 8.2.0, 8.3.2, and 9.1.0
-        # should work for all versions from 8.2.0 to 9.1.0 and probably others
-        http_method_from_command_prefix = {
-            "DELETE": ["cle", "del", "rem"],
-            "GET": ["cus", "fin", "get", "isA", "isM", "log", "sea"],
-            "POST": [
-                "add",
-                "app",
-                "ass",
-                "bre",
-                "cle",
-                "con",
-                "cre",
-                "dep",
-                "est",
-                "exc",
-                "fai",
-                "log",
-                "mer",
-                "mig",
-                "qui",
-                "rea",
-                "rem",
-                "rol",
-                "sel",
-                "spl",
-                "ter",
-                "una",
-                "upl",
-            ],
-            "PUT": [
-                "cha",
-                "den",
-                "edi",
-                "fai",
-                "imp",
-                "lin",
-                "mov",
-                "pur",
-                "rep",
-                "res",
-                "sha",
-                "sta",
-                "unl",
-                "uns",
-                "upd",
-            ],
-        }
-        # this is the one exception to the above list
-        prefix_to_method_exceptions = {"updateBulkUdf": "POST"}
-        command_prefix = command[0:3]
-        # print("command prefix: %s" % (command_prefix))
-        method_from_wadl = prefix_to_method_exceptions.get(command)
-        if not method_from_wadl:
-            for method, prefixlist in http_method_from_command_prefix.items():
-                # print("method: %s" % (method))
-                # print("prefixlist: %s" % (prefixlist))
-                if command_prefix in prefixlist:
-                    # print("found")
-                    method_from_wadl = method
-                    break
-        return method_from_wadl
+        """choose http method based on the command name, see registry.py"""
+        # pylint: disable=import-outside-toplevel
+        from bluecat_bam.registry import get_registry
+
+        return get_registry().method(command)
 
     @staticmethod
     def argparsecommon(description=""):
         """set up common argparse arguments for BlueCat API"""
         # usage: config = bluecat_bam.BAM.argparsecommon()
+        import argparse  # pylint: disable=import-outside-toplevel
+
         config = argparse.ArgumentParser(description=description)
         config.add_argument(
             "--server",
@@ -438,8 +858,39 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             + "will show the password in the login call",
             default=os.getenv("BLUECAT_LOGGING", "WARNING"),
         )
+        config.add_argument(
+            "--record",
+            default=os.getenv("BLUECAT_RECORD"),
+            help="file to record the API calls and responses in, to --replay later",
+        )
+        config.add_argument(
+            "--replay",
+            default=os.getenv("BLUECAT_REPLAY"),
+            help="file from --record, to answer the API calls from, "
+            + "instead of the server",
+        )
+        config.add_argument(
+            "--replay_latency",
+            type=float,
+            default=os.getenv("BLUECAT_REPLAY_LATENCY", "0"),
+            help="part of the recorded server time to wait in --replay, "
+            + "1 for the same, default 0",
+        )
         return config
 
+    @staticmethod
+    def transport_from_args(args):
+        """transport for BAM, from the --record or --replay arguments, or None"""
+        # pylint: disable=import-outside-toplevel
+        from bluecat_bam.transport import RecordingAdapter, ReplayAdapter
+
+        if getattr(args, "replay", None):
+            return ReplayAdapter(args.replay, latency=args.replay_latency)
+        if getattr(args, "record", None):
+            return RecordingAdapter(args.record)
+        return None
+
+    @traced
     def get_config_and_view(self, configuration_name, view_name=None):
         """get configuration_id and view_id"""
         # usage: (configuration_id, view_id) =
@@ -468,38 +919,84 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             view_id = None
         return configuration_id, view_id
 
+    @traced
     def get_bam_api_list(self, apiname, **kwargs):
-        """wrap api call with loop to handle 'start' and 'count'"""
+        """wrap api call with loop to handle 'start' and 'count',
+        other keyword arguments, like result_factory, are passed to do()"""
+        return list(self.iter_bam_api_list(apiname, **kwargs))
+
+    def iter_bam_api_list(self, apiname, prefetch=False, parallel_pages=1, **kwargs):
+        """generator version of get_bam_api_list, yields each entity,
+        holding only one page ('count' entities) in memory at a time.
+        With prefetch=True, the next page is requested in the background
+        while the caller works on the current page.
+        With parallel_pages=K, K pages are requested at once
+        (start, start+count, start+2*count, ...), another is requested as each
+        full page comes back, and no more after the first short page.
+        The result is the same as one page at a time, in fewer round trip times,
+        at the cost of up to K-1 extra requests past the end of the list."""
         if not kwargs.get("count"):
             kwargs["count"] = 1000
         if not kwargs.get("start"):
             kwargs["start"] = 0
-        count = kwargs["count"]
-        replysize = count
-        listall = []
-        start = kwargs["start"]
-        while replysize == count:
-            kwargs["start"] = start
-            listone = self.do(apiname, **kwargs)
-            replysize = len(listone)
-            start += replysize
-            listall.extend(listone)
-        return listall
+        count = int(kwargs["count"])
+        start = int(kwargs["start"])
+        workers = max(int(parallel_pages), 1)
+
+        def get_page(start):
+            return self.do(apiname, **dict(kwargs, start=start))
+
+        if workers == 1 and not prefetch:
+            replysize = count
+            while replysize == count:
+                listone = get_page(start)
+                replysize = len(listone)
+                start += replysize
+                for entity in listone:
+                    yield entity
+            return
+
+        # every page before the first short page is full,
+        # so the start of each page is known before the previous page returns
+        self.grow_pool(workers)
+        get_page = self.in_current_span(get_page)
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = collections.deque(
+                executor.submit(get_page, start + num * count) for num in range(workers)
+            )
+            next_start = start + workers * count
+            try:
+                replysize = count
+                while replysize == count:
+                    listone = pending.popleft().result()
+                    replysize = len(listone)
+                    if replysize == count:
+                        pending.append(executor.submit(get_page, next_start))
+                        next_start += count
+                    for entity in listone:
+                        yield entity
+            finally:
+                for future in pending:
+                    future.cancel()
 
+    @traced
     def get_id_list(self, object_ident, containerId, object_type):
         """get object id, or a list of objects from a file"""
         obj_list = self.get_obj_list(object_ident, containerId, object_type)
         id_list = [obj.get("id") for obj in obj_list]
         return id_list
 
+    @traced
     def get_obj_list(self, object_ident, containerId, object_type):
         """get object, or a list of objects from a file or stdin('-')"""
-        logger = logging.getLogger()
-        logger.info(
+        LOGGER.info(
             "get_obj_list object_ident: %s, containerId: %s, object_type: %s",
             object_ident,
             containerId,
-            json.dumps(object_type),
+            object_type,
         )
         obj_list = []
         if object_ident == "-":
@@ -518,10 +1015,10 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             try:
                 with open(object_ident) as f:
                     obj_list = self.get_obj_lines(f, containerId, object_type)
-                logger.info(obj_list)
+                LOGGER.info(obj_list)
                 return obj_list
             except ValueError:
-                logger.info("failed to find object or open file: '%s'", object_ident)
+                LOGGER.info("failed to find object or open file: '%s'", object_ident)
         return obj_list
 
     def get_obj_lines(self, fd, containerId, object_type):
@@ -548,18 +1045,17 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
         IP4Range returns ("IP4Range", start, end)
         None return (None, None, None)
         """
-        logger = logging.getLogger()
         part1 = None
         part2 = None
-        id_match = self.id_pattern.match(object_ident)
+        id_match = compiled("id").match(object_ident)
         if id_match:
             obj_type = "id"
         else:
-            mac_match = self.mac_pattern.match(object_ident)
+            mac_match = compiled("mac").match(object_ident)
             if mac_match:
                 obj_type = "MACAddress"
             else:
-                ip_match = self.ip_pattern.match(object_ident)
+                ip_match = compiled("ip").match(object_ident)
                 if ip_match and ip_match.group("start"):
                     part1 = ip_match.group("start")
                     if ip_match.group("prefix"):
@@ -572,19 +1068,19 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
                         obj_type = "IP4Address"
                 else:
                     obj_type = None
-        logger.info("matched type: %s, part1 %s, part2 %s", obj_type, part1, part2)
+        LOGGER.info("matched type: %s, part1 %s, part2 %s", obj_type, part1, part2)
         return obj_type, part1, part2
 
     # pylint: disable=R0912
+    @traced
     def get_obj(self, object_ident, containerId, object_type, warn=True):
         """get an object, given an id, IP, CIDR, or range,
         return object and type matched"""
-        logger = logging.getLogger()
-        logger.info(
+        LOGGER.info(
             "get_obj object_ident: %s, containerId: %s, object_type: %s, warn: %s",
             object_ident,
             containerId,
-            json.dumps(object_type),
+            object_type,
             warn,
         )
         obj_type, part1, part2 = self.match_type(object_ident)
@@ -612,11 +1108,11 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             if not obj or not obj.get("id"):
                 return None, None
             obj_ip, obj_prefix = obj["properties"]["CIDR"].split("/")
-            logger.info("CIDR obj_ip %s,obj_prefix %s,obj %s", obj_ip, obj_prefix, obj)
+            LOGGER.info("CIDR obj_ip %s,obj_prefix %s,obj %s", obj_ip, obj_prefix, obj)
             while obj_ip == part1 and obj_prefix > part2:
-                obj = self.do("getParent", entityId=obj["id"])
+                obj = self.get_parent(obj["id"])
                 obj_ip, obj_prefix = obj["properties"]["CIDR"].split("/")
-                logger.info(
+                LOGGER.info(
                     "CIDR parent obj_ip %s,obj_prefix %s,obj %s",
                     obj_ip,
                     obj_prefix,
@@ -640,19 +1136,19 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             pass
         else:
             print("answer from match_type not recognized", obj_type, part1, part2)
-        logger.info("get_obj returns %s of type %s", obj, obj_type)
+        LOGGER.info("get_obj returns %s of type %s", obj, obj_type)
         if not obj and warn:
             print("Warning - no object found for:", object_ident, file=sys.stderr)
         return obj, obj_type
 
+    @traced
     def get_range(self, address, containerId, object_type):
         """get range - block, network, or dhcp range - by IPv4 or IPv6"""
-        logger = logging.getLogger()
-        logger.info(
+        LOGGER.info(
             "get_range for address: %s, containerId %s, object_type %s",
             address,
             containerId,
-            json.dumps(object_type),
+            object_type,
         )
         if object_type is None:
             object_type = ""  # standardize the value
@@ -667,7 +1163,7 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             if obj_id:
                 cidr = obj["properties"].get("CIDR")
                 start = obj["properties"].get("start")
-        logging.info("getIPRangedByIP obj = %s", json.dumps(obj))
+        LOGGER.info("getIPRangedByIP obj = %s", LazyJson(obj))
         if obj_id == 0:
             obj = None
         elif start and start != address:
@@ -690,19 +1186,20 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
                     )
                     if network_obj["id"]:
                         obj = network_obj
-                        logger.info("IP4Network found: %s", obj)
+                        LOGGER.info("IP4Network found: %s", obj)
         return obj
 
+    @traced
     def getinterface(self, server_name, configuration_id):
         """get server interface object, given the server name or interface name"""
         _, interface_obj = self.getserver(server_name, configuration_id)
         return interface_obj
 
+    @traced
     def getserverbyinterfacename(self, server_name, configuration_id):
         """search by server name, short or long, divided at dots"""
         # server_obj, interface_obj = conn.getserver(server_name, configuration_id)
         # assume <= 1000 servers defined  ****
-        logger = logging.getLogger()
         interface_obj_list = self.do(
             "searchByObjectTypes",
             keyword=server_name,
@@ -717,11 +1214,11 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             name_pattern = re.compile(server_name + r"\b")
             name_match = name_pattern.match(interface["name"])
             if not name_match:
-                logger.info("%s did not match %s", server_name, interface["name"])
+                LOGGER.info("%s did not match %s", server_name, interface["name"])
                 continue
             # check which Configuration
-            server_obj = self.do("getParent", entityId=interface["id"])
-            server_configuration = self.do("getParent", entityId=server_obj["id"])
+            server_obj = self.get_parent(interface["id"])
+            server_configuration = self.get_parent(server_obj["id"])
             if server_configuration["id"] == configuration_id:
                 interface_ok_list.append(interface)
         if len(interface_ok_list) > 1:
@@ -735,6 +1232,7 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
                 return server_obj, interface_ok_list[0]
         return None, None
 
+    @traced
     def getserverbyservername(self, server_name, configuration_id):
         """get server by servername"""
         # try another method, in case they gave the server display name instead
@@ -766,16 +1264,17 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
                 if len(interface_obj_list) > 1:
                     print(
                         "ERROR - more than one interface found",
-                        json.dumps(interface_obj_list),
+                        json.dumps(interface_obj_list, default=json_default),
                     )
         if len(server_obj_list) > 1:
             print(
                 "ERROR - found more than one server for name",
                 server_name,
-                json.dumps(server_obj_list),
+                json.dumps(server_obj_list, default=json_default),
             )
         return None, None
 
+    @traced
     def getserver(self, server_name, configuration_id):
         """return server and interface objects"""
         # server_obj, interface_obj = conn.getserver(server_name, configuration_id)
@@ -791,12 +1290,12 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             print("ERROR - server or interface not found for", server_name)
         return server_obj, interface_obj
 
+    @traced
     def get_zone(self, domain_name, view_id):
         """find closest zone for domain_name,
         return zone_obj,remainder (possibly dotted name)"""
-        logger = logging.getLogger()
         domain_label_list = domain_name.split(".")
-        logger.info(domain_label_list)
+        LOGGER.info(domain_label_list)
         zone_end = len(domain_label_list)
         zone_start = zone_end - 1
         search_domain = ".".join(domain_label_list[zone_start:zone_end])
@@ -804,7 +1303,7 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
         parent_id = view_id
 
         while True:
-            logger.info(
+            LOGGER.info(
                 "start: %s, end: %s, search: %s", zone_start, zone_end, search_domain
             )
             zone_obj = self.do(
@@ -823,7 +1322,7 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             found_zone_obj = zone_obj
             parent_id = zone_obj.get("id")
             current_domain = ".".join(domain_label_list[zone_start:])
-            logger.info("current_domain: %s, zone: %s", current_domain, zone_obj)
+            LOGGER.info("current_domain: %s, zone: %s", current_domain, zone_obj)
             if zone_start != 0:
                 zone_end = zone_start
                 zone_start -= 1
@@ -832,12 +1331,12 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
                 search_domain = ""
                 break
         remainder = ".".join(domain_label_list[0:zone_end])
-        logger.info("remainder: %s", remainder)
+        LOGGER.info("remainder: %s", remainder)
         return found_zone_obj, remainder
 
+    @traced
     def get_fqdn(self, domain_name, view_id, record_type="HostRecord"):
         """get list of entities with given fqdn and type"""
-        logger = logging.getLogger()
         zone_obj, remainder = self.get_zone(domain_name, view_id)
         if record_type.lower() == "zone":
             entities = [zone_obj]
@@ -852,9 +1351,10 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
                 start=0,
                 count=1000,
             )
-        logger.info("entities: %s", entities)
+        LOGGER.info("entities: %s", entities)
         return entities
 
+    @traced
     def delete_ip_obj(self, ip_obj):
         """delete ip obj, handle case of DHCP_ALLOCATED"""
         ip_id = ip_obj["id"]
@@ -878,16 +1378,21 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
         )
         return result
 
+    @traced
     def get_dhcp_ranges(self, networkid):
         """get list of ranges"""
-        logger = logging.getLogger()
-        range_list = self.get_bam_api_list(
+        range_list = list(self.iter_dhcp_ranges(networkid))
+        LOGGER.debug(range_list)
+        return range_list
+
+    def iter_dhcp_ranges(self, networkid, prefetch=False):
+        """generator version of get_dhcp_ranges"""
+        return self.iter_bam_api_list(
             "getEntities",
+            prefetch=prefetch,
             parentId=networkid,
             type="DHCP4Range",
         )
-        logger.debug(range_list)
-        return range_list
 
     @staticmethod
     def make_dhcp_ranges_list(range_list):
@@ -897,56 +1402,65 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             { "start": start_ip_obj, "end": end_ip_obj, "range": range_obj }
             ...
         ]"""
-        logger = logging.getLogger()
+        import ipaddress  # pylint: disable=import-outside-toplevel
+
         range_info_list = []
         for dhcp_range in range_list:
             start = ipaddress.ip_address(dhcp_range["properties"]["start"])
             end = ipaddress.ip_address(dhcp_range["properties"]["end"])
             range_info_list.append({"start": start, "end": end, "range": dhcp_range})
-        logger.info(range_info_list)
+        LOGGER.info(range_info_list)
         range_info_list.sort(key=lambda self: self["start"])
         return range_info_list
 
+    @traced
     def getparentview(self, entity_id):
         """walk tree up to view, with cache"""
-        view_id = self.parentviewcache.get("id")
+        key = ("View", self.entity_key(entity_id))
+        generation = self.parent_cache.generation
+        view_id = self.parent_cache.get(key)
         if view_id:
             return view_id
-        parent = self.do("getParent", entityId=entity_id)
-        if parent == 0:
+        view = self.find_parent_of_type(entity_id, "View")
+        if not view:
             print("ERROR - got to top without finding a view for object id", entity_id)
             return None
-        entity_type = parent["type"]
-        if entity_type == "View":
-            view_id = parent["id"]
-            self.parentviewcache[entity_id] = view_id
-            return view_id
-        return self.getparentview(parent["id"])  # recursive
+        view_id = view["id"]
+        self.parent_cache.put(key, view_id, generation)
+        return view_id
 
+    @traced
     def get_ip_list(self, networkid, states=None):
         """returns [filtered] list of IP entities, given a network id
         and optional list of states"""
-        ip_list = self.get_bam_api_list(
+        return list(self.iter_ip_list(networkid, states))
+
+    def iter_ip_list(self, networkid, states=None, prefetch=False):
+        """generator version of get_ip_list"""
+        ip_iter = self.iter_bam_api_list(
             "getEntities",
+            prefetch=prefetch,
             parentId=networkid,
             type="IP4Address",
         )
         if states:
-            ip_list = [ip for ip in ip_list if ip["properties"]["state"] in states]
-        return ip_list
+            ip_iter = (ip for ip in ip_iter if ip["properties"]["state"] in states)
+        return ip_iter
 
     @staticmethod
     def make_ip_dict(ip_list):
         """convert ip_list to dict: {ipaddress_class_obj: ip_entity}"""
+        import ipaddress  # pylint: disable=import-outside-toplevel
+
         ip_dict = {
             ipaddress.ip_address(ip_obj["properties"]["address"]): ip_obj
             for ip_obj in ip_list
         }
         return ip_dict
 
+    @traced
     def get_shared_network_tag_by_name(self, name, configuration_id):
         """get shared network tag by name, in configuration"""
-        logger = logging.getLogger()
         cfg_obj = self.do("getEntityById", id=configuration_id)
         shared_net_group_id = int(cfg_obj["properties"]["sharedNetwork"])
         # search for name
@@ -961,31 +1475,57 @@ class BAM(requests.Session):  # pylint: disable=R0902,R0904
             if obj["name"] == name:
                 # verify that it is a shared_network tag for this configuration
                 group = self.find_parent_of_type(obj["id"], "TagGroup")
-                logger.info(
+                LOGGER.info(
                     "compare %s to %s",
-                    json.dumps(group["id"]),
-                    json.dumps(shared_net_group_id),
+                    group["id"],
+                    shared_net_group_id,
                 )
                 if group["id"] == shared_net_group_id:
                     found = obj
-                    logger.info("found %s", found)
+                    LOGGER.info("found %s", found)
         return found
 
+    @traced
+    def get_parent(self, entity_id):
+        """getParent, remembering each answer, so walking up the tree again
+        from the same entity, or a sibling, costs no more calls.
+        Kept up to PARENT_CACHE_TTL seconds, the least recently used dropped
+        past PARENT_CACHE_SIZE, cleared by writes that move or delete entities,
+        see REPARENT_PREFIXES, or by conn.parent_cache.clear()"""
+        key = ("getParent", self.entity_key(entity_id))
+        generation = self.parent_cache.generation
+        parent = self.parent_cache.get(key)
+        if parent is None:
+            self.count("parent_cache_misses")
+            parent = self.do("getParent", entityId=entity_id)
+            self.parent_cache.put(key, parent, generation)
+        else:
+            self.count("parent_cache_hits")
+        return copy.deepcopy(parent)  # so callers cannot change the cache
+
+    @staticmethod
+    def entity_key(entity_id):
+        """the same key for an id as an int or a str"""
+        try:
+            return int(entity_id)
+        except (TypeError, ValueError):
+            return entity_id
+
+    @traced
     def find_parent_of_type(self, obj_id, obj_type):
         """search up tree for parent with the given type,
         like finding the group for a tag,
         or the configuration for a network,
         or the view for a zone or record,
         returns parent object"""
-        logger = logging.getLogger()
         myid = obj_id
         mytype = None
         parent_obj = None  # make it in this scope
         while mytype != obj_type and myid != 0:
-            parent_obj = self.do("getParent", entityId=myid)
+            parent_obj = self.get_parent(myid)
             mytype = parent_obj["type"]
             myid = parent_obj["id"]
-            logger.info("id: %s, name: %s, type: %s", myid, parent_obj["name"], mytype)
+            LOGGER.info("id: %s, name: %s, type: %s", myid, parent_obj["name"], mytype)
         if myid == 0:
             return None
         return parent_obj
@@ -1001,6 +1541,8 @@ class DhcpRangeList(list):  # pylint: disable=R0902
         network_obj,
     ):
         """DHCP range list, with extra functions"""
+        import ipaddress  # pylint: disable=import-outside-toplevel
+
         list.__init__(self, BAM.make_dhcp_ranges_list(dhcp_ranges_list))
         # save network, range list, and current range
         self.network_obj = network_obj
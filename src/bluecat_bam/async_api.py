@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) REST API asyncio module
+
+Copyright (C) 2018,2019 Regents of the University of Michigan
+Apache License Version 2.0, see LICENSE file
+This is a community supported open source project, not endorsed by BlueCat.
+"BlueCat Address Manager" is a trademark of BlueCat Networks (USA) Inc. and its
+affiliates.
+
+Same calls as bluecat_bam.BAM, but awaitable, so that one process can keep
+many BAM requests in flight at once.  Python3 only.
+
+Use like:
+import asyncio
+import bluecat_bam
+
+async def main():
+    async with bluecat_bam.AsyncBAM(server, username, password) as conn:
+        ip_lists = await asyncio.gather(
+            *[conn.get_ip_list(networkid) for networkid in networkids]
+        )
+
+asyncio.run(main())
+
+Each call runs the blocking BAM call in a thread pool, sharing one
+authenticated session and connection pool.  At most max_in_flight calls
+run at the same time, the rest wait their turn.
+
+The iter_ helpers return async iterators, which get one page at a time:
+async for ip_obj in conn.iter_ip_list(networkid):
+    ...
+
+Left out: do_many, use asyncio.gather instead, and mount_adapter and
+grow_pool, since the pool is sized for max_in_flight already.
+"""
+
+import asyncio
+import collections
+import functools
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from bluecat_bam.api import BAM
+
+# double underscore names
+__progname__ = "async_api"
+__version__ = "0.2.7"
+
+
+def take(iterator, count):
+    """list of up to count items from iterator"""
+    return list(itertools.islice(iterator, count))
+
+
+class AsyncIterator:
+    """async iterator over a blocking iterator, like one from
+    BAM.iter_bam_api_list, getting batch items at a time in the thread pool"""
+
+    def __init__(self, call, iterator, batch):
+        self.call = call
+        self.iterator = iterator
+        self.batch = batch
+        self.items = collections.deque()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.items:
+            self.items.extend(await self.call(take, self.iterator, self.batch))
+            if not self.items:
+                raise StopAsyncIteration
+        return self.items.popleft()
+
+
+class AsyncBAM:  # pylint: disable=R0902,R0904
+    """asyncio wrapper around BAM, with bounded concurrency"""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        server,
+        username,
+        password,
+        raw=False,
+        raw_in=False,
+        timeout=None,
+        max_retries=None,
+        verify=True,
+        max_in_flight=10,
+        token_cache=None,
+        cache=None,
+        result_factory=None,
+        metrics=None,
+        tracer=None,
+        transport=None,
+        limiter=None,
+        retry=None,
+        coalesce=None,
+    ):
+        """save settings, login is done by 'await login()' or 'async with',
+        the other arguments are those of BAM, with max_in_flight for pool_maxsize"""
+        if not max_in_flight or max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.max_in_flight = max_in_flight
+        self.bam_args = {
+            "server": server,
+            "username": username,
+            "password": password,
+            "raw": raw,
+            "raw_in": raw_in,
+            "timeout": timeout,
+            "max_retries": max_retries,
+            "verify": verify,
+            "pool_maxsize": max_in_flight,
+            "token_cache": token_cache,
+            "cache": cache,
+            "result_factory": result_factory,
+            "metrics": metrics,
+            "tracer": tracer,
+            "transport": transport,
+            "limiter": limiter,
+            "retry": retry,
+            "coalesce": coalesce,
+        }
+        self.conn = None  # the BAM session, created by login()
+        self.executor = None
+        self.semaphore = None  # created in the running event loop, see _call
+        self.semaphore_loop = None
+
+    async def __aenter__(self):
+        await self.login()
+        return self
+
+    async def __aexit__(self, *args):
+        try:
+            await self.logout()
+        finally:
+            self.close()
+
+    async def _call(self, func, *args, **kwargs):
+        """run a blocking function in the thread pool,
+        waiting for a free slot if max_in_flight calls are already running"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_in_flight)
+        loop = asyncio.get_running_loop()
+        if self.semaphore_loop is not loop:  # a semaphore works in one loop only
+            self.semaphore = asyncio.Semaphore(self.max_in_flight)
+            self.semaphore_loop = loop
+        async with self.semaphore:
+            return await loop.run_in_executor(
+                self.executor, functools.partial(func, *args, **kwargs)
+            )
+
+    async def login(self):
+        """login to BlueCat server API, get token, set header"""
+        if self.conn is None:
+            self.conn = await self._call(functools.partial(BAM, **self.bam_args))
+        else:
+            await self._call(self.conn.login)
+
+    async def logout(self):
+        """log out of BlueCat server, return nothing"""
+        if self.conn is not None:
+            await self._call(self.conn.logout)
+
+    def close(self):
+        """close the connection pool and thread pool"""
+        if self.conn is not None:
+            self.conn.close()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    async def do(self, command, method=None, data=None, **kwargs):
+        # pylint: disable=invalid-name
+        """run any BlueCat REST API command"""
+        return await self._call(
+            self.conn.do, command, method=method, data=data, **kwargs
+        )
+
+    # conversions do not touch the network, so they are shared with BAM
+    convert_url = staticmethod(BAM.convert_url)
+    convert_dict_in_str_to_dict = staticmethod(BAM.convert_dict_in_str_to_dict)
+    convert_data = BAM.convert_data
+    convert_dict_to_str = staticmethod(BAM.convert_dict_to_str)
+    convert_response = BAM.convert_response
+    convert_dict_entries = BAM.convert_dict_entries
+    convert_str_to_dict = staticmethod(BAM.convert_str_to_dict)
+    get_method_from_command = staticmethod(BAM.get_method_from_command)
+    argparsecommon = staticmethod(BAM.argparsecommon)
+    make_dhcp_ranges_list = staticmethod(BAM.make_dhcp_ranges_list)
+    make_ip_dict = staticmethod(BAM.make_ip_dict)
+
+    def stats(self):
+        """dict of metrics by command, counters, and cache stats"""
+        return self.conn.stats()
+
+    def reset_stats(self):
+        """start metrics and counters again from zero"""
+        self.conn.reset_stats()
+
+    def match_type(self, object_ident):
+        """find type as id, MACAddress, IP4Address, CIDR, IP4Range, or None"""
+        return self.conn.match_type(object_ident)
+
+    # helpers, each runs as one call in the thread pool
+
+    async def get_config_and_view(self, configuration_name, view_name=None):
+        """get configuration_id and view_id"""
+        return await self._call(
+            self.conn.get_config_and_view, configuration_name, view_name
+        )
+
+    async def get_bam_api_list(self, apiname, **kwargs):
+        """wrap api call with loop to handle 'start' and 'count'"""
+        return await self._call(self.conn.get_bam_api_list, apiname, **kwargs)
+
+    def iter_bam_api_list(self, apiname, prefetch=False, parallel_pages=1, **kwargs):
+        """async iterator version of get_bam_api_list, for 'async for',
+        holding about one page in memory at a time"""
+        return AsyncIterator(
+            self._call,
+            self.conn.iter_bam_api_list(
+                apiname, prefetch=prefetch, parallel_pages=parallel_pages, **kwargs
+            ),
+            int(kwargs.get("count") or 1000),
+        )
+
+    async def get_id_list(self, object_ident, containerId, object_type):
+        """get object id, or a list of objects from a file"""
+        return await self._call(
+            self.conn.get_id_list, object_ident, containerId, object_type
+        )
+
+    async def get_obj_list(self, object_ident, containerId, object_type):
+        """get object, or a list of objects from a file or stdin('-')"""
+        return await self._call(
+            self.conn.get_obj_list, object_ident, containerId, object_type
+        )
+
+    async def get_obj(self, object_ident, containerId, object_type, warn=True):
+        """get an object, given an id, IP, CIDR, or range,
+        return object and type matched"""
+        return await self._call(
+            self.conn.get_obj, object_ident, containerId, object_type, warn=warn
+        )
+
+    async def get_obj_lines(self, fd, containerId, object_type):
+        """read lines, get obj, return obj list"""
+        return await self._call(self.conn.get_obj_lines, fd, containerId, object_type)
+
+    async def get_range(self, address, containerId, object_type):
+        """get range - block, network, or dhcp range - by IPv4 or IPv6"""
+        return await self._call(self.conn.get_range, address, containerId, object_type)
+
+    async def getinterface(self, server_name, configuration_id):
+        """get server interface object, given the server name or interface name"""
+        return await self._call(self.conn.getinterface, server_name, configuration_id)
+
+    async def getserverbyinterfacename(self, server_name, configuration_id):
+        """search by server name, short or long, divided at dots"""
+        return await self._call(
+            self.conn.getserverbyinterfacename, server_name, configuration_id
+        )
+
+    async def getserverbyservername(self, server_name, configuration_id):
+        """get server by servername"""
+        return await self._call(
+            self.conn.getserverbyservername, server_name, configuration_id
+        )
+
+    async def getserver(self, server_name, configuration_id):
+        """return server and interface objects"""
+        return await self._call(self.conn.getserver, server_name, configuration_id)
+
+    async def get_zone(self, domain_name, view_id):
+        """find closest zone for domain_name,
+        return zone_obj,remainder (possibly dotted name)"""
+        return await self._call(self.conn.get_zone, domain_name, view_id)
+
+    async def get_fqdn(self, domain_name, view_id, record_type="HostRecord"):
+        """get list of entities with given fqdn and type"""
+        return await self._call(
+            self.conn.get_fqdn, domain_name, view_id, record_type=record_type
+        )
+
+    async def delete_ip_obj(self, ip_obj):
+        """delete ip obj, handle case of DHCP_ALLOCATED"""
+        return await self._call(self.conn.delete_ip_obj, ip_obj)
+
+    async def get_dhcp_ranges(self, networkid):
+        """get list of ranges"""
+        return await self._call(self.conn.get_dhcp_ranges, networkid)
+
+    def iter_dhcp_ranges(self, networkid, prefetch=False):
+        """async iterator version of get_dhcp_ranges"""
+        return AsyncIterator(
+            self._call, self.conn.iter_dhcp_ranges(networkid, prefetch=prefetch), 1000
+        )
+
+    async def getparentview(self, entity_id):
+        """walk tree up to view, with cache"""
+        return await self._call(self.conn.getparentview, entity_id)
+
+    async def get_ip_list(self, networkid, states=None):
+        """returns [filtered] list of IP entities, given a network id
+        and optional list of states"""
+        return await self._call(self.conn.get_ip_list, networkid, states=states)
+
+    def iter_ip_list(self, networkid, states=None, prefetch=False):
+        """async iterator version of get_ip_list"""
+        return AsyncIterator(
+            self._call,
+            self.conn.iter_ip_list(networkid, states=states, prefetch=prefetch),
+            1000,
+        )
+
+    async def get_shared_network_tag_by_name(self, name, configuration_id):
+        """get shared network tag by name, in configuration"""
+        return await self._call(
+            self.conn.get_shared_network_tag_by_name, name, configuration_id
+        )
+
+    async def get_parent(self, entity_id):
+        """getParent, remembering each answer, see BAM.get_parent"""
+        return await self._call(self.conn.get_parent, entity_id)
+
+    async def find_parent_of_type(self, obj_id, obj_type):
+        """search up tree for parent with the given type"""
+        return await self._call(self.conn.find_parent_of_type, obj_id, obj_type)
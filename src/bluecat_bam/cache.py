@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) REST API response cache
+
+Copyright (C) 2018,2019 Regents of the University of Michigan
+Apache License Version 2.0, see LICENSE file
+This is a community supported open source project, not endorsed by BlueCat.
+"BlueCat Address Manager" is a trademark of BlueCat Networks (USA) Inc. and its
+affiliates.
+
+Read-through cache for GET commands, used inside BAM.do, like:
+with BAM(server, username, password, cache=ResponseCache()) as conn:
+    conn.get_config_and_view(configuration_name, view_name)  # from BAM
+    conn.get_config_and_view(configuration_name, view_name)  # from cache
+    print(conn.cache.stats())
+
+Entries are evicted least recently used first, and expire after a ttl,
+which can be set per command.  Any POST, PUT, or DELETE clears the whole
+cache, since the REST API does not say which objects a write changes
+(adding an IP address changes the lists of its network, block, and MAC),
+both before the write is sent and after it returns.  A read that was sent
+before the last invalidation is not saved, since it may have been answered
+before the write, see put().  To cache differently, subclass and replace
+key(), get(), put(), or invalidate().
+"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import collections
+import threading
+import time
+
+# double underscore names
+__progname__ = "cache"
+__version__ = "0.2.7"
+
+NOT_CACHED = frozenset(["login", "logout"])
+
+
+class ResponseCache:
+    """LRU cache of response text, keyed on command and parameters"""
+
+    def __init__(self, maxsize=1024, ttl=300, ttls=None):
+        """maxsize entries, each kept ttl seconds,
+        ttls is a dict of command: seconds, to override ttl, 0 to not cache"""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.entries = collections.OrderedDict()  # key: (expires, text)
+        self.lock = threading.Lock()
+        self.counters = collections.Counter()
+        self.generation = 0  # one more for each invalidate() or clear()
+
+    def cacheable(self, command):
+        """True if responses to this (GET) command should be kept"""
+        return command not in NOT_CACHED and self.ttls.get(command, self.ttl) > 0
+
+    @staticmethod
+    def key(command, params, data):
+        """same key for the same request, whatever the order or type of params"""
+        normalized = tuple(
+            sorted(
+                (name, str(value))
+                for name, value in params.items()
+                if value is not None
+            )
+        )
+        return command, normalized, str(data)
+
+    def get(self, key):
+        """return cached response text, or None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self.entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return entry[1]
+                del self.entries[key]
+                self.counters["expired"] += 1
+            self.counters["misses"] += 1
+        return None
+
+    def put(self, key, text, generation=None):
+        """save response text,
+        unless generation, self.generation before the request was sent,
+        shows the cache was invalidated since, by a write that may have
+        changed the answer"""
+        ttl = self.ttls.get(key[0], self.ttl)
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                self.counters["stale"] += 1
+                return
+            self.entries[key] = (time.time() + ttl, text)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def invalidate(self, command, params):  # pylint: disable=unused-argument
+        """called before each write command is sent, and after it returns,
+        drops everything"""
+        with self.lock:
+            self.generation += 1
+            if self.entries:
+                self.counters["invalidations"] += 1
+                self.entries.clear()
+
+    def clear(self):
+        """drop everything, without counting an invalidation"""
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+    def stats(self):
+        """dict of hits, misses, expired, evictions, invalidations, stale
+        (responses not saved, see put), and size"""
+        names = ("hits", "misses", "expired", "evictions", "invalidations", "stale")
+        with self.lock:
+            stats = {name: self.counters[name] for name in names}
+            stats["size"] = len(self.entries)
+        stats["maxsize"] = self.maxsize
+        return stats
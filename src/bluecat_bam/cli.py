@@ -25,6 +25,13 @@ bam getEntityByName method=get parentId=0 name=admin type=User
 "userType": "ADMIN", "userAccessType": "GUI", "email": "admin@domain.example"},
 "name": "admin", "id": 3}
 
+To run many commands in one session, put them in a file of JSON lines,
+each like {"command": "getEntityById", "params": {"id": 5}}, and use:
+bam --batch commands.jsonl --workers 4
+("-" reads standard input), which prints a JSON line for each command, as it
+finishes, like {"line": 1, "command": "getEntityById", "result": {...}}
+or {"line": 2, "command": "delete", "error": "...", "status": 500}.
+
 The CLI includes verbose options, and can read server,username, and password from
 environment variables.  See help:
 bam -h
@@ -40,6 +47,10 @@ null - returned as those 4 characters, without quotes
 
 If the dictionary has id: 0, that usually means that nothing was returned.
 The output, if JSON, can be fed to "jq" to further process the data.
+With --output jsonl, a list is printed one entity per line, and with --all,
+every page of a command that takes start and count is printed as it arrives,
+--page_size entities at a time, --parallel_pages pages at once:
+bam getEntities parentId=1234 type=IP4Address --all --output jsonl | jq .name
 
 "HTTPError: 500 Server Error" can be caused by lack of access rights.
 
@@ -62,7 +73,19 @@ import sys
 import logging
 import json
 import argparse
-from bluecat_bam.api import BAM
+import signal
+
+# only what every call needs, so that a call answered by 'bam daemon' is fast,
+# BAM and requests are imported in run_session
+from bluecat_bam.daemon import (
+    Daemon,
+    forward,
+    session_of,
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_SOCKET,
+)
+from bluecat_bam.entity import json_default
+from bluecat_bam.token_cache import TokenCache, DEFAULT_TTL
 
 # double underscore names
 __progname__ = "cli"
@@ -71,6 +94,85 @@ __version__ = "0.2.7"
 
 def main():
     """CLI - Command Line Interface"""
+    config = make_parser()
+    # options can also come after the command, like: getEntities ... --all
+    args = getattr(config, "parse_intermixed_args", config.parse_args)()
+
+    logger = logging.getLogger()
+    logging.basicConfig(format="%(asctime)s %(levelname)s: %(message)s")
+    logger.setLevel(args.logging)
+
+    params = parse_params(args)
+
+    if not (args.server and args.username and args.password):
+        print(
+            "server, username, and password are required.\n",
+            "Please put them in the environment.\n",
+        )
+        print("Type '%s -h' for help" % (os.path.basename(sys.argv[0])))
+        # config.print_help()  # printing full help on every mistake is too much
+        # raise ValueError  # stacktrace here is not useful
+        sys.exit(2)
+    logging.debug("raw: %s", args.raw)
+    if not args.raw:
+        args.raw = False
+        logging.debug("raw_in changed to False")
+    else:
+        args.raw = make_bool(args.raw)
+        logging.debug("raw_in made bool")
+
+    logging.debug("raw_in: %s", args.raw_in)
+    if not args.raw_in:
+        args.raw_in = False
+    else:
+        args.raw_in = make_bool(args.raw_in)
+    logging.debug("raw_in: %s", args.raw_in)
+
+    failed = None if args.command == "daemon" else run_forwarded(args, params)
+    if failed is None:
+        failed = run_session(args, params)
+    if failed:
+        sys.exit(1)
+
+
+def run_session(args, params):
+    """log in and run the command, the --batch, or the daemon,
+    returns the number that failed"""
+    # pylint: disable=import-outside-toplevel
+    from bluecat_bam.api import BAM
+    from bluecat_bam.cache import ResponseCache
+    from bluecat_bam.tracing import Tracer
+
+    token_cache = None
+    if args.token_cache:
+        token_cache = TokenCache(args.token_cache, ttl=args.token_ttl)
+
+    # call MAIN
+    with BAM(
+        args.server,
+        args.username,
+        args.password,
+        raw=args.raw,
+        raw_in=args.raw_in,
+        verify=args.verify,
+        token_cache=token_cache,
+        cache=ResponseCache(ttl=args.cache_ttl) if args.cache_ttl else None,
+        tracer=Tracer(args.trace) if args.trace else None,
+        transport=BAM.transport_from_args(args),
+    ) as conn:
+        if args.command == "daemon":
+            failed = run_daemon(conn, args)
+        elif args.batch:
+            failed = run_batch(conn, args.batch, args.workers)
+        else:
+            failed = run_command(conn, args, params)
+        if args.stats:
+            print(conn.metrics.summary(), file=sys.stderr)
+    return failed
+
+
+def make_parser():
+    """argparse parser for the CLI options"""
     config = argparse.ArgumentParser(
         description="BlueCat Address Manager raw JSON REST API python module and CLI"
     )
@@ -119,15 +221,125 @@ def main():
     )
     config.add_argument("--verify", default=True, help="verify SSL Cert, default True")
     config.add_argument(
-        "command", help="BlueCat REST API command, for example: getEntityById"
+        "--token_cache",
+        default=os.getenv("BLUECAT_TOKEN_CACHE"),
+        help="file to save the login token in, to skip login and logout "
+        + "on the next call, like ~/.cache/bluecat_bam/tokens.json",
+    )
+    config.add_argument(
+        "--token_ttl",
+        type=float,
+        default=os.getenv("BLUECAT_TOKEN_TTL", DEFAULT_TTL),
+        help="seconds to reuse a cached token, default %s" % (DEFAULT_TTL),
+    )
+    config.add_argument(
+        "--stats",
+        action="store_true",
+        default=make_bool(os.getenv("BLUECAT_STATS", "false")),
+        help="print calls, errors, bytes, and latency of each command to stderr",
+    )
+    config.add_argument(
+        "--trace",
+        default=os.getenv("BLUECAT_TRACE"),
+        help="file to save a trace of the API calls in, in Chrome trace-event "
+        + "format, for chrome://tracing or https://ui.perfetto.dev",
+    )
+    config.add_argument(
+        "--record",
+        default=os.getenv("BLUECAT_RECORD"),
+        help="file to record the API calls and responses in, to --replay later",
+    )
+    config.add_argument(
+        "--replay",
+        default=os.getenv("BLUECAT_REPLAY"),
+        help="file from --record, to answer the API calls from, "
+        + "instead of the server",
+    )
+    config.add_argument(
+        "--replay_latency",
+        type=float,
+        default=os.getenv("BLUECAT_REPLAY_LATENCY", "0"),
+        help="part of the recorded server time to wait in --replay, "
+        + "1 for the same, default 0",
+    )
+    config.add_argument(
+        "--batch",
+        default=os.getenv("BLUECAT_BATCH"),
+        help="file of JSON lines, like "
+        + '{"command": "getEntityById", "params": {"id": 5}}, '
+        + "to run in one session, - for standard input",
+    )
+    config.add_argument(
+        "--workers",
+        type=int,
+        default=os.getenv("BLUECAT_WORKERS", "1"),
+        help="commands to run at once with --batch, default 1",
+    )
+    config.add_argument(
+        "--socket",
+        default=os.getenv("BLUECAT_SOCKET"),
+        help="Unix socket of 'bam daemon', which commands are sent to "
+        + "when it is running, default %s" % (DEFAULT_SOCKET),
+    )
+    config.add_argument(
+        "--idle_timeout",
+        type=float,
+        default=os.getenv("BLUECAT_IDLE_TIMEOUT", DEFAULT_IDLE_TIMEOUT),
+        help="seconds without a call before 'bam daemon' logs out and exits, "
+        + "default %s" % (DEFAULT_IDLE_TIMEOUT),
+    )
+    config.add_argument(
+        "--cache_ttl",
+        type=float,
+        default=os.getenv("BLUECAT_CACHE_TTL", "0"),
+        help="seconds to answer repeated reads from memory, "
+        + "useful with 'bam daemon', default 0 (not cached)",
+    )
+    config.add_argument(
+        "--output",
+        "-o",
+        choices=("json", "jsonl"),
+        default=os.getenv("BLUECAT_OUTPUT", "json"),
+        help="json (default), or jsonl for a list printed one entity per line, "
+        + "as each page arrives with --all",
+    )
+    config.add_argument(
+        "--all",
+        action="store_true",
+        default=make_bool(os.getenv("BLUECAT_ALL", "false")),
+        help="get every page of a command that takes start and count, "
+        + "like getEntities, printing each page as it arrives",
+    )
+    config.add_argument(
+        "--page_size",
+        "--page-size",
+        type=int,
+        default=os.getenv("BLUECAT_PAGE_SIZE"),
+        help="entities in each page with --all, default the count= argument, "
+        + "or 1000",
+    )
+    config.add_argument(
+        "--parallel_pages",
+        "--parallel-pages",
+        type=int,
+        default=os.getenv("BLUECAT_PARALLEL_PAGES", "1"),
+        help="pages to request at once with --all, default 1, "
+        + "which still requests the next page while printing this one",
     )
-    config.add_argument("args", nargs=argparse.REMAINDER)
-    args = config.parse_args()
+    config.add_argument(
+        "command",
+        nargs="?",
+        help="BlueCat REST API command, for example: getEntityById, "
+        + "or daemon, to keep a session for later calls",
+    )
+    config.add_argument(
+        "args", nargs="*", help="arguments of the command, like: id=5 name=admin"
+    )
+    return config
 
-    logger = logging.getLogger()
-    logging.basicConfig(format="%(asctime)s %(levelname)s: %(message)s")
-    logger.setLevel(args.logging)
 
+def parse_params(args):
+    """the params dictionary, from the name=value args after the command"""
     # should use a 'comprehension' ?? ***
     params = {}  # create the params dictionary
     params["body"] = None  # default value
@@ -142,44 +354,176 @@ def main():
             # raise ValueError  # stacktrace here is not useful
             sys.exit(1)
 
-    if not (args.server and args.username and args.password):
-        print(
-            "server, username, and password are required.\n",
-            "Please put them in the environment.\n",
-        )
+    if not (args.command or args.batch) or (args.batch and args.args):
+        print("ERROR - give either a command and its arguments, or --batch")
         print("Type '%s -h' for help" % (os.path.basename(sys.argv[0])))
-        # config.print_help()  # printing full help on every mistake is too much
-        # raise ValueError  # stacktrace here is not useful
-        sys.exit(2)
-    logging.debug("raw: %s", args.raw)
-    if not args.raw:
-        args.raw = False
-        logging.debug("raw_in changed to False")
-    else:
-        args.raw = make_bool(args.raw)
-        logging.debug("raw_in made bool")
+        sys.exit(1)
+    if args.all and not pageable(args.command):
+        print("ERROR - %s does not take start and count, for --all" % (args.command))
+        sys.exit(1)
+    return params
 
-    logging.debug("raw_in: %s", args.raw_in)
-    if not args.raw_in:
-        args.raw_in = False
+
+def pageable(command):
+    """True if the command takes start and count, or is not in commands.json"""
+    # pylint: disable=import-outside-toplevel
+    from bluecat_bam.registry import get_registry
+
+    registry = get_registry()
+    return registry.get(command) is None or registry.paginated(command)
+
+
+def run_command(conn, args, params):
+    """run one command, or with --all, get every page of it,
+    printing the result as --output, returns 0 (failed)"""
+    if args.all:
+        params["count"] = args.page_size or int(params.get("count") or 1000)
+        entities = conn.iter_bam_api_list(
+            args.command, prefetch=True, parallel_pages=args.parallel_pages, **params
+        )
+        print_entities(entities, args.output, flush_every=params["count"])
     else:
-        args.raw_in = make_bool(args.raw_in)
-    logging.debug("raw_in: %s", args.raw_in)
+        print_result(conn.do(args.command, **params), args.output)
+    return 0
 
-    # call MAIN
-    with BAM(
-        args.server,
-        args.username,
-        args.password,
-        raw=args.raw,
-        raw_in=args.raw_in,
-        verify=args.verify,
-    ) as conn:
-        entity = conn.do(args.command, **params)
+
+def print_result(entity, output="json"):
+    """print the result of a command as JSON,
+    or with output="jsonl", a list as one entity per line"""
+    if output == "jsonl" and isinstance(entity, list):
+        print_entities(entity, output)
+        return
+    try:
+        print(json.dumps(entity, default=json_default))
+    except ValueError:
+        print("Failed to convert to json: %s" % (entity))
+
+
+def print_entities(entities, output="json", flush_every=1000):
+    """print each entity as it comes from an iterable, like iter_bam_api_list,
+    as JSON lines, or as one JSON list, so only one page is held in memory,
+    flushing every flush_every (a page), so a pipe sees each page as it arrives"""
+    num = 0
+    for num, entity in enumerate(entities, 1):
+        text = json.dumps(entity, default=json_default)
+        if output == "jsonl":
+            print(text)
+        else:
+            print(("[" if num == 1 else ", ") + text, end="")
+        if num % flush_every == 0:
+            sys.stdout.flush()
+    if output != "jsonl":
+        print("]" if num else "[]")
+    sys.stdout.flush()
+
+
+def session_from_args(args):
+    """session_of the settings that the daemon and a call must agree on"""
+    return session_of(
+        args.server, args.username, args.raw, args.raw_in, args.verify, args.cache_ttl
+    )
+
+
+def run_forwarded(args, params):
+    """send the command to 'bam daemon', and print the answer,
+    returns the number that failed,
+    or None if the daemon is not running, or this needs its own session"""
+    # these need a session in this process
+    if any((args.batch, args.all, args.stats, args.trace, args.record, args.replay)):
+        return None
+    answer = forward(session_from_args(args), args.command, params, args.socket)
+    if answer is None:
+        return None
+    if "error" in answer:
+        print(answer["error"], file=sys.stderr)
+        return 1
+    print_result(answer["result"], args.output)
+    return 0
+
+
+def run_daemon(conn, args):
+    """serve the session to later calls, until idle for --idle_timeout"""
+    daemon = Daemon(
+        conn, session_from_args(args), args.socket, args.idle_timeout or None
+    )
+    # on kill, log out and remove the socket, like on Ctrl-C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        daemon.listen()
+    except RuntimeError as error:  # another daemon
+        print("ERROR - %s" % (error), file=sys.stderr)
+        return 1
+    try:
+        daemon.serve()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    logging.info("daemon stats: %s", daemon.stats())
+    return 0
+
+
+def read_batch(batch_file, numbers, bad_lines):
+    """(command, params) for each line of a --batch file, like
+    {"command": "getEntityById", "params": {"id": 5}},
+    appending its line number and command to numbers,
+    lines that are not like that are appended to bad_lines as output instead"""
+    for number, line in enumerate(batch_file, 1):
+        if not line.strip():
+            continue
         try:
-            print(json.dumps(entity))
-        except ValueError:
-            print("Failed to convert to json: %s" % (entity))
+            call = json.loads(line)
+            if not isinstance(call, dict) or not call.get("command"):
+                raise ValueError('"command" is required')
+            params = call.get("params") or {}
+            if not isinstance(params, dict):
+                raise ValueError('"params" must be an object')
+        except ValueError as error:
+            bad_lines.append({"line": number, "error": "bad line: %s" % (error)})
+            continue
+        numbers.append((number, call["command"]))
+        yield call["command"], params
+
+
+def run_batch(conn, path, workers=1):
+    """run each command in a --batch file ("-" for stdin) over one session,
+    printing a JSON line for each as it finishes (in order with 1 worker),
+    returns the number of lines that failed"""
+    batch_file = sys.stdin if path == "-" else open(path)
+    numbers = []  # (line number, command) of each call, by index
+    bad_lines = []
+    failed = 0
+    try:
+        calls = read_batch(batch_file, numbers, bad_lines)
+        for index, result, error in conn.do_many(
+            calls, workers=max(workers, 1), ordered=workers <= 1
+        ):
+            failed += print_lines(bad_lines)
+            number, command = numbers[index]
+            output = {"line": number, "command": command}
+            if error is None:
+                output["result"] = result
+            else:
+                failed += 1
+                output["error"] = "%s: %s" % (type(error).__name__, error)
+                response = getattr(error, "response", None)
+                if response is not None:
+                    output["status"] = response.status_code
+            print_lines([output])
+        failed += print_lines(bad_lines)
+    finally:
+        if batch_file is not sys.stdin:
+            batch_file.close()
+    return failed
+
+
+def print_lines(outputs):
+    """print each as a JSON line, right away, and empty the list,
+    returns how many there were"""
+    for output in outputs:
+        print(json.dumps(output, default=json_default))
+    sys.stdout.flush()
+    count = len(outputs)
+    del outputs[:]
+    return count
 
 
 def make_bool(var):
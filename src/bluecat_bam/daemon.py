@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) REST API session daemon
+
+Copyright (C) 2018,2019 Regents of the University of Michigan
+Apache License Version 2.0, see LICENSE file
+This is a community supported open source project, not endorsed by BlueCat.
+"BlueCat Address Manager" is a trademark of BlueCat Networks (USA) Inc. and its
+affiliates.
+
+Keeps one logged in BAM session, with its connection pool and caches, and
+answers commands sent to it on a Unix domain socket, so that each call from
+the CLI costs about one HTTP round trip, instead of a login and logout:
+bam daemon &                     # until idle for --idle_timeout seconds
+bam getEntityById id=5           # sent to the daemon, if it is running
+
+The socket is made readable only by its owner, in a directory only the owner
+can use, default ~/.cache/bluecat_bam/daemon.sock, or set BLUECAT_SOCKET.
+Each request is a JSON line like:
+{"session": {"server": ..., "username": ..., "raw": false, "raw_in": false,
+             "verify": "True", "cache_ttl": 0.0},
+ "command": "getEntityById", "params": {"id": 5}}
+and each answer a JSON line, {"result": ...} or {"error": ..., "status": 500}.
+A request for a different session than the daemon has, including other
+--verify or --cache_ttl settings, is not run, so the client runs it itself,
+as it does when no daemon is listening, or one does not accept the connection
+within CONNECT_TIMEOUT seconds.  A command that the daemon does not answer
+within the timeout of forward() is reported as an error, not run again.
+"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import collections
+import json
+import logging
+import os
+import socket
+import threading
+
+from bluecat_bam.entity import json_default
+
+try:
+    import socketserver
+except ImportError:  # python2
+    import SocketServer as socketserver  # pylint: disable=import-error
+
+# double underscore names
+__progname__ = "daemon"
+__version__ = "0.2.7"
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = os.path.join("~", ".cache", "bluecat_bam", "daemon.sock")
+DEFAULT_IDLE_TIMEOUT = 3600
+# seconds to wait for the daemon to accept a connection, and to answer
+CONNECT_TIMEOUT = 5
+DEFAULT_FORWARD_TIMEOUT = 600
+
+
+def socket_path(path=None):
+    """path of the daemon socket, from path, $BLUECAT_SOCKET, or the default"""
+    return os.path.expanduser(path or os.getenv("BLUECAT_SOCKET") or DEFAULT_SOCKET)
+
+
+def session_of(server, username, raw=False, raw_in=False, verify=True, cache_ttl=0):
+    """what a request and the daemon must agree on, to share the session,
+    in the form it has after a trip through JSON"""
+    return {
+        "server": server,
+        "username": username,
+        "raw": raw,
+        "raw_in": raw_in,
+        "verify": str(verify),
+        "cache_ttl": float(cache_ttl or 0),
+    }
+
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+    """answers each JSON line from one client, until it closes"""
+
+    def handle(self):
+        daemon = self.server.daemon
+        daemon.active(1)
+        try:
+            for line in self.rfile:
+                answer = daemon.answer(line)
+                reply = json.dumps(answer, default=json_default) + "\n"
+                self.wfile.write(reply.encode("utf-8"))
+                self.wfile.flush()
+        finally:
+            daemon.active(-1)
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """one thread per client"""
+
+    daemon_threads = True
+
+    def __init__(self, path, daemon):
+        self.daemon = daemon
+        socketserver.UnixStreamServer.__init__(self, path, DaemonHandler)
+
+    def handle_timeout(self):
+        if not self.daemon.stats().get("clients"):
+            LOGGER.info("idle for %s seconds, stopping", self.timeout)
+            self.daemon.stopped = True
+
+
+class Daemon:  # pylint: disable=R0902
+    """serves one BAM session on a Unix domain socket"""
+
+    def __init__(self, conn, session, path=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        """conn is a logged in BAM, session is session_of() its settings,
+        idle_timeout is seconds without a new client before serve() returns,
+        None to serve until stopped"""
+        self.conn = conn
+        self.session = session
+        self.path = socket_path(path)
+        self.idle_timeout = idle_timeout
+        self.stopped = False
+        self.server = None
+        # answered, errors, other_session, and clients connected now
+        self.counters = collections.Counter()
+        self.lock = threading.Lock()
+
+    def count(self, name):
+        """add one to a counter"""
+        with self.lock:
+            self.counters[name] += 1
+
+    def active(self, change):
+        """count clients connected now"""
+        with self.lock:
+            self.counters["clients"] += change
+
+    def answer(self, line):
+        """answer dict for one request line"""
+        try:
+            request = json.loads(line.decode("utf-8"))
+            command = request["command"]
+            params = request.get("params") or {}
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            self.count("errors")
+            return {"error": "bad request: %s" % (error)}
+        if request.get("session") != self.session:
+            self.count("other_session")
+            return {"error": "daemon has another session", "other_session": True}
+        try:
+            result = self.conn.do(command, **params)
+        except Exception as error:  # pylint: disable=broad-except
+            self.count("errors")
+            answer = {"error": "%s: %s" % (type(error).__name__, error)}
+            response = getattr(error, "response", None)
+            if response is not None:
+                answer["status"] = response.status_code
+            return answer
+        self.count("answered")
+        return {"result": result}
+
+    def listen(self):
+        """bind the socket, only for this user, replacing a stale one"""
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+        if os.path.exists(self.path):
+            if listening(self.path):
+                raise RuntimeError("a daemon is already listening on %s" % self.path)
+            os.unlink(self.path)
+        old_umask = os.umask(0o177)
+        try:
+            self.server = DaemonServer(self.path, self)
+        finally:
+            os.umask(old_umask)
+        self.server.timeout = self.idle_timeout
+        LOGGER.info("listening on %s", self.path)
+
+    def serve(self):
+        """answer clients until stop(), or idle for idle_timeout"""
+        if self.server is None:
+            self.listen()
+        try:
+            while not self.stopped:
+                self.server.handle_request()
+        finally:
+            self.close()
+
+    def stop(self):
+        """make serve() return, from another thread"""
+        self.stopped = True
+        listening(self.path)  # wakes handle_request
+
+    def close(self):
+        """stop listening and remove the socket"""
+        if self.server is not None:
+            self.server.server_close()
+            self.server = None
+            try:
+                os.unlink(self.path)
+            except OSError:  # already gone
+                pass
+
+    def stats(self):
+        """dict of counters"""
+        with self.lock:
+            return dict(self.counters)
+
+
+def listening(path):
+    """True if something accepts connections on the socket at path"""
+    client = connect(path)
+    if client is None:
+        return False
+    client.close()
+    return True
+
+
+def connect(path):
+    """socket connected to the daemon at path, or None if nothing there
+    accepts a connection within CONNECT_TIMEOUT seconds"""
+    if not os.path.exists(path):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(CONNECT_TIMEOUT)
+    try:
+        client.connect(path)
+    except socket.timeout:
+        LOGGER.warning("daemon at %s did not accept the connection", path)
+        client.close()
+        return None
+    except socket.error:
+        client.close()
+        return None
+    return client
+
+
+def forward(session, command, params, path=None, timeout=DEFAULT_FORWARD_TIMEOUT):
+    """send one command to the daemon, returns its answer dict,
+    or None if no daemon is listening at path, or it has another session,
+    so the caller should run the command itself.
+    Once sent, the command is not sent again, since it might be a write,
+    so if there is no answer within timeout seconds, the answer is an error."""
+    path = socket_path(path)
+    client = connect(path)
+    if client is None:
+        return None
+    client.settimeout(timeout)
+    request = {"session": session, "command": command, "params": params}
+    try:
+        client.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        reply = client.makefile("rb").readline()
+    except socket.timeout:
+        return {
+            "error": "no answer from the daemon at %s in %s seconds, "
+            "%s may still run" % (path, timeout, command)
+        }
+    except socket.error as error:
+        return {"error": "daemon connection lost: %s" % (error)}
+    finally:
+        client.close()
+    if not reply:
+        return {"error": "daemon closed the connection"}
+    answer = json.loads(reply.decode("utf-8"))
+    if answer.get("other_session"):
+        return None
+    return answer
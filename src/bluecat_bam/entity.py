@@ -0,0 +1,353 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) entity representations
+
+Copyright (C) 2018,2019 Regents of the University of Michigan
+Apache License Version 2.0, see LICENSE file
+This is a community supported open source project, not endorsed by BlueCat.
+"BlueCat Address Manager" is a trademark of BlueCat Networks (USA) Inc. and its
+affiliates.
+
+LazyProperties holds an entity's 'name=value|...' properties string,
+and only splits it into a dict the first time it is used.
+Most scripts read one or two properties, like state or address,
+of a few entities in a long list, so most strings are never split.
+
+Entity, and subclasses like IP4Address, are an opt-in compact form,
+for holding many entities at once, like a snapshot of a configuration:
+with BAM(server, username, password, result_factory=make_entity) as conn:
+    ip_list = conn.get_ip_list(networkid)
+    ip_list[0].address  # int
+    ip_list[0]["properties"]["address"]  # str, like a dict entity
+Each uses __slots__ instead of a dict, property names are interned so they
+are shared by all entities, and the properties are kept in one tuple.
+That trades time for memory: tests/benchmark_entity.py holds 1M addresses in
+about a third of the memory of dicts, but takes about 1.7 times as long to
+build them (14.8 s, against 8.8 s for dicts with lazy properties), so BAM
+only builds entities when given a result_factory, and returns dicts otherwise.
+Entities are read-only, entity["properties"] is a read-only mapping, so use
+entity.as_dict() for a dict to change, and to pass to json.dumps, or give
+json.dumps(obj, default=json_default) for a list or dict holding entities.
+"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import socket
+import struct
+
+try:
+    from collections.abc import Mapping
+    from types import MappingProxyType
+except ImportError:  # python2, properties are a plain dict
+    from collections import Mapping  # pylint: disable=W1512,C0412
+
+    MappingProxyType = dict  # pylint: disable=invalid-name
+
+try:
+    from sys import intern
+except ImportError:
+    pass  # python2, intern is a builtin
+
+# double underscore names
+__progname__ = "entity"
+__version__ = "0.2.7"
+
+# python2/3 compatability
+try:
+    basestring  # pylint: disable=E0601
+except NameError:
+    basestring = str  # pylint: disable=invalid-name,redefined-builtin
+
+# stands in for the properties until they are split, so that code which
+# looks at the size of the dict directly (like the C json encoder) sees
+# that it is not empty, and goes on to call items()
+UNPARSED = object()
+MISSING = object()
+
+
+class LazyProperties(dict):
+    """dict of properties, split from the 'name=value|...' string on first use.
+    Looking up single properties, like props["state"], or props.get("address"),
+    reads them from the string without splitting it.
+    Behaves like a dict, is a dict (isinstance), and json.dumps like one.
+    Copies and pickles are plain dicts."""
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw):  # pylint: disable=super-init-not-called
+        dict.__setitem__(self, UNPARSED, None)
+        self.raw = raw
+
+    def parse(self):
+        """split the properties string, once"""
+        raw = self.raw
+        if raw is None:
+            return
+        properties = dict(item.split("=", 1) for item in raw.split("|") if item != "")
+        dict.clear(self)
+        dict.update(self, properties)
+        self.raw = None
+
+    def __reduce__(self):
+        return (dict, (dict(self.items()),))
+
+    def __eq__(self, other):
+        # dict.__eq__ reads the other dict directly, so split both
+        self.parse()
+        if isinstance(other, LazyProperties):
+            other.parse()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        self.parse()
+        if isinstance(other, LazyProperties):
+            other.parse()
+        return dict.__ne__(self, other)
+
+    __hash__ = None  # mutable, like dict
+
+    def find(self, key):
+        """value of one property straight from the string, without splitting it,
+        or MISSING.  Uses the last 'key=', like splitting into a dict would"""
+        raw = self.raw
+        tag = key + "="
+        start = raw.rfind("|" + tag)
+        if start >= 0:
+            start += len(tag) + 1
+        elif raw.startswith(tag):
+            start = len(tag)
+        else:
+            return MISSING
+        end = raw.find("|", start)
+        return raw[start:] if end < 0 else raw[start:end]
+
+    def lookup(self, key):
+        """value of key, or MISSING, splitting the string only if needed"""
+        if self.raw is not None:
+            if isinstance(key, basestring) and "|" not in key and "=" not in key:
+                return self.find(key)
+            self.parse()
+        return dict.get(self, key, MISSING)
+
+    def __getitem__(self, key):
+        value = self.lookup(key)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        """value of key, or default"""
+        value = self.lookup(key)
+        return default if value is MISSING else value
+
+    def __contains__(self, key):
+        return self.lookup(key) is not MISSING
+
+
+def parse_first(name):
+    """dict method 'name' that splits the properties string first"""
+    method = getattr(dict, name)
+
+    def parsed_method(self, *args, **kwargs):
+        if self.raw is not None:
+            self.parse()
+        return method(self, *args, **kwargs)
+
+    parsed_method.__name__ = name
+    parsed_method.__doc__ = method.__doc__
+    return parsed_method
+
+
+for _name in (
+    "__delitem__",
+    "__iter__",
+    "__len__",
+    "__repr__",
+    "__reversed__",
+    "__setitem__",
+    "__or__",
+    "__ror__",
+    "__ior__",
+    "clear",
+    "copy",
+    "items",
+    "keys",
+    "pop",
+    "popitem",
+    "setdefault",
+    "update",
+    "values",
+):
+    if hasattr(dict, _name):  # some are only in newer python versions
+        setattr(LazyProperties, _name, parse_first(_name))
+
+
+def property_items(properties):
+    """(name, value) pairs of properties, given a dict or 'name=value|...' string"""
+    if not properties:
+        return ()
+    if isinstance(properties, LazyProperties) and properties.raw is not None:
+        properties = properties.raw  # no need to split it into a dict first
+    if isinstance(properties, basestring):
+        return (item.split("=", 1) for item in properties.split("|") if item != "")
+    return properties.items()
+
+
+def split_properties(properties):
+    """flat tuple (name, value, name, value, ...) of properties,
+    given a dict or 'name=value|...' string, with the names interned"""
+    flat = []
+    for name, value in property_items(properties):
+        flat.append(intern(str(name)))
+        flat.append(value)
+    return tuple(flat)
+
+
+class Entity:
+    """compact BAM entity: id, name, type, and properties,
+    readable like the dict from BAM.do, as entity["properties"]["name"],
+    but read-only, see as_dict()"""
+
+    __slots__ = ("id", "name", "type", "props")
+    KEYS = ("id", "name", "type", "properties")
+
+    def __init__(self, id, name, type, properties=None):
+        # pylint: disable=redefined-builtin,invalid-name
+        self.id = id
+        self.name = name
+        self.type = intern(str(type)) if type is not None else None
+        self.props = split_properties(properties)
+
+    @classmethod
+    def from_dict(cls, obj):
+        """entity from a dict, as returned by BAM.do, raw or not"""
+        return cls(
+            obj.get("id"), obj.get("name"), obj.get("type"), obj.get("properties")
+        )
+
+    @property
+    def properties(self):
+        """read-only mapping of properties"""
+        return MappingProxyType(self.property_dict())
+
+    def property_dict(self):
+        """new dict of properties"""
+        props = self.props
+        return dict(zip(props[::2], props[1::2]))
+
+    def get_property(self, name, default=None):
+        """value of one property, without making the dict"""
+        props = self.props
+        for num in range(len(props) - 2, -1, -2):  # last one wins, like a dict
+            if props[num] == name:
+                return props[num + 1]
+        return default
+
+    def as_dict(self):
+        """new dict like the one from BAM.do, with a dict of properties,
+        to change, for json.dumps, or convert_data"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "type": self.type,
+            "properties": self.property_dict(),
+        }
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        """like dict.get"""
+        return getattr(self, key) if key in self.KEYS else default
+
+    def __eq__(self, other):
+        if isinstance(other, Entity):
+            other = other.as_dict()
+        return self.as_dict() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None  # mutable, like dict
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, self.as_dict())
+
+
+def ip4_to_int(address):
+    """'10.0.0.1' to 167772161"""
+    return struct.unpack(str("!I"), socket.inet_aton(address))[0]
+
+
+def int_to_ip4(address):
+    """167772161 to '10.0.0.1'"""
+    return socket.inet_ntoa(struct.pack(str("!I"), address))
+
+
+class IP4Address(Entity):
+    """compact IP4Address, with the address kept as an int,
+    and the state interned, since there are only a few"""
+
+    __slots__ = ("address", "state")
+
+    def __init__(self, id, name, type, properties=None):
+        # pylint: disable=redefined-builtin,invalid-name
+        Entity.__init__(self, id, name, type)
+        address = state = None
+        rest = []
+        for prop_name, value in property_items(properties):
+            if prop_name == "address":
+                address = ip4_to_int(value)
+            elif prop_name == "state":
+                state = intern(str(value))
+            else:
+                rest.append(intern(str(prop_name)))
+                rest.append(value)
+        self.address = address
+        self.state = state
+        self.props = tuple(rest)
+
+    def property_dict(self):
+        """new dict of properties, including address and state"""
+        properties = {}
+        if self.address is not None:
+            properties["address"] = int_to_ip4(self.address)
+        if self.state is not None:
+            properties["state"] = self.state
+        properties.update(Entity.property_dict(self))
+        return properties
+
+    def get_property(self, name, default=None):
+        """value of one property, without making the dict"""
+        if name == "address":
+            return default if self.address is None else int_to_ip4(self.address)
+        if name == "state":
+            return default if self.state is None else self.state
+        return Entity.get_property(self, name, default)
+
+
+# entity classes by BAM type, see make_entity
+ENTITY_TYPES = {"IP4Address": IP4Address}
+
+
+def make_entity(obj):
+    """result_factory for BAM, turns each entity dict into an Entity,
+    or the class for its type in ENTITY_TYPES, and passes anything else
+    (like None, or an id) through"""
+    if not isinstance(obj, dict) or "id" not in obj:
+        return obj
+    return ENTITY_TYPES.get(obj.get("type"), Entity).from_dict(obj)
+
+
+def json_default(obj):
+    """default for json.dumps, to write entities, and their properties,
+    anywhere in what is dumped, like a list from get_bam_api_list"""
+    if isinstance(obj, Entity):
+        return obj.as_dict()
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError("%s is not JSON serializable" % (type(obj).__name__))
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) REST API adaptive concurrency limit
+
+Copyright (C) 2018,2019 Regents of the University of Michigan
+Apache License Version 2.0, see LICENSE file
+This is a community supported open source project, not endorsed by BlueCat.
+"BlueCat Address Manager" is a trademark of BlueCat Networks (USA) Inc. and its
+affiliates.
+
+Keeps the number of API calls in flight to one BAM near what it can sustain,
+so that bulk jobs can use many threads without pushing BAM into errors:
+with BAM(server, username, password, limiter=True) as conn:
+    for index, result, error in conn.do_many(calls, workers=64):
+        ...
+
+The limit grows by one for each limit calls that finish while the limit is
+in use (additive increase), and shrinks to backoff times itself (multiplicative
+decrease) when a call is refused as overloaded (http status 429, 502, 503, 504),
+times out, or cannot connect, or when the recent latency of a command grows
+past latency_tolerance times its fastest.  It shrinks at most once for
+the calls that were already in flight, so one burst of errors counts once.
+Calls past the limit wait their turn in BAM.do.
+
+limiter=True shares one limiter between all sessions to the same server,
+see shared_limiter(), so its max_limit is a hard ceiling for the server.
+"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import collections
+import threading
+import time
+
+import requests
+
+# double underscore names
+__progname__ = "limiter"
+__version__ = "0.2.7"
+
+OVERLOAD_STATUS = frozenset([429, 502, 503, 504])
+RECENT_WEIGHT = 0.2  # of each call, in the recent latency of its command
+BASELINE_DRIFT = 0.01  # fastest latency creeps up by this part of each call
+MIN_LATENCY = 0.005  # seconds, below this latency changes are only jitter
+
+SHARED_LIMITERS = {}  # server url: ConcurrencyLimiter
+SHARED_LIMITERS_LOCK = threading.Lock()
+
+
+class ConcurrencyLimiter:  # pylint: disable=R0902
+    """AIMD limit on calls in flight, see acquire() and release()"""
+
+    def __init__(  # pylint: disable=R0913
+        self,
+        initial_limit=4,
+        min_limit=1,
+        max_limit=32,
+        backoff=0.7,
+        latency_tolerance=3.0,
+        overload_status=OVERLOAD_STATUS,
+    ):
+        """limit starts at initial_limit, and stays from min_limit to max_limit"""
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("need 1 <= min_limit <= initial_limit <= max_limit")
+        self.limit_value = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.overload_status = overload_status
+        self.inflight = 0
+        self.queued = 0
+        self.last_decrease = 0.0  # calls started before this do not decrease again
+        self.last_full = 0.0  # calls started before this saw the limit in use
+        self.latency = {}  # command: [fastest, recent] seconds
+        # increases, decreases, overloaded, slow, waited: calls that had to wait,
+        # max_queued: most calls waiting at once
+        self.counters = collections.Counter()
+        self.condition = threading.Condition()
+
+    @property
+    def limit(self):
+        """calls allowed in flight now"""
+        return int(self.limit_value)
+
+    def stats(self):
+        """dict of limit, inflight, queued, and counters"""
+        with self.condition:
+            stats = dict(self.counters)
+            stats.update(limit=self.limit, inflight=self.inflight, queued=self.queued)
+        return stats
+
+    def acquire(self):
+        """wait for room under the limit, returns the start time for release()"""
+        with self.condition:
+            if self.inflight >= self.limit:
+                self.queued += 1
+                self.counters["waited"] += 1
+                if self.queued > self.counters["max_queued"]:
+                    self.counters["max_queued"] = self.queued
+                try:
+                    while self.inflight >= self.limit:
+                        self.condition.wait()
+                finally:
+                    self.queued -= 1
+            self.inflight += 1
+            started = time.perf_counter()
+            if self.inflight >= self.limit:
+                self.last_full = started
+        return started
+
+    def release(self, started, command=None, status=None, error=None):
+        """call started (from acquire) finished, with http status, or error,
+        adjust the limit from how it went"""
+        now = time.perf_counter()
+        overloaded = status in self.overload_status or self.is_overload_error(error)
+        with self.condition:
+            saturated = started <= self.last_full
+            self.inflight -= 1
+            # errors are often fast, so only successes say how fast BAM is
+            slow = (
+                not overloaded
+                and error is None
+                and (status is None or status < 400)
+                and self.is_slow(command, now - started)
+            )
+            if overloaded or slow:
+                self.counters["overloaded" if overloaded else "slow"] += 1
+                if started > self.last_decrease:
+                    self.limit_value = max(
+                        self.min_limit, self.limit_value * self.backoff
+                    )
+                    self.last_decrease = now
+                    self.counters["decreases"] += 1
+            elif saturated and self.limit_value < self.max_limit:
+                before = self.limit
+                self.limit_value = min(
+                    self.max_limit, self.limit_value + 1.0 / self.limit_value
+                )
+                if self.limit > before:
+                    self.counters["increases"] += 1
+            self.condition.notify(max(self.limit - self.inflight, 0))
+
+    @staticmethod
+    def is_overload_error(error):
+        """timeouts and refused connections mean BAM is overloaded,
+        other errors are not about load"""
+        return isinstance(
+            error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)
+        )
+
+    def is_slow(self, command, seconds):
+        """True if the recent latency of command is latency_tolerance times
+        its fastest, call with the lock held"""
+        latency = self.latency.get(command)
+        if latency is None:
+            self.latency[command] = [seconds, seconds]
+            return False
+        fastest, recent = latency
+        fastest = min(seconds, fastest + (seconds - fastest) * BASELINE_DRIFT)
+        recent += (seconds - recent) * RECENT_WEIGHT
+        latency[:] = [fastest, recent]
+        return recent > max(fastest, MIN_LATENCY) * self.latency_tolerance
+
+
+def shared_limiter(server, **kwargs):
+    """the limiter for server, made with kwargs the first time,
+    a max_limit given later lowers or raises the ceiling"""
+    with SHARED_LIMITERS_LOCK:
+        limiter = SHARED_LIMITERS.get(server)
+        if limiter is None:
+            limiter = SHARED_LIMITERS[server] = ConcurrencyLimiter(**kwargs)
+        elif "max_limit" in kwargs:
+            with limiter.condition:
+                limiter.max_limit = kwargs["max_limit"]
+                limiter.limit_value = min(limiter.limit_value, limiter.max_limit)
+    return limiter
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) REST API metrics
+
+Copyright (C) 2018,2019 Regents of the University of Michigan
+Apache License Version 2.0, see LICENSE file
+This is a community supported open source project, not endorsed by BlueCat.
+"BlueCat Address Manager" is a trademark of BlueCat Networks (USA) Inc. and its
+affiliates.
+
+Counts calls, errors, bytes received, and latency of each API command
+sent by BAM.do, like:
+with BAM(server, username, password) as conn:
+    ...
+    print(conn.stats())
+
+Latencies are kept in a histogram of fixed buckets, so memory does not grow
+with the number of calls, and p50, p95, and p99 are estimated from it.
+To save the metrics when the session closes, as JSON or in the Prometheus
+text exposition format:
+BAM(server, username, password, metrics=Metrics("bam.prom", "prometheus"))
+"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import bisect
+import collections
+import json
+import threading
+
+# double underscore names
+__progname__ = "metrics"
+__version__ = "0.2.7"
+
+# upper bounds of the latency buckets in seconds, 1 ms to about 65 s,
+# each 1.41 times the one before, then one more for anything longer
+BUCKETS = tuple(round(0.001 * 2 ** (num / 2.0), 6) for num in range(33))
+PERCENTILES = (50, 95, 99)
+OUTPUT_FORMATS = ("json", "prometheus")
+
+
+class CommandMetrics:
+    """metrics for one command"""
+
+    __slots__ = ("calls", "errors", "bytes", "seconds", "max_seconds", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def percentile(self, percent):
+        """estimated seconds that percent of calls took no longer than,
+        interpolated within the bucket it falls in"""
+        if not self.calls:
+            return None
+        rank = self.calls * percent / 100.0
+        seen = 0
+        for num, count in enumerate(self.buckets):
+            if count and seen + count >= rank:
+                lower = BUCKETS[num - 1] if num else 0.0
+                upper = BUCKETS[num] if num < len(BUCKETS) else self.max_seconds
+                estimate = lower + (upper - lower) * (rank - seen) / count
+                return min(estimate, self.max_seconds)
+            seen += count
+        return self.max_seconds
+
+    def stats(self):
+        """dict of this command's metrics"""
+        stats = {
+            "calls": self.calls,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "seconds": self.seconds,
+            "max_seconds": self.max_seconds,
+        }
+        for percent in PERCENTILES:
+            stats["p%s" % (percent)] = self.percentile(percent)
+        return stats
+
+
+class Metrics:
+    """per-command metrics, shared by all threads using a BAM session"""
+
+    def __init__(self, path=None, output_format="json"):
+        """path, if given, is written by dump() when the session closes,
+        output_format is json or prometheus"""
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError("output_format must be one of %s" % (OUTPUT_FORMATS,))
+        self.path = path
+        self.output_format = output_format
+        self.lock = threading.Lock()
+        self.commands = collections.defaultdict(CommandMetrics)
+        # command: Counter of other events, like retries, see count()
+        self.events = collections.defaultdict(collections.Counter)
+
+    def record(self, command, seconds, nbytes=0, error=False):
+        """count one call of command, that took seconds and returned nbytes"""
+        bucket = bisect.bisect_left(BUCKETS, seconds)
+        with self.lock:
+            metrics = self.commands[command]
+            metrics.calls += 1
+            metrics.errors += bool(error)
+            metrics.bytes += nbytes
+            metrics.seconds += seconds
+            metrics.max_seconds = max(metrics.max_seconds, seconds)
+            metrics.buckets[bucket] += 1
+
+    def count(self, command, name, amount=1):
+        """count some other event for command, like a retry"""
+        with self.lock:
+            self.events[command][name] += amount
+
+    def reset(self):
+        """start counting again from zero"""
+        with self.lock:
+            self.commands.clear()
+            self.events.clear()
+
+    def stats(self):
+        """dict of command: dict of calls, errors, bytes, seconds (total),
+        max_seconds, p50, p95, p99 (seconds), and any other events counted"""
+        with self.lock:
+            stats = {
+                command: metrics.stats() for command, metrics in self.commands.items()
+            }
+            for command, events in self.events.items():
+                stats.setdefault(command, CommandMetrics().stats()).update(events)
+        return stats
+
+    def summary(self):
+        """table of the metrics, for people"""
+        lines = [
+            "%-32s %7s %6s %11s %9s %9s %9s"
+            % ("command", "calls", "errors", "bytes", "p50 ms", "p95 ms", "p99 ms")
+        ]
+        for command, stats in sorted(self.stats().items()):
+            percentiles = tuple(
+                "-" if stats[name] is None else "%.1f" % (stats[name] * 1000)
+                for name in ("p50", "p95", "p99")
+            )
+            lines.append(
+                "%-32s %7d %6d %11d %9s %9s %9s"
+                % (
+                    (command, stats["calls"], stats["errors"], stats["bytes"])
+                    + percentiles
+                )
+            )
+        return "\n".join(lines)
+
+    def to_json(self):
+        """metrics as a JSON string"""
+        return json.dumps(self.stats(), sort_keys=True)
+
+    def to_prometheus(self):
+        """metrics in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            commands = sorted(
+                (command, metrics.stats(), list(metrics.buckets))
+                for command, metrics in self.commands.items()
+            )
+            events = sorted(
+                (command, name, amount)
+                for command, counter in self.events.items()
+                for name, amount in counter.items()
+            )
+        for name, help_text, key in (
+            ("bluecat_bam_calls_total", "API calls sent", "calls"),
+            ("bluecat_bam_errors_total", "API calls that failed", "errors"),
+            ("bluecat_bam_received_bytes_total", "response bytes received", "bytes"),
+        ):
+            lines.append("# HELP %s %s" % (name, help_text))
+            lines.append("# TYPE %s counter" % (name))
+            for command, stats, _ in commands:
+                lines.append('%s{command="%s"} %s' % (name, command, stats[key]))
+        name = "bluecat_bam_call_duration_seconds"
+        lines.append("# HELP %s API call latency" % (name))
+        lines.append("# TYPE %s histogram" % (name))
+        for command, stats, buckets in commands:
+            total = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), buckets):
+                total += count
+                lines.append(
+                    '%s_bucket{command="%s",le="%s"} %s' % (name, command, bound, total)
+                )
+            lines.append('%s_sum{command="%s"} %r' % (name, command, stats["seconds"]))
+            lines.append('%s_count{command="%s"} %s' % (name, command, stats["calls"]))
+        if events:
+            name = "bluecat_bam_events_total"
+            lines.append("# HELP %s other events, like retries" % (name))
+            lines.append("# TYPE %s counter" % (name))
+            for command, event, amount in events:
+                lines.append(
+                    '%s{command="%s",event="%s"} %s' % (name, command, event, amount)
+                )
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path=None, output_format=None):
+        """write the metrics to path, or self.path"""
+        path = path or self.path
+        output_format = output_format or self.output_format
+        text = self.to_prometheus() if output_format == "prometheus" else self.to_json()
+        with open(path, "w") as metrics_file:
+            metrics_file.write(text)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) REST API command registry
+
+Copyright (C) 2018,2019 Regents of the University of Michigan
+Apache License Version 2.0, see LICENSE file
+This is a community supported open source project, not endorsed by BlueCat.
+"BlueCat Address Manager" is a trademark of BlueCat Networks (USA) Inc. and its
+affiliates.
+
+What each API command is: its http method, its parameters, whether it is
+paginated (takes start and count), and whether it is read-only (GET, and not
+login or logout).  Read from commands.json in this package, the first time
+it is needed, or from the file named by $BLUECAT_COMMANDS.
+
+The commands.json shipped here was written by hand from the BlueCat Address
+Manager 9.1.0 API reference (its "source"), in the layout from_wadl makes.
+To make it from the WADL of a BAM server instead, which also picks up the
+commands of its version:
+samples/getwadl.py > application.wadl
+python -m bluecat_bam.registry application.wadl > src/bluecat_bam/commands.json
+tests/test_registry.py checks it against the params of every command this
+package and its samples call by name, and the ones they page through.
+
+Commands that are not in the registry, like ones added in a newer BAM
+version, get their http method from the first three characters of the name.
+"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import collections
+import json
+import os
+import sys
+import threading
+
+# double underscore names
+__progname__ = "registry"
+__version__ = "0.2.7"
+
+# bump when the layout of commands.json changes
+REGISTRY_VERSION = 1
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "commands.json")
+WADL_NAMESPACE = "{http://wadl.dev.java.net/2009/02}"
+NOT_READ_ONLY = frozenset(["login", "loginWithOptions", "logout"])
+
+# in most cases, the first three characters of the command name are enough
+# to determine the http method
+# this list was generated from the wadl files in 8.2.0, 8.3.2, and 9.1.0
+# should work for all versions from 8.2.0 to 9.1.0 and probably others
+HTTP_METHOD_FROM_COMMAND_PREFIX = (
+    ("DELETE", ("cle", "del", "rem")),
+    ("GET", ("cus", "fin", "get", "isA", "isM", "log", "sea")),
+    (
+        "POST",
+        (
+            "add",
+            "app",
+            "ass",
+            "bre",
+            "cle",
+            "con",
+            "cre",
+            "dep",
+            "est",
+            "exc",
+            "fai",
+            "log",
+            "mer",
+            "mig",
+            "qui",
+            "rea",
+            "rem",
+            "rol",
+            "sel",
+            "spl",
+            "ter",
+            "una",
+            "upl",
+        ),
+    ),
+    (
+        "PUT",
+        (
+            "cha",
+            "den",
+            "edi",
+            "fai",
+            "imp",
+            "lin",
+            "mov",
+            "pur",
+            "rep",
+            "res",
+            "sha",
+            "sta",
+            "unl",
+            "uns",
+            "upd",
+        ),
+    ),
+)
+# prefix: method, built once, the first method listed wins where prefixes overlap
+METHOD_FROM_PREFIX = {}
+for _method, _prefixes in HTTP_METHOD_FROM_COMMAND_PREFIX:
+    for _prefix in _prefixes:
+        METHOD_FROM_PREFIX.setdefault(_prefix, _method)
+# this is the one exception to the above list
+METHOD_EXCEPTIONS = {"updateBulkUdf": "POST"}
+
+
+def method_from_prefix(command):
+    """http method from the first three characters of the command name, or None"""
+    return METHOD_EXCEPTIONS.get(command) or METHOD_FROM_PREFIX.get(command[0:3])
+
+
+class Command(
+    collections.namedtuple("Command", "name method params paginated read_only")
+):
+    """one API command"""
+
+    __slots__ = ()
+
+    @classmethod
+    def make(cls, name, method, params):
+        """command, with paginated and read_only worked out from the rest"""
+        method = method.upper()
+        params = tuple(params)
+        return cls(
+            name,
+            method,
+            params,
+            "start" in params and "count" in params,
+            method == "GET" and name not in NOT_READ_ONLY,
+        )
+
+
+class CommandRegistry:
+    """API commands by name"""
+
+    def __init__(self, commands=(), source=None):
+        """commands is a list of Command, source says which wadl they came from"""
+        self.commands = {command.name: command for command in commands}
+        self.source = source
+
+    def __contains__(self, name):
+        return name in self.commands
+
+    def __len__(self):
+        return len(self.commands)
+
+    def get(self, name):
+        """Command, or None if unknown"""
+        return self.commands.get(name)
+
+    def method(self, name):
+        """http method of command, guessed from the name if unknown, or None"""
+        command = self.commands.get(name)
+        if command is not None:
+            return command.method
+        return method_from_prefix(name)
+
+    def paginated(self, name):
+        """True if the command takes start and count"""
+        command = self.commands.get(name)
+        return command is not None and command.paginated
+
+    def read_only(self, name):
+        """True if the command changes nothing,
+        for unknown commands, True if the method is GET"""
+        command = self.commands.get(name)
+        if command is not None:
+            return command.read_only
+        return method_from_prefix(name) == "GET" and name not in NOT_READ_ONLY
+
+    @classmethod
+    def from_wadl(cls, text, source=None):
+        """registry from the text of application.wadl"""
+        # only to update commands.json, so not imported for every session
+        # pylint: disable=import-outside-toplevel
+        from xml.etree import ElementTree  # nosec, reads our own server's wadl
+
+        root = ElementTree.fromstring(text)  # nosec, our own server's wadl
+        commands = []
+        for method in root.iter(WADL_NAMESPACE + "method"):
+            params = []
+            request = method.find(WADL_NAMESPACE + "request")
+            if request is not None:
+                params = [
+                    param.get("name")
+                    for param in request.findall(WADL_NAMESPACE + "param")
+                ]
+                if request.find(WADL_NAMESPACE + "representation") is not None:
+                    params.append("body")  # entity or other json data
+            commands.append(Command.make(method.get("id"), method.get("name"), params))
+        return cls(commands, source=source)
+
+    @classmethod
+    def from_json(cls, data):
+        """registry from the dict in commands.json"""
+        if data.get("version") != REGISTRY_VERSION:
+            raise ValueError(
+                "command registry version %s, expected %s"
+                % (data.get("version"), REGISTRY_VERSION)
+            )
+        return cls(
+            (
+                Command(
+                    name,
+                    fields["method"],
+                    tuple(fields["params"]),
+                    fields["paginated"],
+                    fields["read_only"],
+                )
+                for name, fields in data["commands"].items()
+            ),
+            source=data.get("source"),
+        )
+
+    def to_json(self):
+        """dict for commands.json"""
+        return {
+            "version": REGISTRY_VERSION,
+            "source": self.source,
+            "commands": {
+                name: {
+                    "method": command.method,
+                    "params": list(command.params),
+                    "paginated": command.paginated,
+                    "read_only": command.read_only,
+                }
+                for name, command in self.commands.items()
+            },
+        }
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        """registry from a commands.json file"""
+        with open(path) as registry_file:
+            return cls.from_json(json.load(registry_file))
+
+    def dump(self, registry_file):
+        """write as commands.json, one command per line, sorted for diffs"""
+        data = self.to_json()
+        print("{", file=registry_file)
+        print(' "version": %s,' % (json.dumps(data["version"])), file=registry_file)
+        print(' "source": %s,' % (json.dumps(data["source"])), file=registry_file)
+        print(' "commands": {', file=registry_file)
+        lines = [
+            "  %s: %s" % (json.dumps(name), json.dumps(fields, sort_keys=True))
+            for name, fields in sorted(data["commands"].items())
+        ]
+        print(",\n".join(lines), file=registry_file)
+        print(" }", file=registry_file)
+        print("}", file=registry_file)
+
+
+REGISTRY = None
+REGISTRY_LOCK = threading.Lock()
+
+
+def get_registry():
+    """the registry, loaded the first time it is asked for"""
+    global REGISTRY  # pylint: disable=global-statement
+    if REGISTRY is None:
+        with REGISTRY_LOCK:
+            if REGISTRY is None:
+                REGISTRY = CommandRegistry.load(
+                    os.getenv("BLUECAT_COMMANDS") or DEFAULT_PATH
+                )
+    return REGISTRY
+
+
+def main():
+    """print commands.json for the wadl file named, or on stdin"""
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as wadl_file:
+            text = wadl_file.read()
+        source = os.path.basename(sys.argv[1])
+    else:
+        text = sys.stdin.read()
+        source = None
+    CommandRegistry.from_wadl(text, source=source).dump(sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) REST API retry policy
+
+Copyright (C) 2018,2019 Regents of the University of Michigan
+Apache License Version 2.0, see LICENSE file
+This is a community supported open source project, not endorsed by BlueCat.
+"BlueCat Address Manager" is a trademark of BlueCat Networks (USA) Inc. and its
+affiliates.
+
+Retries API calls that failed with a server error (http status 500, 502,
+503, 504, or 429), a timeout, or a connection error, like:
+with BAM(server, username, password, retry=True) as conn:
+    ...
+
+Only read-only commands (see registry.py) are retried, unless retry_writes
+is set, so that a write like assignIP4Address that may have been done,
+even if the answer was lost, is never sent twice without asking.
+Each wait is random, from 0 up to base_delay doubled for each attempt,
+at most max_delay ("full jitter"), or as long as the Retry-After header of
+the response says.  No call is retried past max_attempts, or past deadline
+seconds from its first attempt.
+
+Each decision is counted in metrics, per command, as
+retries: sent again, retry_after: waited as the server asked,
+retries_exhausted: gave up at max_attempts or deadline,
+not_retried: a failed write, left for the caller.
+"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import email.utils
+import random
+import time
+
+import requests
+
+from bluecat_bam.registry import get_registry
+
+# double underscore names
+__progname__ = "retry"
+__version__ = "0.2.7"
+
+RETRY_STATUS = frozenset([429, 500, 502, 503, 504])
+
+
+def parse_retry_after(value):
+    """seconds to wait from a Retry-After header,
+    either seconds or an http date, or None"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(email.utils.mktime_tz(parsed) - time.time(), 0.0)
+
+
+class RetryPolicy:  # pylint: disable=R0902
+    """which failed calls to send again, and how long to wait first"""
+
+    def __init__(  # pylint: disable=R0913
+        self,
+        max_attempts=4,
+        base_delay=0.2,
+        max_delay=10.0,
+        deadline=60.0,
+        retry_status=RETRY_STATUS,
+        retry_writes=False,
+        seed=None,
+    ):
+        """max_attempts counts the first one, delays and deadline in seconds"""
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retry_status = retry_status
+        self.retry_writes = retry_writes
+        self.random = random.Random(seed)
+
+    def failed(self, response, error):
+        """True if the call failed in a way worth another try"""
+        if error is not None:
+            return isinstance(
+                error,
+                (requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+            )
+        return response.status_code in self.retry_status
+
+    def retryable(self, command, method):
+        """True if command can be sent again without doing it twice"""
+        if self.retry_writes:
+            return True
+        return method.upper() == "GET" and get_registry().read_only(command)
+
+    def backoff(self, attempt):
+        """random wait before retry number attempt (from 1)"""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return self.random.uniform(0, ceiling)
+
+    def wait(  # pylint: disable=R0913
+        self,
+        command,
+        method,
+        attempt,
+        started,
+        response=None,
+        error=None,
+        metrics=None,
+    ):
+        """seconds to wait before sending attempt + 1 again, or None to stop,
+        after attempt (from 1) of command, first sent at started
+        (time.perf_counter()), got response, or raised error"""
+        if not self.failed(response, error):
+            return None
+        if not self.retryable(command, method):
+            self.count(metrics, command, "not_retried")
+            return None
+        retry_after = None
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        delay = self.backoff(attempt) if retry_after is None else retry_after
+        elapsed = time.perf_counter() - started
+        if attempt >= self.max_attempts or elapsed + delay > self.deadline:
+            self.count(metrics, command, "retries_exhausted")
+            return None
+        if retry_after is not None:
+            self.count(metrics, command, "retry_after")
+        self.count(metrics, command, "retries")
+        return delay
+
+    @staticmethod
+    def count(metrics, command, name):
+        """count the decision, if keeping metrics"""
+        if metrics is not None:
+            metrics.count(command, name)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) REST API in-flight request coalescing
+
+Copyright (C) 2018,2019 Regents of the University of Michigan
+Apache License Version 2.0, see LICENSE file
+This is a community supported open source project, not endorsed by BlueCat.
+"BlueCat Address Manager" is a trademark of BlueCat Networks (USA) Inc. and its
+affiliates.
+
+When threads send the same read at the same time, like getEntityByName for
+the same configuration, or getParent of the same zone, only the first is
+sent, and the others wait for its response, used inside BAM.do, like:
+with BAM(server, username, password, coalesce=True) as conn:
+    for index, result, error in conn.do_many(calls, workers=20):
+        ...
+    print(conn.coalesce.stats())  # sent, coalesced: calls saved
+
+Only calls in flight at the same time are shared, nothing is kept after,
+so this goes well with a ResponseCache, which does not help until the first
+response is back.
+"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import collections
+import threading
+
+# double underscore names
+__progname__ = "singleflight"
+__version__ = "0.2.7"
+
+
+class Flight:  # pylint: disable=R0903
+    """one call in flight, and its outcome"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """runs each key once at a time, sharing the result with callers that
+    ask for the same key while it runs"""
+
+    def __init__(self):
+        self.flights = {}  # key: Flight
+        self.lock = threading.Lock()
+        self.counters = collections.Counter()  # sent, coalesced
+
+    def do(self, key, func):  # pylint: disable=invalid-name
+        """(func(), False), or (result of the same key in flight, True),
+        raises what func raised, in every caller"""
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is None:
+                flight = self.flights[key] = Flight()
+                self.counters["sent"] += 1
+                leader = True
+            else:
+                self.counters["coalesced"] += 1
+                leader = False
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+        try:
+            flight.result = func()
+        except BaseException as error:  # raised again here, and in each waiter
+            flight.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+        return flight.result, False
+
+    def stats(self):
+        """dict of counters, and calls in flight"""
+        with self.lock:
+            stats = dict(self.counters)
+            stats["in_flight"] = len(self.flights)
+        return stats
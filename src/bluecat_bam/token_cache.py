@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) login token cache
+
+Copyright (C) 2018,2019 Regents of the University of Michigan
+Apache License Version 2.0, see LICENSE file
+This is a community supported open source project, not endorsed by BlueCat.
+"BlueCat Address Manager" is a trademark of BlueCat Networks (USA) Inc. and its
+affiliates.
+
+Saves the login token on disk, so that repeated short runs, like the CLI
+in a shell loop, can skip login and logout.  Opt-in, like:
+with BAM(server, username, password, token_cache=TokenCache()) as conn:
+
+The file holds live session tokens, so it is written with mode 0600,
+and a file readable by group or other is ignored.
+Passwords are never saved.
+"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import sys
+import json
+import time
+import logging
+
+# double underscore names
+__progname__ = "token_cache"
+__version__ = "0.2.7"
+
+# python2/3 compatability
+try:
+    replace_file = os.replace
+except AttributeError:  # python2, where rename replaces the file too, on posix
+    replace_file = os.rename  # pylint: disable=invalid-name
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TTL = 600  # seconds, less than the BAM session timeout
+
+
+def default_path():
+    """~/.cache/bluecat_bam/tokens.json, or under $XDG_CACHE_HOME"""
+    cache_dir = os.getenv("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_dir, "bluecat_bam", "tokens.json")
+
+
+class TokenCache:
+    """on-disk cache of login tokens, keyed by server url and username"""
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL):
+        """path defaults to default_path(), ttl is seconds a token is reused"""
+        self.path = path or default_path()
+        self.ttl = float(ttl)
+
+    @staticmethod
+    def key(mainurl, username):
+        """one entry per user per server"""
+        return username + "@" + mainurl
+
+    def load(self):
+        """read the cache file, return dict of key: {token, expires}"""
+        try:
+            mode = os.stat(self.path).st_mode
+        except OSError:
+            return {}  # no cache yet
+        if mode & 0o077:
+            print(
+                "WARNING - ignoring token cache %s, it must be mode 0600" % (self.path),
+                file=sys.stderr,
+            )
+            return {}
+        try:
+            with open(self.path) as cache_file:
+                data = json.load(cache_file)
+        except (IOError, ValueError) as errormsg:
+            LOGGER.info("failed to read token cache %s: %s", self.path, errormsg)
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return data
+
+    def save(self, data):
+        """write the cache file atomically, readable only by the owner"""
+        cache_dir = os.path.dirname(self.path)
+        if cache_dir and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, 0o700)
+        temp_path = "%s.%s.tmp" % (self.path, os.getpid())
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as cache_file:
+            json.dump(data, cache_file)
+        os.chmod(temp_path, 0o600)  # in case the file already existed
+        replace_file(temp_path, self.path)
+
+    def get(self, mainurl, username):
+        """return saved token if not expired, else None"""
+        entry = self.load().get(self.key(mainurl, username))
+        if entry and entry.get("expires", 0) > time.time():
+            LOGGER.info("reusing cached token for %s", self.key(mainurl, username))
+            return entry.get("token")
+        return None
+
+    def put(self, mainurl, username, token):
+        """save token, and drop any expired entries"""
+        now = time.time()
+        data = {
+            key: entry
+            for key, entry in self.load().items()
+            if isinstance(entry, dict) and entry.get("expires", 0) > now
+        }
+        data[self.key(mainurl, username)] = {"token": token, "expires": now + self.ttl}
+        self.save(data)
+
+    def remove(self, mainurl, username):
+        """forget token, like after it was rejected"""
+        data = self.load()
+        if data.pop(self.key(mainurl, username), None) is not None:
+            self.save(data)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) REST API call tracing
+
+Copyright (C) 2018,2019 Regents of the University of Michigan
+Apache License Version 2.0, see LICENSE file
+This is a community supported open source project, not endorsed by BlueCat.
+"BlueCat Address Manager" is a trademark of BlueCat Networks (USA) Inc. and its
+affiliates.
+
+Shows how many API calls each helper makes, and how long each takes, like:
+with BAM(server, username, password, tracer=Tracer("trace.json")) as conn:
+    conn.get_obj("10.1.2.0/24", configuration_id, "IP4Network")
+
+Each helper, like get_obj, opens a span, and each API call (BAM.do) is a
+span inside it, so the trace above holds get_obj > get_range >
+getEntityByCIDR, getParent, ...
+The file written when the session closes is in the Chrome trace-event
+format, which chrome://tracing, https://ui.perfetto.dev, and speedscope open
+as a timeline.  Calls made in other threads, like by do_many, are drawn in
+their own row, with an arrow from the span that started them.
+"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+# double underscore names
+__progname__ = "tracing"
+__version__ = "0.2.7"
+
+
+class Tracer:  # pylint: disable=R0902
+    """collects spans, nested per thread"""
+
+    def __init__(self, path=None, max_spans=100000):
+        """path, if given, is written by dump() when the session closes,
+        spans past max_spans are counted in dropped, but not kept"""
+        self.path = path
+        self.max_spans = max_spans
+        self.spans = []  # dicts of id, parent, name, cat, tid, start, end, args
+        self.dropped = 0
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.next_id = 1
+
+    def stack(self):
+        """open spans in this thread, innermost last"""
+        try:
+            return self.local.stack
+        except AttributeError:
+            self.local.stack = []
+            return self.local.stack
+
+    def current(self):
+        """innermost open span in this thread, or None"""
+        stack = self.stack()
+        return stack[-1] if stack else None
+
+    @contextlib.contextmanager
+    def span(self, name, cat="helper", args=None):
+        """span around a block, inside the current span of this thread"""
+        stack = self.stack()
+        with self.lock:
+            span_id = self.next_id
+            self.next_id += 1
+        parent = stack[-1] if stack else {}
+        span = {
+            "id": span_id,
+            "parent": parent.get("id"),
+            "parent_tid": parent.get("tid"),
+            "name": name,
+            "cat": cat,
+            "tid": threading.current_thread().ident,
+            "args": dict(args or {}),
+            "start": time.perf_counter(),
+        }
+        stack.append(span)
+        try:
+            yield span
+        except Exception as error:
+            span["args"]["error"] = repr(error)
+            raise
+        finally:
+            span["end"] = time.perf_counter()
+            stack.pop()
+            with self.lock:
+                if len(self.spans) < self.max_spans:
+                    self.spans.append(span)
+                else:
+                    self.dropped += 1
+
+    def annotate(self, **args):
+        """add args to the current span, like the http status"""
+        stack = self.stack()
+        if stack:
+            stack[-1]["args"].update(args)
+
+    def wrap(self, func):
+        """func, to run in another thread, inside the current span of this one"""
+        parent = self.current()
+
+        @functools.wraps(func)
+        def in_parent_span(*args, **kwargs):
+            stack = self.stack()
+            stack.append(parent)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stack.pop()
+
+        return in_parent_span if parent else func
+
+    def clear(self):
+        """drop the spans collected so far"""
+        with self.lock:
+            self.spans = []
+            self.dropped = 0
+
+    def to_chrome(self):
+        """dict in the Chrome trace-event format, for json.dump"""
+        pid = os.getpid()
+        events = []
+        with self.lock:
+            spans = list(self.spans)
+        for span in spans:
+            start = (span["start"] - self.origin) * 1e6
+            args = dict(span["args"], id=span["id"], parent=span["parent"])
+            events.append(
+                {
+                    "name": span["name"],
+                    "cat": span["cat"],
+                    "ph": "X",
+                    "ts": start,
+                    "dur": (span["end"] - span["start"]) * 1e6,
+                    "pid": pid,
+                    "tid": span["tid"],
+                    "args": args,
+                }
+            )
+            if span["parent"] and span["parent_tid"] != span["tid"]:
+                # arrow from the parent span to this one, in another thread
+                flow = {"name": "call", "cat": "flow", "id": span["id"], "pid": pid}
+                events.append(dict(flow, ph="s", ts=start, tid=span["parent_tid"]))
+                events.append(dict(flow, ph="f", bp="e", ts=start, tid=span["tid"]))
+        events.sort(key=lambda event: event["ts"])
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"dropped_spans": self.dropped},
+        }
+
+    def dump(self, path=None):
+        """write the trace to path, or self.path"""
+        with open(path or self.path, "w") as trace_file:
+            json.dump(self.to_chrome(), trace_file)
+
+
+def describe(args, kwargs):
+    """short description of the arguments of a call, for the span"""
+    described = {"arg%s" % (num): str(value)[:80] for num, value in enumerate(args)}
+    described.update(
+        (name, str(value)[:80]) for name, value in kwargs.items() if name != "password"
+    )
+    return described
+
+
+def traced(method):
+    """decorator for BAM helper methods, runs the method in a span,
+    when self.tracer is set"""
+
+    @functools.wraps(method)
+    def traced_method(self, *args, **kwargs):
+        if self.tracer is None:
+            return method(self, *args, **kwargs)
+        with self.tracer.span(method.__name__, args=describe(args, kwargs)):
+            return method(self, *args, **kwargs)
+
+    return traced_method
+
+
+def traced_command(method):
+    """decorator for BAM.do, runs the API call in a span named for the command,
+    when self.tracer is set"""
+
+    @functools.wraps(method)
+    def traced_method(self, command, *args, **kwargs):
+        if self.tracer is None:
+            return method(self, command, *args, **kwargs)
+        with self.tracer.span(command, cat="api", args=describe((), kwargs)):
+            return method(self, command, *args, **kwargs)
+
+    return traced_method
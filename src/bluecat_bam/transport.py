@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) REST API record and replay transport
+
+Copyright (C) 2018,2019 Regents of the University of Michigan
+Apache License Version 2.0, see LICENSE file
+This is a community supported open source project, not endorsed by BlueCat.
+"BlueCat Address Manager" is a trademark of BlueCat Networks (USA) Inc. and its
+affiliates.
+
+Records each request and response of a session to a file, and plays them back
+later without a server, to profile a script again and again against the
+same traffic, like:
+with BAM(server, username, password, transport=RecordingAdapter("run.jsonl.gz")):
+    ...
+with BAM(server, username, password, transport=ReplayAdapter("run.jsonl.gz")):
+    ...  # same calls, answered from the file
+
+The file is gzipped JSON lines, one per request.  Passwords are left out,
+and the session token in the login response is replaced.
+Requests are matched on method, command, parameters, and body, not on server,
+and repeated requests get the recorded responses in order, then the last one
+again.  ReplayAdapter(path, latency=1) waits as long as the server took,
+latency=0.5 half as long.
+
+Samples that use BAM.argparsecommon take --record and --replay, see
+BAM.transport_from_args.
+"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import collections
+import gzip
+import io
+import json
+import re
+import threading
+import time
+
+import requests
+from urllib3.response import HTTPResponse
+
+try:
+    from urllib.parse import urlsplit, parse_qsl
+except ImportError:  # python2
+    from urlparse import urlsplit, parse_qsl  # pylint: disable=import-error
+
+# double underscore names
+__progname__ = "transport"
+__version__ = "0.2.7"
+
+RECORDING_FORMAT = "bluecat_bam recording"
+RECORDING_VERSION = 1
+API_PATH = "/Services/REST/"
+NOT_RECORDED_PARAMS = frozenset(["password"])
+KEPT_HEADERS = ("Content-Type", "Content-Length")
+TOKEN_PATTERN = re.compile(r"BAMAuthToken: \S+")
+
+
+class ReplayMiss(requests.exceptions.ConnectionError):
+    """no recorded response for the request"""
+
+
+def request_key(method, url, body):
+    """what a request is matched on: method, path under /Services/REST/,
+    sorted parameters without the password, and body"""
+    parts = urlsplit(url)
+    path = parts.path
+    if API_PATH in path:
+        path = path.split(API_PATH, 1)[1]
+    params = sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name not in NOT_RECORDED_PARAMS
+    )
+    if isinstance(body, bytes):
+        body = body.decode("utf-8")
+    return method.upper(), path, tuple(params), body or None
+
+
+class RecordingAdapter(requests.adapters.BaseAdapter):
+    """sends requests with the inner adapter, and records each one to path"""
+
+    def __init__(self, path):
+        """path is the recording to write, gzipped JSON lines"""
+        requests.adapters.BaseAdapter.__init__(self)
+        self.path = path
+        self.inner = requests.adapters.HTTPAdapter()  # replaced by BAM.mount_adapter
+        self.lock = threading.Lock()
+        self.recording = gzip.open(path, "wt")
+        self.write({"format": RECORDING_FORMAT, "version": RECORDING_VERSION})
+
+    def write(self, record):
+        """one line of the recording"""
+        line = json.dumps(record, separators=(",", ":"))
+        with self.lock:
+            self.recording.write(line + "\n")
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        """send, and record request and response"""
+        started = time.perf_counter()
+        response = self.inner.send(request, **kwargs)
+        content = response.content  # read it all, to time the whole response
+        seconds = time.perf_counter() - started
+        method, path, params, body = request_key(
+            request.method, request.url, request.body
+        )
+        text = content.decode("utf-8")
+        headers = {
+            name: response.headers[name]
+            for name in KEPT_HEADERS
+            if name in response.headers
+        }
+        if path.endswith("login"):
+            text = TOKEN_PATTERN.sub("BAMAuthToken: recorded", text)
+            if "Content-Length" in headers:
+                headers["Content-Length"] = str(len(text.encode("utf-8")))
+        self.write(
+            {
+                "method": method,
+                "path": path,
+                "params": params,
+                "body": body,
+                "status": response.status_code,
+                "reason": response.reason,
+                "headers": headers,
+                "content": text,
+                "seconds": round(seconds, 6),
+            }
+        )
+        return response
+
+    def close(self):
+        """finish the recording"""
+        self.inner.close()
+        with self.lock:
+            if not self.recording.closed:
+                self.recording.close()
+
+
+class ReplayAdapter(requests.adapters.BaseAdapter):
+    """answers requests from a recording, without a server"""
+
+    def __init__(self, path, latency=0):
+        """path is a recording from RecordingAdapter,
+        latency is the part of the recorded time to wait, 0 to answer at once"""
+        requests.adapters.BaseAdapter.__init__(self)
+        self.path = path
+        self.latency = latency
+        self.inner = None  # set by BAM.mount_adapter, but never used
+        self.builder = requests.adapters.HTTPAdapter()  # makes the Response
+        self.lock = threading.Lock()
+        self.responses = collections.defaultdict(collections.deque)
+        self.counters = collections.Counter()
+        with gzip.open(path, "rt") as recording:
+            header = json.loads(recording.readline())
+            if (
+                header.get("format") != RECORDING_FORMAT
+                or header.get("version") != RECORDING_VERSION
+            ):
+                raise ValueError("%s is not a recording this version can read" % (path))
+            for line in recording:
+                record = json.loads(line)
+                key = (
+                    record["method"],
+                    record["path"],
+                    tuple(tuple(param) for param in record["params"]),
+                    record["body"],
+                )
+                self.responses[key].append(record)
+
+    def find(self, request):
+        """recorded response for request, in the order recorded,
+        repeating the last one"""
+        key = request_key(request.method, request.url, request.body)
+        with self.lock:
+            records = self.responses.get(key)
+            if not records:
+                self.counters["misses"] += 1
+                raise ReplayMiss(
+                    "no recorded response for %s %s" % (request.method, key[1]),
+                    request=request,
+                )
+            self.counters["hits"] += 1
+            if len(records) > 1:
+                return records.popleft()
+            return records[0]
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        # pylint: disable=unused-argument
+        """answer from the recording, whatever the request settings"""
+        record = self.find(request)
+        if self.latency:
+            time.sleep(record["seconds"] * self.latency)
+        raw = HTTPResponse(
+            body=io.BytesIO(record["content"].encode("utf-8")),
+            headers=record["headers"],
+            status=record["status"],
+            reason=record["reason"],
+            preload_content=False,
+            decode_content=False,
+        )
+        return self.builder.build_response(request, raw)
+
+    def close(self):
+        """close the unused adapter"""
+        self.builder.close()
@@ -0,0 +1,68 @@
+"""benchmark_convert
+CPU time and memory of converting a 65k-address getEntities response,
+splitting every properties string up front (as before) against
+splitting on first use (LazyProperties), when reading the state of each
+address, or only the ids."""  # pylint requires docstring
+
+import gc
+import time
+import tracemalloc
+
+import bluecat_bam
+
+from .conftest import ip4_addresses
+
+ENTITIES = 65536
+REPEAT = 5
+
+
+def eager_convert_response(obj):
+    """convert_response as it was, splitting every properties string"""
+    return [
+        {k: bluecat_bam.BAM.convert_str_to_dict(v) for k, v in item.items()}
+        for item in obj
+    ]
+
+
+def read_states(entities):
+    """what a typical script does with the list"""
+    return sum(1 for ip in entities if ip["properties"]["state"] == "DHCP_RESERVED")
+
+
+def read_ids(entities):
+    """a script that does not look at properties"""
+    return sum(1 for ip in entities if ip["id"] % 2)
+
+
+def measure(convert, response, read):
+    """best seconds, and bytes allocated, to convert and read"""
+    seconds = []
+    for _ in range(REPEAT):
+        gc.collect()
+        before = time.perf_counter()
+        read(convert(response))
+        seconds.append(time.perf_counter() - before)
+    gc.collect()
+    tracemalloc.start()
+    entities = convert(response)
+    read(entities)
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return min(seconds), allocated
+
+
+def test_benchmark_convert(bam_conn):
+    """lazy properties should be several times cheaper"""
+    response = ip4_addresses(ENTITIES)
+    print()
+    print("%s entities" % (ENTITIES))
+    for read in (read_states, read_ids):
+        eager = measure(eager_convert_response, response, read)
+        lazy = measure(bam_conn.convert_response, response, read)
+        for name, (seconds, allocated) in (("eager", eager), ("lazy", lazy)):
+            print(
+                "%-10s %-6s %7.1f ms, %6.1f MiB allocated"
+                % (read.__name__, name, seconds * 1000, allocated / 1048576.0)
+            )
+        assert lazy[0] < eager[0]
+        assert lazy[1] < eager[1]
@@ -0,0 +1,86 @@
+"""benchmark_entity
+Memory held by a snapshot of 1M synthetic IP4Address entities, read a page
+at a time like get_ip_list does, as dicts with the properties split
+(like json.dumps or a full copy leaves them), as dicts with LazyProperties
+never split, and as compact entities from result_factory=make_entity.
+Also prints how long each takes to build."""  # pylint requires docstring
+
+import json
+import sys
+import time
+
+from bluecat_bam.entity import make_entity
+
+from .conftest import ip4_addresses
+
+ENTITIES = 1000000
+PAGE = 1000
+
+
+def page_text(first):
+    """one getEntities response, as BAM would send it"""
+    return json.dumps(ip4_addresses(PAGE, first))
+
+
+def split_all(entity):
+    """dict entity with the properties split"""
+    entity["properties"] = dict(entity["properties"])
+    return entity
+
+
+def held_bytes(obj):
+    """size of obj and everything it refers to, each object counted once,
+    so interned strings and shared values count once for the whole list"""
+    seen = set()
+    total = 0
+    todo = [obj]
+    while todo:
+        obj = todo.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            todo.extend(obj.keys())
+            todo.extend(obj.values())
+            if getattr(obj, "raw", None) is not None:
+                todo.append(obj.raw)  # LazyProperties
+        elif isinstance(obj, (list, tuple)):
+            todo.extend(obj)
+        else:
+            for cls in type(obj).__mro__:  # compact entities
+                slots = cls.__dict__.get("__slots__", ())
+                todo.extend(getattr(obj, name) for name in slots)
+    return total
+
+
+def measure(conn, result_factory):
+    """seconds to read and keep every page, and bytes held"""
+    before = time.perf_counter()
+    snapshot = []
+    for first in range(0, ENTITIES, PAGE):
+        entities = conn.convert_response(json.loads(page_text(first)))
+        snapshot.extend(conn.make_result(entities, result_factory))
+    seconds = time.perf_counter() - before
+    assert len(snapshot) == ENTITIES
+    return seconds, held_bytes(snapshot)
+
+
+def test_benchmark_entity(bam_conn):
+    """compact entities should hold a fraction of the memory"""
+    results = {}
+    print()
+    print("%s IP4Address entities held" % (ENTITIES))
+    for name, result_factory in (
+        ("dict", split_all),
+        ("lazy", lambda entity: entity),
+        ("entity", make_entity),
+    ):
+        seconds, held = measure(bam_conn, result_factory)
+        results[name] = held
+        print(
+            "%-6s %7.1f s, %7.1f MiB, %5.0f bytes/entity"
+            % (name, seconds, held / 1048576.0, held / float(ENTITIES))
+        )
+    assert results["entity"] * 2 < results["dict"]
+    assert results["entity"] < results["lazy"]
@@ -0,0 +1,189 @@
+"""benchmark_hot_paths
+Time of the pure-python conversions and range checks that large network
+pulls spend their CPU in, from 1k to 1M entities, with pytest-benchmark,
+skipped without it.  Save a baseline with:
+pytest tests/benchmark_hot_paths.py --benchmark-autosave
+to save a baseline in .benchmarks, then after a change:
+pytest tests/benchmark_hot_paths.py --benchmark-compare \
+    --benchmark-compare-fail=median:25%
+which fails if any median is more than 25% slower than the last saved run.
+Leave out the largest payloads with -k "not 1000000"."""  # pylint requires docstring
+
+import ipaddress
+
+import pytest
+
+from bluecat_bam.api import BAM, DhcpRangeList
+
+from .conftest import ip4_addresses
+
+pytest.importorskip("pytest_benchmark")
+
+SIZES = (1000, 10000, 100000, 1000000)
+PAYLOADS = {}  # (name, size): payload, made once per run
+
+
+def payload(name, size):
+    """cached payload of size entities"""
+    if (name, size) not in PAYLOADS:
+        PAYLOADS[(name, size)] = MAKERS[name](size)
+    return PAYLOADS[(name, size)]
+
+
+def address(num):
+    """num-th address from 10.0.0.0 up"""
+    return str(ipaddress.IPv4Address(0x0A000000 + num))
+
+
+def make_ranges(size):
+    """DHCP4Range entities, one per /24, in reverse order to sort"""
+    return [
+        {
+            "id": 1000 + num,
+            "name": None,
+            "type": "DHCP4Range",
+            "properties": {
+                "start": address(num * 256 + 100),
+                "end": address(num * 256 + 200),
+            },
+        }
+        for num in reversed(range(size))
+    ]
+
+
+def make_idents(size):
+    """what users type, ids, MACs, addresses, CIDRs, and ranges"""
+    forms = (
+        "%s",
+        "00-50-56-%02x-%02x-%02x",
+        "10.%s.%s.%s",
+        "10.%s.%s.0/24",
+        "10.%s.%s.1-10.0.0.%s",
+    )
+    idents = []
+    for num in range(size):
+        form = forms[num % len(forms)]
+        values = (num % 256, num // 256 % 256, num // 65536 % 256)
+        count = form.count("%")
+        idents.append(form % values[:count])
+    return idents
+
+
+def make_updates(size):
+    """bodies for update, each with properties as a dict"""
+    return [
+        {
+            "id": entity["id"],
+            "name": "host%s" % (entity["id"]),
+            "type": entity["type"],
+            "properties": BAM.convert_str_to_dict(entity["properties"]),
+        }
+        for entity in ip4_addresses(size)
+    ]
+
+
+MAKERS = {
+    "addresses": ip4_addresses,
+    "ranges": make_ranges,
+    "idents": make_idents,
+    "updates": make_updates,
+}
+
+
+def run(benchmark, size, func, *args):
+    """benchmark func(*args), with few rounds for the big payloads"""
+    if size >= 100000:
+        return benchmark.pedantic(func, args=args, rounds=3, iterations=1)
+    return benchmark(func, *args)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_convert_response(benchmark, bam_conn, size):
+    """whole getEntities page list, reading the state of each address"""
+    response = payload("addresses", size)
+
+    def convert_and_read():
+        return sum(
+            1
+            for ip_obj in bam_conn.convert_response(response)
+            if ip_obj["properties"]["state"] == "STATIC"
+        )
+
+    assert run(benchmark, size, convert_and_read) == (size + 3) // 4
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_convert_str_to_dict(benchmark, size):
+    """properties strings split eagerly"""
+    values = [entity["properties"] for entity in payload("addresses", size)]
+    convert = BAM.convert_str_to_dict
+
+    def convert_all():
+        return [convert(value) for value in values]
+
+    assert len(run(benchmark, size, convert_all)) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_convert_dict_to_str(benchmark, size):
+    """properties dicts joined for update"""
+    values = [body["properties"] for body in payload("updates", size)]
+    convert = BAM.convert_dict_to_str
+
+    def convert_all():
+        return [convert(value) for value in values]
+
+    assert run(benchmark, size, convert_all)[0].endswith("|")
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_convert_data(benchmark, bam_conn, size):
+    """update bodies to json"""
+    bodies = payload("updates", size)
+
+    def convert_all():
+        return [bam_conn.convert_data(body) for body in bodies]
+
+    assert len(run(benchmark, size, convert_all)) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_match_type(benchmark, bam_conn, size):
+    """object identifiers from the command line or a file"""
+    idents = payload("idents", size)
+
+    def match_all():
+        return [bam_conn.match_type(ident)[0] for ident in idents]
+
+    types = run(benchmark, size, match_all)
+    assert types[:5] == ["id", "MACAddress", "IP4Address", "CIDR", "DHCP4Range"]
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_make_ip_dict(benchmark, bam_conn, size):
+    """address lookup table of a network pull"""
+    ip_list = bam_conn.convert_response(payload("addresses", size))
+    assert len(run(benchmark, size, BAM.make_ip_dict, ip_list)) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_make_dhcp_ranges_list(benchmark, size):
+    """sorted DHCP ranges"""
+    ranges = payload("ranges", size)
+    assert len(run(benchmark, size, BAM.make_dhcp_ranges_list, ranges)) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_dhcp_range_list_in_range(benchmark, size):
+    """every address of a network, in order, against its DHCP ranges,
+    one range per 256 addresses"""
+    ranges = payload("ranges", max(size // 256, 1))
+    prefix = 32 - max(size - 1, 255).bit_length()
+    network = {"properties": {"CIDR": "10.0.0.0/%s" % (prefix)}}
+    ips = [ipaddress.IPv4Address(0x0A000000 + num) for num in range(size)]
+
+    def check_all():
+        range_list = DhcpRangeList(ranges, network)
+        return sum(1 for ip in ips if range_list.in_range(ip))
+
+    assert run(benchmark, size, check_all) > 0
@@ -0,0 +1,110 @@
+"""benchmark_logging
+per call cost of BAM.do logging on a large response, at WARNING (the
+default), INFO, and DEBUG, against the same work with no logging calls,
+the response canned in the session, so no network time hides
+the difference"""  # pylint requires docstring
+
+import gc
+import json
+import logging
+import time
+
+import requests
+
+import bluecat_bam
+
+from .conftest import ip4_addresses
+
+ENTITIES = 20000  # IP4Address entities in the response
+CALLS = 3
+REPEAT = 15
+
+
+class CannedAdapter(requests.adapters.BaseAdapter):
+    """answer every request with the same json, without any network"""
+
+    def __init__(self, content):
+        requests.adapters.BaseAdapter.__init__(self)
+        self.content = content
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        # pylint: disable=unused-argument
+        """the canned answer, whatever the request and settings"""
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "application/json"
+        response.headers["Content-Length"] = str(len(self.content))
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = self.content  # pylint: disable=protected-access
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+PARAMS = {"parentId": 1, "type": "IP4Address", "start": 0, "count": ENTITIES}
+
+
+def seconds_per_call(function):
+    """average seconds per call, over CALLS calls, without garbage collection"""
+    gc.collect()
+    gc.disable()
+    try:
+        before = time.perf_counter()
+        for _ in range(CALLS):
+            function()
+        return (time.perf_counter() - before) / CALLS
+    finally:
+        gc.enable()
+
+
+def bare_do(conn):
+    """what do() has to do for getEntities, without any logging"""
+    response = conn.send_command("GET", "getEntities", "null", dict(PARAMS))
+    response.raise_for_status()
+    return response.json()
+
+
+def test_benchmark_logging(tmp_path):
+    """WARNING should cost far less than INFO, about the same as no logging"""
+    content = json.dumps(ip4_addresses(ENTITIES)).encode()
+    cache = bluecat_bam.TokenCache(str(tmp_path / "tokens.json"))
+    server = "http://bam.example.com"
+    cache.put(bluecat_bam.BAM.convert_url(server), "admin", "BAMAuthToken: x")
+    # raw, so that converting entities does not drown out the logging cost
+    conn = bluecat_bam.BAM(server, "admin", "pw", raw=True, token_cache=cache)
+    conn.mount("http://", CannedAdapter(content))
+
+    root = logging.getLogger()
+    handler = logging.FileHandler(str(tmp_path / "bam.log"))
+    root.addHandler(handler)
+    old_level = root.level
+    levels = ("WARNING", "INFO", "DEBUG")
+    timings = {name: [] for name in ("bare",) + levels}
+    try:
+        # take turns, so that drift in machine speed affects all the same
+        for _ in range(REPEAT):
+            root.setLevel("CRITICAL")
+            timings["bare"].append(seconds_per_call(lambda: bare_do(conn)))
+            for level in levels:
+                root.setLevel(level)
+                timings[level].append(
+                    seconds_per_call(lambda: conn.do("getEntities", **PARAMS))
+                )
+    finally:
+        root.setLevel(old_level)
+        root.removeHandler(handler)
+        handler.close()
+    timings = {name: min(values) for name, values in timings.items()}
+    print()
+    print("%s entities, %s bytes per response" % (ENTITIES, len(content)))
+    for name, seconds in timings.items():
+        print(
+            "%-7s %7.2f ms per call, %+6.2f ms logging"
+            % (name, seconds * 1000, (seconds - timings["bare"]) * 1000)
+        )
+    # only a gross regression, like formatting the response at WARNING, which
+    # costs about as much as INFO (nearly twice bare), not timing noise
+    assert timings["WARNING"] < timings["bare"] * 1.5
@@ -0,0 +1,52 @@
+"""benchmark_pagination
+compare one page at a time to parallel_pages, against a local server
+with a simulated round trip time."""  # pylint requires docstring
+
+import time
+
+import bluecat_bam
+
+from .conftest import ip4_addresses
+
+LATENCY = 0.02  # seconds per request, like a BAM across a campus network
+TOTAL = 20000  # entities in the list
+COUNT = 200  # entities per page
+
+
+def test_benchmark_parallel_pages(bam_server):
+    """time get_bam_api_list with parallel_pages 1 (serial), 2, 4, 8, 16"""
+    server = bam_server.url
+    ips = ip4_addresses(TOTAL)
+
+    def get_entities(params):
+        time.sleep(LATENCY)
+        start = int(params["start"])
+        end = start + int(params["count"])
+        return ips[start:end]
+
+    bam_server.handlers["getEntities"] = get_entities
+    with bluecat_bam.BAM(server, "admin", "pw") as conn:
+        timings = {}
+        expected = None
+        for parallel_pages in (1, 2, 4, 8, 16):
+            before = time.time()
+            result = conn.get_bam_api_list(
+                "getEntities",
+                parallel_pages=parallel_pages,
+                parentId=1,
+                type="IP4Address",
+                count=COUNT,
+            )
+            timings[parallel_pages] = time.time() - before
+            if expected is None:
+                expected = result
+            assert result == expected
+    assert len(expected) == TOTAL
+    print()
+    print("%s entities, %s per page, %s s latency" % (TOTAL, COUNT, LATENCY))
+    for parallel_pages, seconds in timings.items():
+        print(
+            "parallel_pages %2s: %6.3f s, %5.1fx"
+            % (parallel_pages, seconds, timings[1] / seconds)
+        )
+    assert timings[8] < timings[1]
@@ -0,0 +1,59 @@
+"""shared fixtures, and the entities the benchmarks are run on.
+The benchmark_*.py files are not part of the normal test run, run one
+with pytest -s tests/benchmark_<name>.py to see what it prints"""
+
+import pytest
+
+import bluecat_bam
+
+from .standin import StandinServer, generate
+
+SERVER = "bam.example.com"
+MAINURL = "https://" + SERVER + "/Services/REST/v1/"
+TOKEN = "Session Token-> BAMAuthToken: abc123 <- for User : admin"
+STATES = ("STATIC", "DHCP_RESERVED", "DHCP_ALLOCATED", "DHCP_FREE")
+
+
+def ip4_addresses(count, first=0):
+    """count IP4Address entities, as BAM sends them, the first at 10.0.0.0
+    plus first, their states taking turns through STATES"""
+    return [
+        {
+            "id": 1000 + num,
+            "name": None,
+            "type": "IP4Address",
+            "properties": "address=10.%s.%s.%s|state=%s|macAddress=%012x|"
+            "locationCode=US|locationInherited=true|"
+            % (
+                num >> 16 & 0xFF,
+                num >> 8 & 0xFF,
+                num & 0xFF,
+                STATES[num % len(STATES)],
+                num,
+            ),
+        }
+        for num in range(first, first + count)
+    ]
+
+
+@pytest.fixture
+def bam_mock(requests_mock):  # pylint: disable=redefined-outer-name
+    """requests_mock with login and logout already answered"""
+    requests_mock.get(MAINURL + "login", json=TOKEN)
+    requests_mock.get(MAINURL + "logout", text="")
+    return requests_mock
+
+
+@pytest.fixture
+def bam_conn(bam_mock):  # pylint: disable=redefined-outer-name,unused-argument
+    """BAM logged in to bam_mock, for the methods that need no server"""
+    with bluecat_bam.BAM(SERVER, "admin", "pw") as conn:
+        yield conn
+
+
+@pytest.fixture
+def bam_server():
+    """local stand-in server, with one network of one address,
+    add answers for the commands a test needs to .handlers, see standin.py"""
+    with StandinServer(generate(networks=1, addresses=1)) as server:
+        yield server
@@ -0,0 +1,879 @@
+#!/usr/bin/env python
+
+"""BlueCat Address Manager (BAM) stand-in server, for tests and benchmarks
+
+Copyright (C) 2018,2019 Regents of the University of Michigan
+Apache License Version 2.0, see LICENSE file
+This is a community supported open source project, not endorsed by BlueCat.
+"BlueCat Address Manager" is a trademark of BlueCat Networks (USA) Inc. and its
+affiliates.
+
+A small local HTTP server that answers the part of the REST API this package
+uses, from an in-memory tree of entities, so that scripts, tests, and
+benchmarks can run without a real BAM:
+tree = generate(networks=20000, addresses=100)  # 2 million addresses
+with StandinServer(tree, latency=0.005) as server:
+    with BAM(server.url, "admin", "any password") as conn:
+        ...
+
+Or on the command line, from the top of the source tree:
+python -m tests.standin --networks 20000 --addresses 100 --port 8080
+
+Commands: login, logout, getEntityById, getEntityByName, getEntities,
+getParent, getIPRangedByIP, getEntityByCIDR, getIP4Address, getMACAddress,
+searchByObjectTypes, update, delete, assignIP4Address, addDHCP4Range,
+resizeRange, and changeStateIP4Address.  Others get http status 500,
+like a BAM without access rights.  A test can answer any command itself,
+instead of the tree, with server.handlers[command] = function(params).
+
+The addresses made by generate() are not stored, each is worked out from its
+id when asked for, and only stored once changed, so millions cost almost no
+memory.  Each request can wait latency seconds (plus up to jitter more),
+and fail with http status 500 at error_rate (or error_rates[command]),
+or another error_status, and more than capacity requests at once are
+refused with http status 503, like an overloaded BAM.
+"""
+
+# to be python2/3 compatible:
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import bisect
+import collections
+import ipaddress
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import uuid
+
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlsplit, parse_qsl
+except ImportError:  # python2
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlsplit, parse_qsl
+
+from bluecat_bam.registry import get_registry
+
+# ids of generated addresses, and their MAC addresses, start here,
+# 256 ids for each network
+SYNTHETIC_BASE = 10**10
+SYNTHETIC_MAC_BASE = 2 * 10**10
+RANGE_TYPES = ("DHCP4Range", "IP4Network", "IP4Block")  # most specific first
+STATES = {
+    "MAKE_STATIC": "STATIC",
+    "MAKE_RESERVED": "RESERVED",
+    "MAKE_DHCP_RESERVED": "DHCP_RESERVED",
+}
+COMMANDS = frozenset(
+    [
+        "getEntityById",
+        "getEntityByName",
+        "getEntities",
+        "getParent",
+        "getIPRangedByIP",
+        "getEntityByCIDR",
+        "getIP4Address",
+        "getMACAddress",
+        "searchByObjectTypes",
+        "update",
+        "delete",
+        "assignIP4Address",
+        "addDHCP4Range",
+        "resizeRange",
+        "changeStateIP4Address",
+    ]
+)
+NO_ENTITY = {"id": 0, "name": None, "type": None, "properties": None}
+
+
+class StandinError(Exception):
+    """answered with this http status and message"""
+
+    def __init__(self, message, status=500, headers=None):
+        Exception.__init__(self, message)
+        self.status = status
+        self.headers = headers
+
+
+def ip_int(address):
+    """'10.0.0.1' to int"""
+    return int(ipaddress.IPv4Address(str(address)))
+
+
+def ip_str(address):
+    """int to '10.0.0.1'"""
+    return str(ipaddress.IPv4Address(address))
+
+
+def parse_range(value):
+    """(start, end) ints, from a CIDR, or 'start-end'"""
+    if "/" in value:
+        network = ipaddress.IPv4Network(str(value), strict=False)
+        return int(network.network_address), int(network.broadcast_address)
+    start, end = value.split("-", 1)
+    return ip_int(start), ip_int(end)
+
+
+def normalize_mac(mac):
+    """'0050.56ab.cdef', '00:50:56:ab:cd:ef' or like, to '00-50-56-AB-CD-EF'"""
+    digits = re.sub(r"[^0-9a-fA-F]", "", mac).upper()
+    if len(digits) != 12:
+        raise StandinError("Invalid MAC address: %s" % (mac))
+    return "-".join(re.findall("..", digits))
+
+
+def properties_str(properties):
+    """dict to 'name=value|...', like BAM sends"""
+    if not properties:
+        return None
+    return "".join("%s=%s|" % (name, value) for name, value in properties.items())
+
+
+def properties_dict(properties):
+    """'name=value|...' (or a dict, or None) to dict"""
+    if not properties:
+        return {}
+    if isinstance(properties, dict):
+        return dict(properties)
+    return dict(item.split("=", 1) for item in properties.split("|") if item)
+
+
+class EntityTree:  # pylint: disable=R0902,R0904
+    """in-memory BAM entities, with the lookups the API needs"""
+
+    def __init__(self):
+        self.entities = {}  # id: {"id", "name", "type", "properties" (dict)}
+        self.parents = {}  # id: parent id
+        self.children = collections.defaultdict(list)  # parent id: ids, in order
+        # (configuration id, type): sorted list of (start, end, id) for RANGE_TYPES
+        self.ranges = collections.defaultdict(list)
+        self.addresses = {}  # (configuration id, int address): IP4Address id
+        self.macs = {}  # (configuration id, mac): MACAddress id
+        self.synthetic = []  # network id for each block of 256 generated ids
+        self.synthetic_networks = {}  # network id: (block number, count)
+        self.deleted = set()  # generated addresses that were deleted
+        self.next_id = 100000
+        self.lock = threading.RLock()
+
+    # storage
+
+    def new_id(self):
+        """next unused id"""
+        self.next_id += 1
+        return self.next_id
+
+    def add(self, parent_id, entity_type, name=None, properties=None, entity_id=None):
+        """add entity under parent, returns it"""
+        if parent_id and self.get(parent_id) is None:
+            raise StandinError("Object was not found: %s" % (parent_id))
+        entity_id = entity_id or self.new_id()
+        entity = {
+            "id": entity_id,
+            "name": name,
+            "type": entity_type,
+            "properties": properties_dict(properties),
+        }
+        self.entities[entity_id] = entity
+        self.parents[entity_id] = parent_id
+        if entity_id < SYNTHETIC_BASE:
+            self.children[parent_id].append(entity_id)
+        self.index(entity)
+        return entity
+
+    def configuration_of(self, entity_id):
+        """id of the Configuration above entity, or None"""
+        while entity_id:
+            entity = self.get(entity_id)
+            if entity is None:
+                return None
+            if entity["type"] == "Configuration":
+                return entity_id
+            entity_id = self.parents.get(entity_id, self.synthetic_parent(entity_id))
+        return None
+
+    def index(self, entity):
+        """add entity to the lookup indexes"""
+        props = entity["properties"]
+        entity_type = entity["type"]
+        if entity_type in RANGE_TYPES:
+            if entity_type == "DHCP4Range":
+                start, end = ip_int(props["start"]), ip_int(props["end"])
+            else:
+                start, end = parse_range(props["CIDR"])
+            key = (self.configuration_of(entity["id"]), entity_type)
+            bisect.insort(self.ranges[key], (start, end, entity["id"]))
+        elif entity_type == "IP4Address" and entity["id"] < SYNTHETIC_BASE:
+            key = (self.configuration_of(entity["id"]), ip_int(props["address"]))
+            self.addresses[key] = entity["id"]
+        elif entity_type == "MACAddress":
+            key = (self.configuration_of(entity["id"]), props["address"])
+            self.macs[key] = entity["id"]
+
+    def unindex(self, entity):
+        """remove entity from the lookup indexes"""
+        props = entity["properties"]
+        entity_type = entity["type"]
+        configuration_id = self.configuration_of(entity["id"])
+        if entity_type in RANGE_TYPES:
+            self.ranges[(configuration_id, entity_type)] = [
+                item
+                for item in self.ranges[(configuration_id, entity_type)]
+                if item[2] != entity["id"]
+            ]
+        elif entity_type == "IP4Address":
+            self.addresses.pop((configuration_id, ip_int(props["address"])), None)
+        elif entity_type == "MACAddress":
+            self.macs.pop((configuration_id, props["address"]), None)
+
+    def get(self, entity_id):
+        """entity dict, or None"""
+        entity = self.entities.get(entity_id)
+        if entity is None and entity_id >= SYNTHETIC_BASE:
+            entity = self.synthetic_address(entity_id)
+        return entity
+
+    def get_parent_id(self, entity_id):
+        """id of parent, 0 at the top"""
+        if entity_id in self.parents:
+            return self.parents[entity_id]
+        return self.synthetic_parent(entity_id) or 0
+
+    def delete(self, entity_id):
+        """delete entity and everything under it"""
+        entity = self.get(entity_id)
+        if entity is None:
+            raise StandinError("Object was not found: %s" % (entity_id))
+        for child_id in list(self.child_ids(entity_id)):
+            self.delete(child_id)
+        self.unindex(entity)
+        self.entities.pop(entity_id, None)
+        parent_id = self.get_parent_id(entity_id)
+        self.parents.pop(entity_id, None)
+        if entity_id >= SYNTHETIC_BASE:
+            self.deleted.add(entity_id)
+        else:
+            self.children[parent_id].remove(entity_id)
+        self.children.pop(entity_id, None)
+
+    def materialize(self, entity_id):
+        """stored copy of a generated address, to change it"""
+        entity = self.get(entity_id)
+        if entity is None:
+            raise StandinError("Object was not found: %s" % (entity_id))
+        if entity_id not in self.entities:
+            self.entities[entity_id] = entity
+            self.parents[entity_id] = self.synthetic_parent(entity_id)
+        return entity
+
+    # generated addresses
+
+    def add_synthetic_addresses(self, network_id, count):
+        """count addresses in network, from .1 up, not stored until changed"""
+        block = len(self.synthetic)
+        self.synthetic.append(network_id)
+        self.synthetic_networks[network_id] = (block, min(count, 254))
+
+    def synthetic_parent(self, entity_id):
+        """network id of a generated address id, or None"""
+        if entity_id < SYNTHETIC_BASE:
+            return None
+        block = (entity_id - SYNTHETIC_BASE) // 256
+        if block < len(self.synthetic):
+            return self.synthetic[block]
+        return None
+
+    def synthetic_address(self, entity_id):
+        """generated address entity, or None"""
+        if entity_id in self.deleted:
+            return None
+        block, offset = divmod(entity_id - SYNTHETIC_BASE, 256)
+        if block >= len(self.synthetic):
+            return None
+        network = self.entities.get(self.synthetic[block])
+        if network is None or offset >= self.synthetic_networks[network["id"]][1]:
+            return None
+        start = parse_range(network["properties"]["CIDR"])[0]
+        number = entity_id - SYNTHETIC_BASE
+        return {
+            "id": entity_id,
+            "name": None,
+            "type": "IP4Address",
+            "properties": collections.OrderedDict(
+                (
+                    ("address", ip_str(start + 1 + offset)),
+                    ("state", "STATIC" if offset % 4 == 0 else "DHCP_RESERVED"),
+                    ("macAddress", normalize_mac("0200%08x" % (number))),
+                )
+            ),
+        }
+
+    def synthetic_ids(self, network_id):
+        """ids of the generated addresses in network that still exist"""
+        if network_id not in self.synthetic_networks:
+            return
+        block, count = self.synthetic_networks[network_id]
+        first = SYNTHETIC_BASE + block * 256
+        for entity_id in range(first, first + count):
+            if entity_id not in self.deleted:
+                yield entity_id
+
+    def child_ids(self, parent_id, entity_type=None):
+        """ids of children, of type if given"""
+        ids = itertools.chain(self.synthetic_ids(parent_id), self.children[parent_id])
+        if entity_type is None:
+            return ids
+        if entity_type != "IP4Address":
+            ids = self.children[parent_id]
+        return (
+            child_id for child_id in ids if self.get(child_id)["type"] == entity_type
+        )
+
+    # lookups
+
+    def is_under(self, entity_id, container_id):
+        """True if container is entity, or above it"""
+        while entity_id:
+            if entity_id == container_id:
+                return True
+            entity_id = self.get_parent_id(entity_id)
+        return not container_id
+
+    def find_range(self, configuration_id, entity_type, start, end=None):
+        """id of the smallest range of type holding start..end, or None"""
+        end = start if end is None else end
+        ranges = self.ranges.get((configuration_id, entity_type), [])
+        num = bisect.bisect_right(ranges, (start, float("inf"), float("inf")))
+        while num > 0:
+            num -= 1
+            range_start, range_end, range_id = ranges[num]
+            if range_start <= start and end <= range_end:
+                return range_id
+            if entity_type != "IP4Block":
+                return None  # networks and DHCP ranges do not overlap
+        return None
+
+    def find_address(self, configuration_id, address):
+        """id of the IP4Address at int address, or None"""
+        entity_id = self.addresses.get((configuration_id, address))
+        if entity_id is not None:
+            return entity_id
+        network_id = self.find_range(configuration_id, "IP4Network", address)
+        if network_id in self.synthetic_networks:
+            block, count = self.synthetic_networks[network_id]
+            offset = (
+                address - parse_range(self.get(network_id)["properties"]["CIDR"])[0]
+            )
+            entity_id = SYNTHETIC_BASE + block * 256 + offset - 1
+            if 1 <= offset <= count and self.get(entity_id) is not None:
+                return entity_id
+        return None
+
+    def make_mac(self, configuration_id, mac):
+        """MACAddress id, added if needed"""
+        mac = normalize_mac(mac)
+        mac_id = self.macs.get((configuration_id, mac))
+        if mac_id is None:
+            mac_id = self.add(
+                configuration_id, "MACAddress", properties={"address": mac}
+            )["id"]
+        return mac_id
+
+
+class StandinAPI:
+    """the API commands, each takes the query parameters and the body"""
+
+    def __init__(self, tree):
+        self.tree = tree
+
+    def entity(self, entity_id):
+        """entity with id, as BAM sends it"""
+        entity = self.tree.get(int(entity_id))
+        if entity is None:
+            return NO_ENTITY
+        return dict(entity, properties=properties_str(entity["properties"]))
+
+    def configuration_of(self, entity_id):
+        """configuration id of entity, which must exist"""
+        configuration_id = self.tree.configuration_of(int(entity_id))
+        if configuration_id is None:
+            raise StandinError("Object was not found: %s" % (entity_id))
+        return configuration_id
+
+    def getEntityById(self, params, body):  # pylint: disable=C0103,W0613
+        """entity, by id"""
+        return self.entity(params["id"])
+
+    def getEntityByName(self, params, body):  # pylint: disable=C0103,W0613
+        """child of parentId with name and type"""
+        for child_id in self.tree.child_ids(int(params["parentId"]), params["type"]):
+            if self.tree.get(child_id)["name"] == params["name"]:
+                return self.entity(child_id)
+        return NO_ENTITY
+
+    def getEntities(self, params, body):  # pylint: disable=C0103,W0613
+        """children of parentId with type, from start, up to count"""
+        start = int(params.get("start", 0))
+        count = int(params.get("count", 10))
+        ids = self.tree.child_ids(int(params["parentId"]), params["type"])
+        return [
+            self.entity(child_id)
+            for child_id in itertools.islice(ids, start, start + count)
+        ]
+
+    def getParent(self, params, body):  # pylint: disable=C0103,W0613
+        """parent of entityId"""
+        entity_id = int(params["entityId"])
+        if self.tree.get(entity_id) is None:
+            raise StandinError("Object was not found: %s" % (entity_id))
+        return self.entity(self.tree.get_parent_id(entity_id))
+
+    def getIPRangedByIP(self, params, body):  # pylint: disable=C0103,W0613
+        """smallest block, network, or DHCP range of type holding address,
+        under containerId, any of them if type is empty"""
+        container_id = int(params["containerId"])
+        configuration_id = self.configuration_of(container_id)
+        address = ip_int(params["address"])
+        for entity_type in RANGE_TYPES:
+            if params.get("type") in (None, "", entity_type):
+                range_id = self.tree.find_range(configuration_id, entity_type, address)
+                if range_id and self.tree.is_under(range_id, container_id):
+                    return self.entity(range_id)
+        return NO_ENTITY
+
+    def getEntityByCIDR(self, params, body):  # pylint: disable=C0103,W0613
+        """block or network with cidr, directly under parentId"""
+        parent_id = int(params["parentId"])
+        start, end = parse_range(params["cidr"])
+        key = (self.configuration_of(parent_id), params["type"])
+        for range_start, range_end, range_id in self.tree.ranges.get(key, []):
+            if (range_start, range_end) == (start, end):
+                if self.tree.get_parent_id(range_id) == parent_id:
+                    return self.entity(range_id)
+        return NO_ENTITY
+
+    def getIP4Address(self, params, body):  # pylint: disable=C0103,W0613
+        """address, under containerId"""
+        container_id = int(params["containerId"])
+        configuration_id = self.configuration_of(container_id)
+        entity_id = self.tree.find_address(configuration_id, ip_int(params["address"]))
+        if entity_id and self.tree.is_under(entity_id, container_id):
+            return self.entity(entity_id)
+        return NO_ENTITY
+
+    def getMACAddress(self, params, body):  # pylint: disable=C0103,W0613
+        """MACAddress in configurationId"""
+        configuration_id = int(params["configurationId"])
+        mac = normalize_mac(params["macAddress"])
+        mac_id = self.tree.macs.get((configuration_id, mac))
+        if mac_id is not None:
+            return self.entity(mac_id)
+        # the MAC address of a generated address holds its number
+        number = int(mac.replace("-", ""), 16) - 0x020000000000
+        address_id = SYNTHETIC_BASE + number
+        address = self.tree.get(address_id) if number >= 0 else None
+        if not address or address.get("properties", {}).get("macAddress") != mac:
+            return NO_ENTITY
+        if self.tree.configuration_of(address_id) != configuration_id:
+            return NO_ENTITY
+        return {
+            "id": SYNTHETIC_MAC_BASE + number,
+            "name": None,
+            "type": "MACAddress",
+            "properties": "address=%s|" % (mac),
+        }
+
+    def searchByObjectTypes(self, params, body):  # pylint: disable=C0103,W0613
+        """entities of types (comma separated) with names matching keyword,
+        where ^ and $ anchor the start and end, and * matches anything"""
+        keyword = params["keyword"]
+        pattern = re.escape(keyword.strip("^$")).replace(r"\*", ".*")
+        if keyword.startswith("^"):
+            pattern = "^" + pattern
+        if keyword.endswith("$"):
+            pattern += "$"
+        pattern = re.compile(pattern, re.IGNORECASE)
+        types = set(params["types"].split(","))
+        start = int(params.get("start", 0))
+        count = int(params.get("count", 10))
+        found = (
+            entity["id"]
+            for entity in list(self.tree.entities.values())
+            if entity["type"] in types and pattern.search(entity["name"] or "")
+        )
+        return [
+            self.entity(entity_id)
+            for entity_id in itertools.islice(found, start, start + count)
+        ]
+
+    def update(self, params, body):  # pylint: disable=W0613
+        """change name and properties of the entity in the body"""
+        changed = json.loads(body)
+        entity = self.tree.materialize(int(changed["id"]))
+        if changed.get("type") not in (None, entity["type"]):
+            raise StandinError("Type of an object cannot be changed")
+        properties = properties_dict(changed.get("properties"))
+        for name in ("address", "CIDR", "start", "end"):  # not changed by update
+            if name in entity["properties"]:
+                properties[name] = entity["properties"][name]
+        self.tree.unindex(entity)
+        entity["name"] = changed.get("name")
+        entity["properties"] = properties
+        self.tree.index(entity)
+
+    def delete(self, params, body):  # pylint: disable=W0613
+        """delete objectId, and everything under it"""
+        self.tree.delete(int(params["objectId"]))
+
+    def assignIP4Address(self, params, body):  # pylint: disable=C0103,W0613
+        """add an address, returns its id"""
+        configuration_id = int(params["configurationId"])
+        address = ip_int(params["ip4Address"])
+        if self.tree.find_address(configuration_id, address):
+            raise StandinError("Duplicate of another item")
+        network_id = self.tree.find_range(configuration_id, "IP4Network", address)
+        if network_id is None:
+            raise StandinError("No network found for address %s" % (ip_str(address)))
+        properties = properties_dict(params.get("properties"))
+        name = properties.pop("name", None)
+        properties["address"] = ip_str(address)
+        properties["state"] = STATES.get(params.get("action"), "STATIC")
+        if params.get("macAddress"):
+            properties["macAddress"] = normalize_mac(params["macAddress"])
+            self.tree.make_mac(configuration_id, params["macAddress"])
+        return self.tree.add(network_id, "IP4Address", name, properties)["id"]
+
+    def addDHCP4Range(self, params, body):  # pylint: disable=C0103,W0613
+        """add a DHCP range in networkId, returns its id"""
+        network_id = int(params["networkId"])
+        network = self.tree.get(network_id)
+        if network is None or network["type"] != "IP4Network":
+            raise StandinError("Object was not found: %s" % (network_id))
+        start, end = ip_int(params["start"]), ip_int(params["end"])
+        self.check_range(network_id, start, end)
+        properties = properties_dict(params.get("properties"))
+        name = properties.pop("name", None)
+        properties["start"] = ip_str(start)
+        properties["end"] = ip_str(end)
+        return self.tree.add(network_id, "DHCP4Range", name, properties)["id"]
+
+    def check_range(self, network_id, start, end, range_id=None):
+        """DHCP range start..end must be in the network, and overlap no other"""
+        network_start, network_end = parse_range(
+            self.tree.get(network_id)["properties"]["CIDR"]
+        )
+        if not network_start < start <= end < network_end:
+            raise StandinError("Range is outside of the network")
+        for other_id in self.tree.child_ids(network_id, "DHCP4Range"):
+            other = self.tree.get(other_id)["properties"]
+            if other_id != range_id and not (
+                end < ip_int(other["start"]) or ip_int(other["end"]) < start
+            ):
+                raise StandinError("Range overlaps another DHCP range")
+
+    def resizeRange(self, params, body):  # pylint: disable=C0103,W0613
+        """change the start and end of a DHCP range, network, or block"""
+        entity = self.tree.get(int(params["objectId"]))
+        if entity is None or entity["type"] not in RANGE_TYPES:
+            raise StandinError("Object was not found: %s" % (params["objectId"]))
+        start, end = parse_range(params["range"])
+        self.tree.unindex(entity)
+        try:
+            if entity["type"] == "DHCP4Range":
+                self.check_range(
+                    self.tree.get_parent_id(entity["id"]), start, end, entity["id"]
+                )
+                entity["properties"]["start"] = ip_str(start)
+                entity["properties"]["end"] = ip_str(end)
+            else:
+                network = ipaddress.IPv4Network(params["range"])
+                entity["properties"]["CIDR"] = str(network)
+        finally:
+            self.tree.index(entity)
+
+    def changeStateIP4Address(self, params, body):  # pylint: disable=C0103,W0613
+        """change state of addressId, like to MAKE_DHCP_RESERVED"""
+        entity = self.tree.materialize(int(params["addressId"]))
+        if params["targetState"] not in STATES:
+            raise StandinError("Invalid target state: %s" % (params["targetState"]))
+        entity["properties"]["state"] = STATES[params["targetState"]]
+        if params.get("macAddress"):
+            entity["properties"]["macAddress"] = normalize_mac(params["macAddress"])
+            self.tree.make_mac(
+                self.tree.configuration_of(entity["id"]), params["macAddress"]
+            )
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    """one thread per request, so concurrent clients really overlap"""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """answer /Services/REST/v1/<command> from server.api"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like BAM
+    # send headers and body together, or delayed ACKs add 40ms to each reply
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass  # quiet
+
+    def reply(self, status, result, headers=None):
+        """send result as json"""
+        body = b"" if result is None else json.dumps(result).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def answer(self):
+        """any http method"""
+        url = urlsplit(self.path)
+        command = url.path.rsplit("/", 1)[-1]
+        params = dict(parse_qsl(url.query, keep_blank_values=True))
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else None
+        try:
+            result = self.server.standin.handle(
+                self.command, command, params, body, self.headers.get("Authorization")
+            )
+        except StandinError as error:
+            self.reply(error.status, str(error), error.headers)
+        else:
+            self.reply(200, result)
+
+    do_GET = do_POST = do_PUT = do_DELETE = answer
+
+
+class StandinServer:  # pylint: disable=R0902
+    """local http server answering the API from an EntityTree"""
+
+    def __init__(  # pylint: disable=R0913
+        self,
+        tree=None,
+        host="127.0.0.1",
+        port=0,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        error_rates=None,
+        seed=None,
+        error_status=500,
+        capacity=None,
+        retry_after=1,
+    ):
+        """tree defaults to generate(), port 0 picks a free port,
+        each request waits latency seconds, plus up to jitter more,
+        and fails with error_status at error_rate, or error_rates[command],
+        requests past capacity at once are refused with status 503,
+        both 503s say to retry after retry_after seconds"""
+        self.tree = tree if tree is not None else generate()
+        self.api = StandinAPI(self.tree)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_rates = error_rates or {}
+        self.error_status = error_status
+        self.capacity = capacity
+        self.retry_after = retry_after
+        self.inflight = 0
+        self.random = random.Random(seed)
+        self.tokens = set()
+        self.calls = collections.Counter()
+        # command: function(params) returning the answer, instead of self.api
+        self.handlers = {}
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), StandinHandler)
+        self.httpd.standin = self
+        self.thread = None
+
+    @property
+    def url(self):
+        """server string for BAM, like http://127.0.0.1:8080"""
+        host, port = self.httpd.server_address[:2]
+        return "http://%s:%s" % (host, port)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        """serve in a background thread"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def serve_forever(self):
+        """serve in this thread, until interrupted"""
+        self.httpd.serve_forever()
+
+    def stop(self):
+        """stop serving"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def handle(self, http_method, command, params, body, authorization):
+        # pylint: disable=too-many-arguments
+        """answer one request, or raise StandinError,
+        refused with 503 if capacity requests are already in flight"""
+        with self.lock:
+            if self.capacity is not None and self.inflight >= self.capacity:
+                self.calls["refused"] += 1
+                raise self.unavailable("Server busy")
+            self.inflight += 1
+        try:
+            return self.answer(http_method, command, params, body, authorization)
+        finally:
+            with self.lock:
+                self.inflight -= 1
+
+    def unavailable(self, message):
+        """503 error, with Retry-After"""
+        return StandinError(
+            message, status=503, headers={"Retry-After": str(self.retry_after)}
+        )
+
+    def answer(self, http_method, command, params, body, authorization):
+        # pylint: disable=too-many-arguments
+        """answer one request, or raise StandinError"""
+        with self.lock:
+            self.calls[command] += 1
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            fail = self.random.random() < self.error_rates.get(command, self.error_rate)
+        if delay:
+            time.sleep(delay)
+        if command == "login":
+            token = "BAMAuthToken: %s" % (uuid.uuid4().hex)
+            with self.lock:
+                self.tokens.add(token)
+            return "Session Token-> %s <- for User : %s" % (
+                token,
+                params.get("username"),
+            )
+        if authorization not in self.tokens:
+            raise StandinError("Authentication Error", status=401)
+        if command == "logout":
+            with self.lock:
+                self.tokens.discard(authorization)
+            return None
+        handler = self.handlers.get(command)
+        if handler is None and command not in COMMANDS:
+            raise StandinError("no such command: %s" % (command))
+        method = get_registry().method(command)
+        if method != http_method:
+            raise StandinError("%s takes %s" % (command, method), status=405)
+        if fail and self.error_status == 503:
+            raise self.unavailable("injected error")
+        if fail:
+            raise StandinError("injected error", status=self.error_status)
+        if handler is not None:  # not in the tree lock, so they can overlap
+            return handler(params)
+        try:
+            with self.tree.lock:
+                return getattr(self.api, command)(params, body)
+        except (KeyError, ValueError) as error:
+            raise StandinError("bad request: %s" % (error))  # pylint: disable=W0707
+
+
+def generate(  # pylint: disable=R0913,R0914
+    networks=100,
+    addresses=100,
+    dhcp_ranges=True,
+    configuration="Main",
+    view="Internal",
+    tree=None,
+):
+    """tree of a configuration with a view, and networks /24s in /16 blocks
+    in /8 blocks, from 10.0.0.0 up, each with addresses (up to 254) from .1 up,
+    a quarter of them STATIC, the rest DHCP_RESERVED, and a DHCP range
+    from .201 to .250"""
+    tree = tree if tree is not None else EntityTree()
+    with tree.lock:
+        config = tree.add(0, "Configuration", configuration)
+        tree.add(config["id"], "View", view)
+        top_blocks = {}
+        blocks = {}
+        for num in range(networks):
+            start = ip_int("10.0.0.0") + num * 256
+            top = start >> 24
+            if top not in top_blocks:
+                top_blocks[top] = tree.add(
+                    config["id"],
+                    "IP4Block",
+                    properties={"CIDR": "%s/8" % (ip_str(top << 24))},
+                )["id"]
+            middle = start >> 16
+            if middle not in blocks:
+                blocks[middle] = tree.add(
+                    top_blocks[top],
+                    "IP4Block",
+                    properties={"CIDR": "%s/16" % (ip_str(middle << 16))},
+                )["id"]
+            network = tree.add(
+                blocks[middle],
+                "IP4Network",
+                "net%s" % (num),
+                {"CIDR": "%s/24" % (ip_str(start)), "gateway": ip_str(start + 1)},
+            )
+            tree.add_synthetic_addresses(network["id"], addresses)
+            if dhcp_ranges:
+                tree.add(
+                    network["id"],
+                    "DHCP4Range",
+                    properties={
+                        "start": ip_str(start + 201),
+                        "end": ip_str(start + 250),
+                    },
+                )
+    return tree
+
+
+def main():
+    """run a stand-in server until interrupted"""
+    config = argparse.ArgumentParser(description="BAM stand-in server")
+    config.add_argument("--host", default="127.0.0.1")
+    config.add_argument("--port", type=int, default=8080)
+    config.add_argument("--networks", type=int, default=100)
+    config.add_argument("--addresses", type=int, default=100, help="per network")
+    config.add_argument("--latency", type=float, default=0.0, help="seconds")
+    config.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    config.add_argument("--error_rate", type=float, default=0.0)
+    config.add_argument("--error_status", type=int, default=500)
+    config.add_argument("--capacity", type=int, help="requests at once")
+    args = config.parse_args()
+    tree = generate(args.networks, args.addresses)
+    server = StandinServer(
+        tree,
+        args.host,
+        args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        capacity=args.capacity,
+    )
+    print("serving %s" % (server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
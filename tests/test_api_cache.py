@@ -0,0 +1,98 @@
+"""test_api_cache"""  # pylint requires docstring
+
+import threading
+
+import bluecat_bam
+
+from .conftest import SERVER, MAINURL
+
+
+def count_calls(bam_mock, command):
+    """number of requests for command"""
+    return sum(
+        1
+        for request in bam_mock.request_history
+        if request.path.endswith(command.lower())
+    )
+
+
+def test_cache_hits(bam_mock):
+    """repeated reads answered from the cache, each caller gets its own copy"""
+    bam_mock.get(
+        MAINURL + "getEntityByName",
+        json={"id": 9, "name": "Main", "type": "Configuration", "properties": "a=1|"},
+    )
+    cache = bluecat_bam.ResponseCache()
+    with bluecat_bam.BAM(SERVER, "admin", "pw", cache=cache) as conn:
+        first = conn.get_config_and_view("Main")
+        first_obj = conn.do(
+            "getEntityByName", parentId=0, name="Main", type="Configuration"
+        )
+        first_obj["properties"]["a"] = "changed"
+        # same params in another order and type
+        again = conn.do(
+            "getEntityByName", type="Configuration", name="Main", parentId="0"
+        )
+    assert first == (9, None)
+    assert again["properties"] == {"a": "1"}
+    assert count_calls(bam_mock, "getEntityByName") == 1
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_write_invalidates(bam_mock):
+    """a write drops cached reads"""
+    bam_mock.get(MAINURL + "getEntityById", json={"id": 5})
+    bam_mock.delete(MAINURL + "delete", text="", headers={"Content-Length": "0"})
+    with bluecat_bam.BAM(SERVER, "admin", "pw", cache=True) as conn:
+        conn.do("getEntityById", id=5)
+        assert conn.do("delete", objectId=5) is None
+        conn.do("getEntityById", id=5)
+        assert conn.cache.stats()["invalidations"] == 1
+    assert count_calls(bam_mock, "getEntityById") == 2
+
+
+def test_cache_lru_and_ttls(bam_mock):
+    """least recently used entry evicted, ttl 0 not cached"""
+    bam_mock.get(MAINURL + "getEntityById", json={"id": 5})
+    bam_mock.get(MAINURL + "getParent", json={"id": 1})
+    cache = bluecat_bam.ResponseCache(maxsize=2, ttls={"getParent": 0})
+    with bluecat_bam.BAM(SERVER, "admin", "pw", cache=cache) as conn:
+        for entity_id in (1, 2, 1, 3, 1, 2):
+            conn.do("getEntityById", id=entity_id)
+        conn.do("getParent", entityId=5)
+        conn.do("getParent", entityId=5)
+    assert count_calls(bam_mock, "getEntityById") == 4  # 1, 2, 3, 2 again
+    assert count_calls(bam_mock, "getParent") == 2
+    assert cache.stats()["evictions"] == 2
+    assert cache.stats()["size"] == 2
+
+
+def test_cache_read_during_write(bam_server):
+    """a read sent before a write, but answered after it, is not saved"""
+    server = bam_server.url
+    state = {"id": 5, "name": "old"}
+    read_sent, write_done = threading.Event(), threading.Event()
+
+    def get_entity(params):  # pylint: disable=unused-argument
+        answer = dict(state)
+        read_sent.set()
+        write_done.wait(5)
+        return answer
+
+    def update(params):  # pylint: disable=unused-argument
+        state["name"] = "new"
+
+    bam_server.handlers.update(getEntityById=get_entity, update=update)
+    with bluecat_bam.BAM(server, "admin", "pw", cache=True) as conn:
+        reader = threading.Thread(
+            target=conn.do, args=("getEntityById",), kwargs={"id": 5}
+        )
+        reader.start()
+        assert read_sent.wait(5)
+        conn.do("update", body={"id": 5, "name": "new", "type": "Zone"})
+        write_done.set()
+        reader.join(5)
+        assert conn.do("getEntityById", id=5)["name"] == "new"
+        assert conn.cache.stats()["stale"] == 1
+    assert bam_server.calls["getEntityById"] == 2
@@ -0,0 +1,62 @@
+"""test_api_do_many"""  # pylint requires docstring
+
+import threading
+import time
+
+import pytest
+import requests
+
+import bluecat_bam
+
+
+def test_do_many_ordered(bam_server):
+    """results in input order, errors captured, calls overlap"""
+    server = bam_server.url
+    lock = threading.Lock()
+    state = {"now": 0, "peak": 0}
+
+    def get_entity(params):
+        with lock:
+            state["now"] += 1
+            state["peak"] = max(state["peak"], state["now"])
+        # later calls finish first
+        time.sleep(0.05 - int(params["id"]) * 0.002)
+        with lock:
+            state["now"] -= 1
+        return {"id": int(params["id"]), "name": None, "type": "User"}
+
+    bam_server.handlers["getEntityById"] = get_entity
+    calls = [("getEntityById", {"id": i}) for i in range(20)]
+    calls[7] = ("getNothing", {})  # no handler, so server error
+    with bluecat_bam.BAM(server, "admin", "pw") as conn:
+        results = list(conn.do_many(calls, workers=5))
+        assert conn.pool_maxsize == 10
+        small = conn.adapters["http://"]
+        assert len(small.poolmanager.pools) == 1
+        list(conn.do_many(calls, workers=16))
+        assert conn.pool_maxsize == 16
+        assert conn.adapters["http://"] is not small
+        assert len(small.poolmanager.pools) == 0  # closed, not left open
+    assert [index for index, _, _ in results] == list(range(20))
+    assert results[3] == (3, {"id": 3, "name": None, "type": "User"}, None)
+    assert results[7][1] is None
+    assert isinstance(results[7][2], requests.RequestException)
+    assert state["peak"] > 1
+
+
+def test_do_many_unordered(bam_server):
+    """every call answered once, in any order"""
+    server = bam_server.url
+    bam_server.handlers["getEntityById"] = lambda params: {"id": int(params["id"])}
+    calls = (("getEntityById", {"id": i}) for i in range(30))
+    with bluecat_bam.BAM(server, "admin", "pw") as conn:
+        results = list(conn.do_many(calls, workers=4, ordered=False))
+    assert sorted(index for index, _, _ in results) == list(range(30))
+    assert all(result["id"] == index for index, result, _ in results)
+
+
+def test_do_many_workers_invalid(bam_mock):  # pylint: disable=unused-argument
+    """workers must be positive"""
+    with bluecat_bam.BAM("bam.example.com", "admin", "pw") as conn:
+        with pytest.raises(ValueError):
+            list(conn.do_many([], workers=0))
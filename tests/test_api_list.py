@@ -0,0 +1,99 @@
+"""test_api_list"""  # pylint requires docstring
+
+import pytest
+
+import bluecat_bam
+
+from .conftest import SERVER, MAINURL
+
+
+def make_ip(num):
+    """IP4Address entity, like getEntities returns"""
+    state = "DHCP_RESERVED" if num % 3 == 0 else "STATIC"
+    return {
+        "id": 1000 + num,
+        "name": None,
+        "type": "IP4Address",
+        "properties": "address=10.0.%s.%s|state=%s|" % (num // 256, num % 256, state),
+    }
+
+
+@pytest.fixture
+def ip_pages(bam_mock):
+    """getEntities answering from 25 addresses"""
+    ips = [make_ip(num) for num in range(25)]
+
+    def get_entities(request, context):  # pylint: disable=unused-argument
+        start = int(request.qs["start"][0])
+        count = int(request.qs["count"][0])
+        end = start + count
+        return ips[start:end]
+
+    bam_mock.get(MAINURL + "getEntities", json=get_entities)
+    return bam_mock
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_iter_bam_api_list(ip_pages, prefetch):  # pylint: disable=W0621
+    """same entities as the list version, one page per request"""
+    with bluecat_bam.BAM(SERVER, "admin", "pw") as conn:
+        expected = conn.get_bam_api_list("getEntities", parentId=7, count=10)
+        ip_iter = conn.iter_bam_api_list(
+            "getEntities", prefetch=prefetch, parentId=7, count=10
+        )
+        first = next(ip_iter)
+        assert first["properties"]["address"] == "10.0.0.0"
+        assert [first] + list(ip_iter) == expected
+    assert len(expected) == 25
+    starts = [
+        request.qs["start"][0]
+        for request in ip_pages.request_history
+        if request.path.endswith("getentities")
+    ]
+    assert starts == ["0", "10", "20"] * 2
+
+
+def test_iter_ip_list_states(ip_pages):  # pylint: disable=W0621,W0613
+    """filter by state while streaming"""
+    with bluecat_bam.BAM(SERVER, "admin", "pw") as conn:
+        reserved = list(conn.iter_ip_list(7, states=["DHCP_RESERVED"], prefetch=True))
+        assert reserved == conn.get_ip_list(7, states=["DHCP_RESERVED"])
+    assert [ip["id"] for ip in reserved] == list(range(1000, 1025, 3))
+
+
+@pytest.mark.parametrize("parallel_pages", [2, 4, 8])
+def test_parallel_pages(ip_pages, parallel_pages):  # pylint: disable=W0621
+    """same result as one page at a time, with at most parallel_pages - 1
+    extra requests past the short page"""
+    with bluecat_bam.BAM(SERVER, "admin", "pw") as conn:
+        expected = conn.get_bam_api_list("getEntities", parentId=7, count=10)
+        ip_pages.reset_mock()
+        result = conn.get_bam_api_list(
+            "getEntities", parallel_pages=parallel_pages, parentId=7, count=10
+        )
+    assert result == expected
+    starts = sorted(
+        int(request.qs["start"][0])
+        for request in ip_pages.request_history
+        if request.path.endswith("getentities")
+    )
+    # pages not yet started when the short page returns are cancelled
+    assert starts == list(range(0, len(starts) * 10, 10))
+    assert 3 <= len(starts) <= 3 + parallel_pages - 1
+
+
+def test_parallel_pages_exact_multiple(bam_mock):
+    """list that ends on a page boundary needs one empty page"""
+    ips = [make_ip(num) for num in range(20)]
+
+    def get_entities(request, context):  # pylint: disable=unused-argument
+        start = int(request.qs["start"][0])
+        end = start + int(request.qs["count"][0])
+        return ips[start:end]
+
+    bam_mock.get(MAINURL + "getEntities", json=get_entities)
+    with bluecat_bam.BAM(SERVER, "admin", "pw") as conn:
+        result = conn.get_bam_api_list(
+            "getEntities", parallel_pages=3, parentId=7, count=5
+        )
+    assert len(result) == 20
@@ -0,0 +1,124 @@
+"""test_api_parent_cache"""  # pylint requires docstring
+
+import threading
+
+import bluecat_bam
+
+from .conftest import SERVER, MAINURL
+
+# HostRecord 101, 102 -> Zone 50 -> Zone 40 -> View 30 -> Configuration 20 -> 0
+PARENTS = {
+    101: {"id": 50, "name": "example", "type": "Zone", "properties": None},
+    102: {"id": 50, "name": "example", "type": "Zone", "properties": None},
+    50: {"id": 40, "name": "com", "type": "Zone", "properties": None},
+    40: {"id": 30, "name": "Default", "type": "View", "properties": None},
+    30: {"id": 20, "name": "Main", "type": "Configuration", "properties": None},
+    20: {"id": 0, "name": None, "type": None, "properties": None},
+}
+
+
+def get_parent(request, context):  # pylint: disable=unused-argument
+    """answer getParent from PARENTS"""
+    return PARENTS[int(request.qs["entityid"][0])]
+
+
+def parent_calls(bam_mock):
+    """entity ids that getParent was called for"""
+    return [
+        int(request.qs["entityid"][0])
+        for request in bam_mock.request_history
+        if request.path.endswith("getparent")
+    ]
+
+
+def test_sibling_walk_reuses_chain(bam_mock):
+    """second record under the same zone costs one getParent"""
+    bam_mock.get(MAINURL + "getParent", json=get_parent)
+    with bluecat_bam.BAM(SERVER, "admin", "pw") as conn:
+        assert conn.find_parent_of_type(101, "View")["id"] == 30
+        assert conn.find_parent_of_type(102, "View")["id"] == 30
+        assert conn.find_parent_of_type("102", "Configuration")["id"] == 20
+        assert conn.find_parent_of_type(101, "TagGroup") is None
+        assert conn.counters["parent_cache_misses"] == 6
+    assert parent_calls(bam_mock) == [101, 50, 40, 102, 30, 20]
+
+
+def test_getparentview_cache(bam_mock):
+    """getparentview remembers the view for each entity, until cleared"""
+    bam_mock.get(MAINURL + "getParent", json=get_parent)
+    with bluecat_bam.BAM(SERVER, "admin", "pw") as conn:
+        assert conn.getparentview(101) == 30
+        assert conn.getparentview("101") == 30
+        assert parent_calls(bam_mock) == [101, 50, 40]
+        conn.parent_cache.clear()
+        assert conn.getparentview(101) == 30
+    assert parent_calls(bam_mock) == [101, 50, 40, 101, 50, 40]
+
+
+def test_parent_cache_bounded(bam_mock, monkeypatch):
+    """parents expire after a ttl, the least recently used are dropped"""
+    bam_mock.get(MAINURL + "getParent", json=get_parent)
+    now = [1000.0]
+    monkeypatch.setattr(bluecat_bam.cache.time, "time", lambda: now[0])
+    with bluecat_bam.BAM(SERVER, "admin", "pw") as conn:
+        conn.parent_cache.maxsize = 2
+        for entity_id in (101, 102, 50, 102):
+            conn.get_parent(entity_id)
+        assert parent_calls(bam_mock) == [101, 102, 50]  # 101 dropped
+        now[0] += bluecat_bam.api.PARENT_CACHE_TTL + 1
+        conn.get_parent(50)
+        assert conn.parent_cache.stats()["size"] == 2
+    assert parent_calls(bam_mock) == [101, 102, 50, 50]
+
+
+def test_delete_clears_parent_cache(bam_mock):
+    """deleting forgets cached parents and views"""
+    bam_mock.get(MAINURL + "getParent", json=get_parent)
+    bam_mock.delete(MAINURL + "delete", text="", headers={"Content-Length": "0"})
+    with bluecat_bam.BAM(SERVER, "admin", "pw") as conn:
+        assert conn.getparentview(50) == 30
+        conn.do("delete", objectId=102)
+        assert len(conn.parent_cache.entries) == 0
+        assert conn.getparentview(50) == 30
+    assert parent_calls(bam_mock) == [50, 40, 50, 40]
+
+
+def test_move_clears_parent_cache(bam_mock):
+    """moving an entity forgets cached parents, changing a copy does not matter"""
+    bam_mock.get(MAINURL + "getParent", json=get_parent)
+    bam_mock.put(
+        MAINURL + "moveResourceRecord", text="", headers={"Content-Length": "0"}
+    )
+    with bluecat_bam.BAM(SERVER, "admin", "pw") as conn:
+        conn.get_parent(101)["name"] = "changed"
+        assert conn.get_parent(101)["name"] == "example"
+        conn.do("moveResourceRecord", resourceRecordId=101, destinationZone="x")
+        conn.get_parent(101)
+    assert parent_calls(bam_mock) == [101, 101]
+
+
+def test_parent_read_during_move(bam_server):
+    """a parent asked for before a move, but answered after it, is not kept"""
+    server = bam_server.url
+    parents = {101: PARENTS[101]}
+    read_sent, move_done = threading.Event(), threading.Event()
+
+    def slow_get_parent(params):
+        answer = parents[int(params["entityId"])]
+        read_sent.set()
+        move_done.wait(5)
+        return answer
+
+    def move(params):  # pylint: disable=unused-argument
+        parents[101] = PARENTS[50]
+
+    bam_server.handlers.update(getParent=slow_get_parent, moveResourceRecord=move)
+    with bluecat_bam.BAM(server, "admin", "pw") as conn:
+        reader = threading.Thread(target=conn.get_parent, args=(101,))
+        reader.start()
+        assert read_sent.wait(5)
+        conn.do("moveResourceRecord", resourceRecordId=101, destinationZone="x")
+        move_done.set()
+        reader.join(5)
+        assert conn.get_parent(101)["id"] == 40
+    assert bam_server.calls["getParent"] == 2
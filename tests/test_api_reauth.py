@@ -0,0 +1,50 @@
+"""test_api_reauth"""  # pylint requires docstring
+
+import pytest
+import requests
+
+import bluecat_bam
+
+from .conftest import SERVER, MAINURL, TOKEN
+
+
+def test_reauth_once(bam_mock):
+    """expired token, log in again and replay the request"""
+    bam_mock.get(
+        MAINURL + "getEntityById",
+        [{"status_code": 401, "text": "expired"}, {"json": {"id": 5}}],
+    )
+    with bluecat_bam.BAM(SERVER, "admin", "pw") as conn:
+        assert conn.do("getEntityById", id=5) == {"id": 5}
+        assert conn.counters["reauth"] == 1
+    paths = [request.path.rsplit("/", 1)[-1] for request in bam_mock.request_history]
+    assert paths == [
+        "login",
+        "getentitybyid",
+        "login",
+        "getentitybyid",
+        "logout",
+    ]
+
+
+def test_reauth_still_rejected(bam_mock):
+    """only one retry, then the error is raised"""
+    bam_mock.get(MAINURL + "getEntityById", status_code=401, text="no")
+    with bluecat_bam.BAM(SERVER, "admin", "pw") as conn:
+        with pytest.raises(requests.HTTPError):
+            conn.do("getEntityById", id=5)
+        assert conn.counters["reauth"] == 1
+
+
+def test_reauth_login_fails(bam_mock):
+    """login refused during reauth is counted and raised"""
+    bam_mock.get(
+        MAINURL + "login",
+        [{"json": TOKEN}, {"status_code": 401, "json": "bad password"}],
+    )
+    bam_mock.get(MAINURL + "getEntityById", status_code=401, text="no")
+    conn = bluecat_bam.BAM(SERVER, "admin", "pw")
+    with pytest.raises(requests.HTTPError):
+        conn.do("getEntityById", id=5)
+    assert conn.counters["reauth_failed"] == 1
+    assert conn.counters["reauth"] == 0
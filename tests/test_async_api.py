@@ -0,0 +1,146 @@
+"""test_async_api"""  # pylint requires docstring
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+import bluecat_bam
+
+from .conftest import SERVER, MAINURL
+from .standin import StandinServer, generate
+
+
+def run(coroutine):
+    """run a coroutine to completion"""
+    return asyncio.new_event_loop().run_until_complete(coroutine)
+
+
+def test_async_do(bam_mock):  # pylint: disable=redefined-outer-name
+    """do, with properties converted like BAM.do"""
+    bam_mock.get(
+        MAINURL + "getEntityById",
+        json={"id": 5, "name": "n", "type": "User", "properties": "a=1|b=2|"},
+    )
+
+    async def main():
+        async with bluecat_bam.AsyncBAM(SERVER, "admin", "pw") as conn:
+            return await conn.do("getEntityById", id=5)
+
+    entity = run(main())
+    assert entity["properties"] == {"a": "1", "b": "2"}
+    assert bam_mock.request_history[-1].path.endswith("logout")
+
+
+def test_async_max_in_flight(bam_server):  # pylint: disable=redefined-outer-name
+    """never more than max_in_flight requests at once"""
+    server = bam_server.url
+    lock = threading.Lock()
+    state = {"now": 0, "peak": 0}
+
+    def slow(params):  # pylint: disable=unused-argument
+        with lock:
+            state["now"] += 1
+            state["peak"] = max(state["peak"], state["now"])
+        time.sleep(0.02)
+        with lock:
+            state["now"] -= 1
+        return {"id": 1, "name": None, "type": "IP4Network", "properties": None}
+
+    bam_server.handlers["getEntityById"] = slow
+
+    async def main():
+        async with bluecat_bam.AsyncBAM(server, "admin", "pw", max_in_flight=3) as conn:
+            return await asyncio.gather(
+                *[conn.do("getEntityById", id=i) for i in range(12)]
+            )
+
+    results = run(main())
+    assert len(results) == 12
+    assert state["peak"] == 3
+
+
+def test_async_other_loop(bam_server):  # pylint: disable=redefined-outer-name
+    """the same AsyncBAM can be used from one event loop, then another"""
+
+    def slow(params):
+        time.sleep(0.02)
+        return {"id": int(params["id"])}
+
+    bam_server.handlers["getEntityById"] = slow
+    conn = bluecat_bam.AsyncBAM(bam_server.url, "admin", "pw", max_in_flight=2)
+
+    async def gather():
+        return await asyncio.gather(*[conn.do("getEntityById", id=i) for i in range(6)])
+
+    try:
+        run(conn.login())
+        assert [result["id"] for result in run(gather())] == list(range(6))
+        assert [result["id"] for result in run(gather())] == list(range(6))
+        run(conn.logout())
+    finally:
+        conn.close()
+
+
+def test_async_max_in_flight_invalid():
+    """max_in_flight must be positive"""
+    with pytest.raises(ValueError):
+        bluecat_bam.AsyncBAM(SERVER, "admin", "pw", max_in_flight=0)
+
+
+def test_async_unknown_option():
+    """options are BAM's, and the pool is sized by max_in_flight"""
+    with pytest.raises(TypeError):
+        bluecat_bam.BAM(SERVER, "admin", "pw", limitter=True)
+    with pytest.raises(TypeError):
+        bluecat_bam.AsyncBAM(SERVER, "admin", "pw", limitter=True)
+    with pytest.raises(TypeError):
+        bluecat_bam.AsyncBAM(SERVER, "admin", "pw", pool_maxsize=5)
+
+
+def test_async_helpers():
+    """iterators page through lists, helpers share the session's caches"""
+    tree = generate(networks=1, addresses=250)
+
+    async def main(url):
+        async with bluecat_bam.AsyncBAM(url, "admin", "pw") as conn:
+            network = (await conn.get_obj("10.0.0.0/24", 100001, "IP4Network"))[0]
+            ip_list = [ip async for ip in conn.iter_ip_list(network["id"])]
+            static = conn.iter_ip_list(network["id"], states=["STATIC"])
+            ranges = [
+                dhcp_range async for dhcp_range in conn.iter_dhcp_ranges(network["id"])
+            ]
+            parent = await conn.get_parent(network["id"])
+            assert (await conn.get_parent(network["id"])) == parent
+            hits = conn.stats()["counters"]["parent_cache_hits"]
+            conn.reset_stats()
+            assert not conn.stats()["counters"]
+            pages = conn.iter_bam_api_list(
+                "getEntities", parentId=network["id"], type="IP4Address", count=100
+            )
+            assert [ip async for ip in pages] == ip_list
+            assert conn.stats()["commands"]["getEntities"]["calls"] == 3
+            return ip_list, [ip async for ip in static], ranges, parent, hits
+
+    with StandinServer(tree) as server:
+        ip_list, static, ranges, parent, hits = run(main(server.url))
+    assert len(ip_list) == 250 and len(set(ip["id"] for ip in ip_list)) == 250
+    assert static and all(ip["properties"]["state"] == "STATIC" for ip in static)
+    assert [dhcp_range["type"] for dhcp_range in ranges] == ["DHCP4Range"]
+    assert parent["type"] == "IP4Block" and hits == 1
+
+
+def test_async_has_bam_helpers():
+    """every BAM helper has an async version, but those left out on purpose"""
+    left_out = {"do_many", "do_one", "mount_adapter", "grow_pool", "relogin"}
+    left_out |= {"set_token", "in_current_span", "transport_from_args"}
+    left_out |= {"ip_pattern", "id_pattern", "mac_pattern", "entity_key"}
+    left_out |= {"cache_lookup", "invalidate", "make_result", "count"}  # inside do
+    names = set(vars(bluecat_bam.BAM)) - set(vars(bluecat_bam.AsyncBAM))
+    missing = [
+        name
+        for name in sorted(names - left_out)
+        if not name.startswith(("_", "send_", "convert_")) and name.islower()
+    ]
+    assert not missing
@@ -0,0 +1,76 @@
+"""test_cli_batch"""  # pylint requires docstring
+
+import io
+import json
+import sys
+
+import pytest
+
+from bluecat_bam.cli import main
+
+from .standin import StandinServer, generate
+
+BATCH = "\n".join(
+    [
+        '{"command": "getEntityById", "params": {"id": 100001}}',
+        '{"command": "getParent", "params": {"entityId": 100001}}',
+        "",
+        "not json",
+        '{"params": {"id": 1}}',
+        '{"command": "getEntityById", "params": {"id": 100001}}',
+    ]
+)
+
+
+@pytest.fixture(name="standin")
+def fixture_standin(monkeypatch):
+    """stand-in server where getParent always fails, and the CLI environment"""
+    tree = generate(networks=1, addresses=1)
+    with StandinServer(tree, error_rates={"getParent": 1.0}) as server:
+        monkeypatch.setenv("BLUECAT_SERVER", server.url)
+        monkeypatch.setenv("BLUECAT_USERNAME", "admin")
+        monkeypatch.setenv("BLUECAT_PASSWORD", "pw")
+        yield server
+
+
+def run(monkeypatch, capsys, argv):
+    """main() with argv, returns (exit code, output lines by line number)"""
+    monkeypatch.setattr(sys, "argv", ["bam"] + argv)
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    out, _ = capsys.readouterr()
+    lines = [json.loads(line) for line in out.splitlines()]
+    return exit_info.value.code, {line["line"]: line for line in lines}
+
+
+def test_batch_file(standin, monkeypatch, capsys, tmp_path):
+    """each line runs in one session, and is answered with its line number"""
+    path = tmp_path / "commands.jsonl"
+    path.write_text(BATCH)
+    code, lines = run(monkeypatch, capsys, ["--batch", str(path)])
+    assert code == 1
+    assert sorted(lines) == [1, 2, 4, 5, 6]
+    assert lines[1]["command"] == "getEntityById"
+    assert lines[1]["result"]["type"] == "Configuration"
+    assert lines[6]["result"] == lines[1]["result"]
+    assert lines[2]["status"] == 500
+    assert lines[2]["error"].startswith("HTTPError")
+    assert "result" not in lines[2]
+    assert lines[4]["error"].startswith("bad line")
+    assert "command" in lines[5]["error"]
+    assert standin.calls["login"] == 1
+    assert standin.calls["getEntityById"] == 2
+
+
+def test_batch_stdin_workers(standin, monkeypatch, capsys):
+    """- reads stdin, and workers run lines at once"""
+    batch = "\n".join(
+        '{"command": "getEntityById", "params": {"id": 100001}}' for _ in range(20)
+    )
+    monkeypatch.setattr(sys, "stdin", io.StringIO(batch))
+    monkeypatch.setattr(sys, "argv", ["bam", "--batch", "-", "--workers", "4"])
+    main()  # no failures, no exit
+    lines = [json.loads(line) for line in capsys.readouterr()[0].splitlines()]
+    assert sorted(line["line"] for line in lines) == list(range(1, 21))
+    assert all(line["result"]["id"] == 100001 for line in lines)
+    assert standin.calls["login"] == 1
@@ -0,0 +1,87 @@
+"""test_cli_output"""  # pylint requires docstring
+
+import json
+import sys
+
+import pytest
+
+import bluecat_bam
+from bluecat_bam.cli import main, print_entities
+
+from .standin import StandinServer, generate
+
+
+@pytest.fixture(name="network")
+def fixture_network(monkeypatch):
+    """(stand-in server, id of a network with 250 addresses), CLI environment"""
+    with StandinServer(generate(networks=1, addresses=250)) as server:
+        with bluecat_bam.BAM(server.url, "admin", "pw") as conn:
+            network = conn.get_obj("10.0.0.0/24", 100001, "IP4Network")[0]
+        monkeypatch.setenv("BLUECAT_SERVER", server.url)
+        monkeypatch.setenv("BLUECAT_USERNAME", "admin")
+        monkeypatch.setenv("BLUECAT_PASSWORD", "pw")
+        yield server, network["id"]
+
+
+def bam(monkeypatch, capsys, *argv):
+    """output of the CLI"""
+    monkeypatch.setattr(sys, "argv", ["bam"] + list(argv))
+    main()
+    return capsys.readouterr()[0]
+
+
+def test_output_jsonl(network, monkeypatch, capsys):
+    """a list is printed one entity per line, anything else as before"""
+    _, network_id = network
+    args = ["parentId=%s" % network_id, "type=IP4Address", "start=0", "count=10"]
+    out = bam(monkeypatch, capsys, "--output", "jsonl", "getEntities", *args)
+    lines = [json.loads(line) for line in out.splitlines()]
+    assert len(lines) == 10 and all(line["type"] == "IP4Address" for line in lines)
+    assert json.loads(bam(monkeypatch, capsys, "getEntities", *args)) == lines
+    out = bam(monkeypatch, capsys, "getEntityById", "id=100001", "-o", "jsonl")
+    assert json.loads(out)["type"] == "Configuration"
+
+
+def test_all_pages(network, monkeypatch, capsys):
+    """--all gets every page, options can come after the command"""
+    server, network_id = network
+    args = ["getEntities", "parentId=%s" % network_id, "type=IP4Address"]
+    out = bam(monkeypatch, capsys, *(args + ["count=100", "--all", "-o", "jsonl"]))
+    lines = [json.loads(line) for line in out.splitlines()]
+    assert len(lines) == 250
+    assert len(set(line["id"] for line in lines)) == 250
+    assert server.calls["getEntities"] == 3
+    out = bam(monkeypatch, capsys, *(args + ["--all"]))
+    assert json.loads(out) == lines
+
+
+def test_print_entities(capsys):
+    """the same text as json.dumps of the list, from any iterable"""
+    entities = [{"id": num, "name": "x%s" % num} for num in range(5)]
+    print_entities(iter(entities), flush_every=2)
+    assert capsys.readouterr()[0] == json.dumps(entities) + "\n"
+    print_entities(iter([]))
+    assert capsys.readouterr()[0] == "[]\n"
+    print_entities(iter([]), "jsonl")
+    assert capsys.readouterr()[0] == ""
+
+
+def test_page_size_parallel_pages(network, monkeypatch, capsys):
+    """pages of --page_size, several at once, give the same list"""
+    server, network_id = network
+    args = ["getEntities", "parentId=%s" % network_id, "type=IP4Address", "--all"]
+    one_by_one = bam(monkeypatch, capsys, *(args + ["--page-size", "50"]))
+    assert server.calls["getEntities"] == 6  # 5 full pages, and an empty one
+    out = bam(monkeypatch, capsys, *(args + ["--page_size=50", "--parallel_pages=4"]))
+    assert json.loads(out) == json.loads(one_by_one)
+    assert len(json.loads(out)) == 250
+    assert server.calls["getEntities"] <= 6 + 6 + 3  # up to 3 past the end
+
+
+def test_all_needs_start_and_count(network, monkeypatch, capsys):
+    """--all is refused for a command that does not take start and count"""
+    server, _ = network
+    with pytest.raises(SystemExit):
+        bam(monkeypatch, capsys, "getEntityById", "id=100001", "--all")
+    assert "start and count" in capsys.readouterr()[0]
+    assert server.calls["getEntityById"] == 0
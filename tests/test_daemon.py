@@ -0,0 +1,100 @@
+"""test_daemon"""  # pylint requires docstring
+
+import json
+import os
+import socket
+import stat
+import sys
+import threading
+
+import pytest
+
+import bluecat_bam
+from bluecat_bam.cli import main
+from bluecat_bam.daemon import Daemon, forward, session_of
+
+from .standin import StandinServer, generate
+
+
+@pytest.fixture(name="daemon")
+def fixture_daemon(tmp_path):
+    """daemon serving a session on a stand-in server, where getParent fails"""
+    tree = generate(networks=1, addresses=1)
+    with StandinServer(tree, error_rates={"getParent": 1.0}) as server:
+        with bluecat_bam.BAM(server.url, "admin", "pw") as conn:
+            session = session_of(server.url, "admin")
+            daemon = Daemon(conn, session, str(tmp_path / "run" / "bam.sock"), None)
+            daemon.listen()
+            thread = threading.Thread(target=daemon.serve)
+            thread.start()
+            try:
+                yield daemon, server
+            finally:
+                daemon.stop()
+                thread.join(5)
+
+
+def test_daemon_forward(daemon):
+    """calls are answered by the daemon's session, without logging in again"""
+    daemon, server = daemon
+    session = daemon.session
+    mode = os.stat(daemon.path).st_mode
+    assert stat.S_ISSOCK(mode) and stat.S_IMODE(mode) & 0o077 == 0
+    for _ in range(3):
+        answer = forward(session, "getEntityById", {"id": 100001}, daemon.path)
+        assert answer["result"]["type"] == "Configuration"
+    answer = forward(session, "getParent", {"entityId": 100001}, daemon.path)
+    assert answer["status"] == 500 and answer["error"].startswith("HTTPError")
+    other = session_of(server.url, "someone")
+    assert forward(other, "getEntityById", {"id": 100001}, daemon.path) is None
+    other = session_of(server.url, "admin", verify="/etc/ssl/ca.pem")
+    assert forward(other, "getEntityById", {"id": 100001}, daemon.path) is None
+    other = session_of(server.url, "admin", cache_ttl=60)
+    assert forward(other, "getEntityById", {"id": 100001}, daemon.path) is None
+    assert server.calls["login"] == 1
+    stats = daemon.stats()
+    assert (stats["answered"], stats["errors"], stats["other_session"]) == (3, 1, 3)
+
+
+def test_daemon_idle(tmp_path):
+    """the daemon stops when idle, then forward returns None,
+    so the command is run directly"""
+    session = session_of("http://127.0.0.1:1", "admin")
+    daemon = Daemon(None, session, str(tmp_path / "bam.sock"), idle_timeout=0.1)
+    daemon.serve()
+    assert not os.path.exists(daemon.path)
+    assert forward(session, "getEntityById", {"id": 1}, daemon.path) is None
+    open(daemon.path, "w").close()  # stale, nothing listening
+    assert forward(session, "getEntityById", {"id": 1}, daemon.path) is None
+
+
+def test_forward_timeout(tmp_path):
+    """a daemon that accepts the command but does not answer is an error"""
+    path = str(tmp_path / "bam.sock")
+    hung = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    hung.bind(path)
+    hung.listen(1)  # never accepted, so never answered
+    try:
+        answer = forward(session_of("s", "u"), "delete", {"objectId": 5}, path, 0.1)
+    finally:
+        hung.close()
+    assert answer["error"].startswith("no answer from the daemon")
+    assert "delete may still run" in answer["error"]
+
+
+def test_cli_uses_daemon(daemon, monkeypatch, capsys):
+    """the CLI sends commands to a running daemon, and shows its errors"""
+    daemon, server = daemon
+    monkeypatch.setenv("BLUECAT_SERVER", server.url)
+    monkeypatch.setenv("BLUECAT_USERNAME", "admin")
+    monkeypatch.setenv("BLUECAT_PASSWORD", "pw")
+    monkeypatch.setenv("BLUECAT_SOCKET", daemon.path)
+    monkeypatch.setattr(sys, "argv", ["bam", "getEntityById", "id=100001"])
+    main()
+    assert json.loads(capsys.readouterr()[0])["type"] == "Configuration"
+    monkeypatch.setattr(sys, "argv", ["bam", "getParent", "entityId=100001"])
+    with pytest.raises(SystemExit):
+        main()
+    assert "500" in capsys.readouterr()[1]
+    assert server.calls["login"] == 1
+    assert daemon.stats()["answered"] == 1
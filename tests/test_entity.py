@@ -0,0 +1,159 @@
+"""test_entity"""  # pylint requires docstring
+
+import copy
+import json
+import pickle
+
+import pytest
+
+import bluecat_bam
+from bluecat_bam.entity import (
+    Entity,
+    IP4Address,
+    LazyProperties,
+    json_default,
+    make_entity,
+)
+
+from .conftest import SERVER, MAINURL
+
+RAW = "address=10.0.0.1|state=DHCP_RESERVED|comment=a=b|"
+PARSED = {"address": "10.0.0.1", "state": "DHCP_RESERVED", "comment": "a=b"}
+
+
+def test_lazy_properties_is_a_dict():
+    """same answers as the dict it stands for"""
+    assert isinstance(LazyProperties(RAW), dict)
+    assert LazyProperties(RAW) == PARSED
+    assert PARSED == LazyProperties(RAW)
+    assert LazyProperties(RAW) == LazyProperties(RAW)
+    assert {"p": LazyProperties(RAW)} == {"p": LazyProperties(RAW)}
+    assert LazyProperties(RAW) != {"address": "10.0.0.1"}
+    assert LazyProperties(RAW)["state"] == "DHCP_RESERVED"
+    assert LazyProperties(RAW).get("missing") is None
+    assert "address" in LazyProperties(RAW)
+    assert len(LazyProperties(RAW)) == 3
+    assert sorted(LazyProperties(RAW)) == sorted(PARSED)
+    assert dict(LazyProperties(RAW)) == PARSED
+    assert dict(**LazyProperties(RAW)) == PARSED
+    assert repr(LazyProperties(RAW)) == repr(PARSED)
+    props = LazyProperties(RAW)
+    props["state"] = "STATIC"
+    assert props == dict(PARSED, state="STATIC")
+
+
+def test_lazy_properties_copy_and_json():
+    """serializes like a dict, copies are plain dicts"""
+    entity = {"id": 5, "properties": LazyProperties(RAW)}
+    assert json.loads(json.dumps(entity)) == {"id": 5, "properties": PARSED}
+    assert json.loads(json.dumps(entity, indent=1, sort_keys=True))["properties"] == (
+        PARSED
+    )
+    for copied in (
+        copy.copy(LazyProperties(RAW)),
+        copy.deepcopy(LazyProperties(RAW)),
+        pickle.loads(pickle.dumps(LazyProperties(RAW))),
+    ):
+        assert type(copied) is dict  # pylint: disable=C0123
+        assert copied == PARSED
+
+
+def test_convert_response_lazy():
+    """only properties are lazy, unused properties go back unchanged"""
+    conn = bluecat_bam.BAM.__new__(bluecat_bam.BAM)  # no login needed
+    entity = conn.convert_response(
+        {"id": 5, "name": None, "overrides": "x=1|", "properties": RAW}
+    )
+    assert isinstance(entity["properties"], LazyProperties)
+    assert type(entity["overrides"]) is dict  # pylint: disable=C0123
+    assert entity["overrides"] == {"x": "1"}
+    assert conn.convert_dict_to_str(entity["properties"]) == RAW
+    assert json.loads(conn.convert_data({"properties": entity["properties"]})) == {
+        "properties": RAW
+    }
+
+
+def test_entity_compact():
+    """reads like the dict it came from, with shared property names"""
+    ip_dict = {"id": 5, "name": None, "type": "IP4Address", "properties": RAW}
+    ip_obj = make_entity(ip_dict)
+    assert isinstance(ip_obj, IP4Address)
+    assert not hasattr(ip_obj, "__dict__")
+    assert ip_obj.address == 167772161
+    assert ip_obj.state == "DHCP_RESERVED"
+    assert ip_obj["id"] == 5
+    assert ip_obj["properties"] == PARSED
+    assert ip_obj.get_property("comment") == "a=b"
+    assert ip_obj.get_property("address") == "10.0.0.1"
+    assert ip_obj.as_dict() == dict(ip_dict, properties=PARSED)
+    assert ip_obj == make_entity(dict(ip_dict, properties=LazyProperties(RAW)))
+    network = make_entity({"id": 6, "name": "n", "type": "IP4Network"})
+    assert type(network) is Entity  # pylint: disable=C0123
+    assert network.properties == {}
+    assert make_entity(None) is None
+    assert make_entity(7) == 7
+    other = make_entity({"id": 7, "name": "x", "type": "HostRecord", "properties": RAW})
+    assert other.props[-2] is ip_obj.props[0]  # interned 'comment'
+
+
+def test_entity_read_only():
+    """properties cannot be changed in place, as_dict gives a dict to change"""
+    ip_obj = make_entity(
+        {"id": 5, "name": None, "type": "IP4Address", "properties": RAW}
+    )
+    with pytest.raises(TypeError):
+        ip_obj["properties"]["state"] = "STATIC"
+    with pytest.raises(TypeError):
+        ip_obj["name"] = "x"  # pylint: disable=unsupported-assignment-operation
+    changed = ip_obj.as_dict()
+    changed["properties"]["state"] = "STATIC"
+    assert ip_obj["properties"]["state"] == "DHCP_RESERVED"
+    conn = bluecat_bam.BAM.__new__(bluecat_bam.BAM)  # no login needed
+    assert json.loads(conn.convert_data(ip_obj))["properties"] == RAW
+
+
+def test_entity_json():
+    """json.dumps of entities, and lists of them, with json_default"""
+    entities = [
+        make_entity({"id": num, "name": "n", "type": "Server", "properties": RAW})
+        for num in range(2)
+    ]
+    with pytest.raises(TypeError):
+        json.dumps(entities)
+    assert json.loads(json.dumps(entities, default=json_default)) == [
+        {"id": num, "name": "n", "type": "Server", "properties": PARSED}
+        for num in range(2)
+    ]
+    assert json.loads(json.dumps(entities[0]["properties"], default=json_default)) == (
+        PARSED
+    )
+    with pytest.raises(TypeError):
+        json.dumps(object(), default=json_default)
+
+
+def test_result_factory(bam_mock):
+    """do and get_bam_api_list return entities from result_factory"""
+    ip_list = [
+        {
+            "id": num,
+            "name": None,
+            "type": "IP4Address",
+            "properties": "address=10.0.0.%s|state=STATIC|" % (num),
+        }
+        for num in range(3)
+    ]
+    bam_mock.get(MAINURL + "getEntities", json=ip_list)
+    bam_mock.get(MAINURL + "getEntityById", json=ip_list[1])
+    bam_mock.get(MAINURL + "getNextIP4Address", json="10.0.0.3")
+    with bluecat_bam.BAM(SERVER, "admin", "pw") as conn:
+        entities = conn.get_bam_api_list(
+            "getEntities", parentId=1, type="IP4Address", result_factory=make_entity
+        )
+        assert isinstance(conn.do("getEntityById", id=1), dict)
+        assert conn.do("getEntityById", id=1, result_factory=make_entity).address == (
+            167772161
+        )
+    assert [ip.address & 0xFF for ip in entities] == [0, 1, 2]
+    with bluecat_bam.BAM(SERVER, "admin", "pw", result_factory=make_entity) as conn:
+        assert conn.get_ip_list(1, states=["STATIC"]) == entities
+        assert conn.do("getNextIP4Address", parentId=1) == "10.0.0.3"
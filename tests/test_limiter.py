@@ -0,0 +1,82 @@
+"""test_limiter"""  # pylint requires docstring
+
+import threading
+import time
+
+import pytest
+import requests
+
+import bluecat_bam
+from bluecat_bam.limiter import ConcurrencyLimiter, shared_limiter
+
+from .standin import StandinServer, generate
+
+
+def test_limiter_aimd():
+    """grows while busy and fast, shrinks once per burst of overloads"""
+    limiter = ConcurrencyLimiter(initial_limit=2, max_limit=4)
+    for _ in range(20):
+        starts = [limiter.acquire() for _ in range(limiter.limit)]
+        for started in starts:
+            limiter.release(started, "getEntityById", 200)
+    assert limiter.limit == 4  # the ceiling
+    starts = [limiter.acquire() for _ in range(4)]
+    for started in starts:
+        limiter.release(started, "getEntityById", 503)
+    assert limiter.limit == 2  # 4 * 0.7, once for the burst
+    started = limiter.acquire()
+    limiter.release(started, "getEntityById", error=requests.exceptions.ReadTimeout())
+    assert limiter.limit == 1
+    started = limiter.acquire()
+    limiter.release(started, "getEntityById", 500)  # not about load
+    stats = limiter.stats()
+    assert stats["decreases"] == 2
+    assert stats["overloaded"] == 5
+    assert stats["inflight"] == 0
+    with pytest.raises(ValueError):
+        ConcurrencyLimiter(initial_limit=8, max_limit=4)
+
+
+def test_limiter_waits():
+    """calls past the limit wait, and are counted as queued"""
+    limiter = ConcurrencyLimiter(initial_limit=1, max_limit=1)
+    started = limiter.acquire()
+    waiter = threading.Thread(target=lambda: limiter.release(limiter.acquire()))
+    waiter.start()
+    time.sleep(0.05)
+    assert limiter.stats()["queued"] == 1
+    limiter.release(started)
+    waiter.join(5)
+    assert limiter.stats()["max_queued"] == 1
+    assert limiter.stats()["inflight"] == 0
+
+
+def test_shared_limiter():
+    """one per server, with a ceiling that can be lowered"""
+    limiter = shared_limiter("https://shared.example.com/Services/REST/v1/")
+    assert shared_limiter("https://shared.example.com/Services/REST/v1/") is limiter
+    shared_limiter("https://shared.example.com/Services/REST/v1/", max_limit=2)
+    assert limiter.max_limit == 2
+    assert limiter.limit == 2
+
+
+def run_bulk(server, limiter):
+    """many reads from many threads, returns the number that failed"""
+    calls = (("getEntityById", {"id": 100001}) for _ in range(300))
+    with bluecat_bam.BAM(server.url, "admin", "pw", limiter=limiter) as conn:
+        return sum(1 for _, _, error in conn.do_many(calls, workers=24) if error)
+
+
+def test_limiter_against_overloaded_server():
+    """a server that refuses past 6 at once fails far fewer calls
+    with the limiter than with 24 threads unlimited"""
+    tree = generate(networks=1, addresses=1)
+    with StandinServer(tree, latency=0.01, capacity=6) as server:
+        unlimited = run_bulk(server, None)
+        limiter = ConcurrencyLimiter(initial_limit=2, max_limit=24)
+        limited = run_bulk(server, limiter)
+    assert limited < unlimited / 2
+    stats = limiter.stats()
+    assert stats["increases"] >= 2
+    assert stats["max_queued"] > 0
+    assert stats["inflight"] == 0
@@ -0,0 +1,86 @@
+"""test_metrics"""  # pylint requires docstring
+
+import json
+import sys
+
+import pytest
+import requests
+
+import bluecat_bam
+from bluecat_bam.cli import main
+from bluecat_bam.metrics import Metrics
+
+from .conftest import SERVER, MAINURL
+
+
+def test_metrics_percentiles():
+    """percentiles within a bucket of the real ones"""
+    metrics = Metrics()
+    for num in range(1, 101):
+        metrics.record("getEntities", num / 1000.0, nbytes=10)
+    metrics.record("delete", 0.5, error=True)
+    metrics.count("delete", "retries")
+    stats = metrics.stats()
+    assert stats["getEntities"]["calls"] == 100
+    assert stats["getEntities"]["bytes"] == 1000
+    assert stats["getEntities"]["max_seconds"] == 0.1
+    assert 0.045 <= stats["getEntities"]["p50"] <= 0.064
+    assert 0.09 <= stats["getEntities"]["p95"] <= 0.1
+    assert 0.09 <= stats["getEntities"]["p99"] <= 0.1
+    assert stats["delete"]["errors"] == 1
+    assert stats["delete"]["retries"] == 1
+    assert json.loads(metrics.to_json()) == stats
+    assert "delete" in metrics.summary()
+    text = metrics.to_prometheus()
+    assert 'bluecat_bam_calls_total{command="getEntities"} 100' in text
+    assert (
+        'bluecat_bam_call_duration_seconds_bucket{command="getEntities",le="+Inf"} 100'
+        in text
+    )
+    assert 'bluecat_bam_events_total{command="delete",event="retries"} 1' in text
+    metrics.reset()
+    assert metrics.stats() == {}
+    with pytest.raises(ValueError):
+        Metrics(output_format="xml")
+
+
+def test_bam_stats(bam_mock, tmp_path):
+    """each command sent is counted, and dumped when the session closes"""
+    bam_mock.get(MAINURL + "getEntityById", json={"id": 5, "name": "x"})
+    bam_mock.get(MAINURL + "getParent", status_code=500, text="no access")
+    path = str(tmp_path / "bam.prom")
+    metrics = Metrics(path, "prometheus")
+    with bluecat_bam.BAM(SERVER, "admin", "pw", metrics=metrics) as conn:
+        conn.do("getEntityById", id=5)
+        conn.do("getEntityById", id=5)
+        with pytest.raises(requests.HTTPError):
+            conn.do("getParent", entityId=5)
+        stats = conn.stats()
+        assert stats["commands"]["getEntityById"]["calls"] == 2
+        assert stats["commands"]["getEntityById"]["errors"] == 0
+        assert stats["commands"]["getEntityById"]["bytes"] == 2 * len(
+            json.dumps({"id": 5, "name": "x"})
+        )
+        assert stats["commands"]["getParent"]["errors"] == 1
+        assert stats["counters"] == {}
+    with open(path) as metrics_file:
+        assert 'bluecat_bam_errors_total{command="getParent"} 1' in metrics_file.read()
+    conn.reset_stats()
+    assert conn.stats()["commands"] == {}
+    with bluecat_bam.BAM(SERVER, "admin", "pw", metrics=False) as conn:
+        conn.do("getEntityById", id=5)
+        assert "commands" not in conn.stats()
+
+
+def test_cli_stats(bam_mock, monkeypatch, capsys):
+    """--stats prints the summary to stderr"""
+    bam_mock.get(MAINURL + "getEntityById", json={"id": 5, "name": "x"})
+    monkeypatch.setenv("BLUECAT_SERVER", SERVER)
+    monkeypatch.setenv("BLUECAT_USERNAME", "admin")
+    monkeypatch.setenv("BLUECAT_PASSWORD", "pw")
+    monkeypatch.setattr(sys, "argv", ["bam", "--stats", "getEntityById", "id=5"])
+    main()
+    out, err = capsys.readouterr()
+    assert json.loads(out) == {"id": 5, "name": "x"}
+    assert "p95 ms" in err
+    assert "getEntityById" in err
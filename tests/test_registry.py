@@ -0,0 +1,186 @@
+"""test_registry"""  # pylint requires docstring
+
+import ast
+import glob
+import json
+import os
+
+import pytest
+
+import bluecat_bam
+import bluecat_bam.api
+import bluecat_bam.async_api
+from bluecat_bam.registry import (
+    CommandRegistry,
+    get_registry,
+    method_from_prefix,
+    REGISTRY_VERSION,
+)
+
+from . import standin
+
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(__file__)), "samples")
+# keyword arguments of do() and iter_bam_api_list() that are not sent as params
+NOT_PARAMS = frozenset(
+    ["method", "data", "body", "result_factory", "prefetch", "parallel_pages"]
+)
+
+WADL = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<application xmlns="http://wadl.dev.java.net/2009/02">
+  <resources base="https://bam.example.com/Services/REST/">
+    <resource path="/v1">
+      <resource path="getEntities">
+        <method id="getEntities" name="GET">
+          <request>
+            <param xmlns:xs="http://www.w3.org/2001/XMLSchema" name="parentId"
+              style="query" type="xs:long" default="0"/>
+            <param xmlns:xs="http://www.w3.org/2001/XMLSchema" name="type"
+              style="query" type="xs:string"/>
+            <param xmlns:xs="http://www.w3.org/2001/XMLSchema" name="start"
+              style="query" type="xs:int" default="0"/>
+            <param xmlns:xs="http://www.w3.org/2001/XMLSchema" name="count"
+              style="query" type="xs:int" default="0"/>
+          </request>
+          <response>
+            <representation mediaType="application/json"/>
+          </response>
+        </method>
+      </resource>
+      <resource path="update">
+        <method id="update" name="PUT">
+          <request>
+            <representation mediaType="application/json"/>
+          </request>
+        </method>
+      </resource>
+      <resource path="logout">
+        <method id="logout" name="GET"/>
+      </resource>
+    </resource>
+  </resources>
+</application>
+"""
+
+
+def test_registry_from_wadl(tmp_path):
+    """read from the wadl, and saved and loaded the same"""
+    registry = CommandRegistry.from_wadl(WADL, source="test.wadl")
+    assert len(registry) == 3
+    get_entities = registry.get("getEntities")
+    assert get_entities.method == "GET"
+    assert get_entities.params == ("parentId", "type", "start", "count")
+    assert get_entities.paginated and get_entities.read_only
+    assert registry.get("update").params == ("body",)
+    assert not registry.read_only("update")
+    assert not registry.read_only("logout")
+    path = tmp_path / "commands.json"
+    with open(str(path), "w") as registry_file:
+        registry.dump(registry_file)
+    loaded = CommandRegistry.load(str(path))
+    assert loaded.commands == registry.commands
+    assert loaded.source == "test.wadl"
+
+
+def test_registry_version(tmp_path):
+    """a commands.json of another layout is refused"""
+    path = tmp_path / "commands.json"
+    path.write_text(json.dumps({"version": REGISTRY_VERSION + 1, "commands": {}}))
+    with pytest.raises(ValueError):
+        CommandRegistry.load(str(path))
+
+
+def test_packaged_registry():
+    """the registry shipped with the package agrees with the command prefixes"""
+    registry = get_registry()
+    assert registry is get_registry()  # loaded once
+    for name, command in registry.commands.items():
+        assert command.method == method_from_prefix(name), name
+    assert registry.paginated("getEntities")
+    assert registry.paginated("searchByObjectTypes")
+    assert not registry.paginated("getEntityById")
+    assert registry.read_only("getEntityById")
+    assert not registry.read_only("delete")
+    assert not registry.read_only("login")
+    # not in the registry, like a command from a newer BAM
+    assert registry.method("getSomethingNew") == "GET"
+    assert registry.read_only("getSomethingNew")
+    assert not registry.paginated("getSomethingNew")
+    assert registry.method("noSuchCommand") is None
+
+
+def test_get_method_from_command():
+    """same methods as before the registry"""
+    for command, method in (
+        ("getEntities", "GET"),
+        ("updateBulkUdf", "POST"),
+        ("update", "PUT"),
+        ("delete", "DELETE"),
+        ("clearIP6Address", "DELETE"),
+        ("removeMACFromPool", "DELETE"),
+        ("login", "GET"),
+        ("addIP4Network", "POST"),
+    ):
+        assert bluecat_bam.BAM.get_method_from_command(command) == method
+
+
+def literal(node):
+    """value of a literal node, or None"""
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        return None
+
+
+def call_sites(path):
+    """(line, command, keywords, paged) for each do, get_bam_api_list, and
+    iter_bam_api_list call with a literal command name in the file"""
+    with open(path) as source_file:
+        tree = ast.parse(source_file.read(), path)
+    for node in ast.walk(tree):
+        if not (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr in ("do", "get_bam_api_list", "iter_bam_api_list")
+            and node.args
+        ):
+            continue
+        command = literal(node.args[0])
+        if isinstance(command, str):
+            keywords = set(keyword.arg for keyword in node.keywords if keyword.arg)
+            paged = node.func.attr != "do" or {"start", "count"} <= keywords
+            yield node.lineno, command, keywords - NOT_PARAMS, paged
+
+
+def test_registry_matches_call_sites():
+    """every command called by name is in the registry, with the params used,
+    and paginated where it is paged"""
+    registry = get_registry()
+    paths = [bluecat_bam.api.__file__, bluecat_bam.async_api.__file__]
+    paths += sorted(glob.glob(os.path.join(SAMPLES, "*.py")))
+    checked = set()
+    for path in paths:
+        for line, command, keywords, paged in call_sites(path):
+            where = "%s:%s %s" % (os.path.basename(path), line, command)
+            assert command in registry, where
+            assert keywords <= set(registry.get(command).params), where
+            assert registry.paginated(command) or not paged, where
+            checked.add(command)
+    assert {"getParent", "getEntities", "getEntityById", "delete"} <= checked
+    assert registry.get("getParent").params == ("entityId",)
+    assert {"start", "count"} <= set(registry.get("getEntities").params)
+
+
+def test_registry_matches_standin():
+    """the stand-in server reads only params the registry has"""
+    registry = get_registry()
+    with open(standin.__file__) as source_file:
+        tree = ast.parse(source_file.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.FunctionDef) and node.name in registry:
+            params = set(registry.get(node.name).params)
+            for read in ast.walk(node):
+                if isinstance(read, ast.Subscript) and literal(read.value) is None:
+                    name = getattr(read.value, "id", None)
+                    key = literal(getattr(read.slice, "value", read.slice))
+                    if name == "params" and isinstance(key, str):
+                        assert key in params, "%s %s" % (node.name, key)
@@ -0,0 +1,85 @@
+"""test_retry"""  # pylint requires docstring
+
+import time
+
+import pytest
+import requests
+
+import bluecat_bam
+from bluecat_bam.retry import RetryPolicy, parse_retry_after
+
+from .standin import StandinServer, generate
+
+
+def test_retry_policy():
+    """waits grow, with jitter, and only reads are retried"""
+    policy = RetryPolicy(base_delay=1, max_delay=3, seed=1)
+    for attempt, ceiling in ((1, 1), (2, 2), (3, 3), (8, 3)):
+        delays = [policy.backoff(attempt) for _ in range(50)]
+        assert 0 <= min(delays) and max(delays) <= ceiling
+        assert len(set(delays)) > 1
+    assert policy.retryable("getEntities", "GET")
+    assert not policy.retryable("assignIP4Address", "POST")
+    assert not policy.retryable("getEntities", "DELETE")
+    assert RetryPolicy(retry_writes=True).retryable("delete", "DELETE")
+    assert parse_retry_after("2") == 2
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0  # past
+    assert parse_retry_after("soon") is None
+    with pytest.raises(ValueError):
+        RetryPolicy(max_attempts=0)
+
+
+def test_retry_reads():
+    """reads that failed with 503 are sent again until they work"""
+    tree = generate(networks=1, addresses=1)
+    with StandinServer(
+        tree,
+        error_rates={"getEntityById": 0.5},
+        error_status=503,
+        retry_after=0,
+        seed=1,
+    ) as server:
+        policy = RetryPolicy(max_attempts=20, base_delay=0.001)
+        with bluecat_bam.BAM(server.url, "admin", "pw", retry=policy) as conn:
+            for _ in range(20):
+                assert conn.do("getEntityById", id=100001)["type"] == "Configuration"
+            events = conn.stats()["commands"]["getEntityById"]
+        assert events["retries"] == server.calls["getEntityById"] - 20 > 0
+        assert events["retry_after"] == events["retries"]
+        assert events["errors"] == events["retries"]
+
+
+def test_retry_never_repeats_writes():
+    """a failed write is sent once, and raises"""
+    tree = generate(networks=1, addresses=1)
+    with StandinServer(tree, error_rates={"delete": 1.0}, error_status=503) as server:
+        with bluecat_bam.BAM(server.url, "admin", "pw", retry=True) as conn:
+            with pytest.raises(requests.HTTPError):
+                conn.do("delete", method="delete", objectId=100001)
+            assert conn.stats()["commands"]["delete"]["not_retried"] == 1
+        assert server.calls["delete"] == 1
+
+
+def test_retry_after_and_deadline():
+    """waits as long as Retry-After says, but not past the deadline"""
+    tree = generate(networks=1, addresses=1)
+    with StandinServer(
+        tree, error_rates={"getParent": 1.0}, error_status=503, retry_after=0.2
+    ) as server:
+        policy = RetryPolicy(max_attempts=2)
+        with bluecat_bam.BAM(server.url, "admin", "pw", retry=policy) as conn:
+            started = time.perf_counter()
+            with pytest.raises(requests.HTTPError):
+                conn.do("getParent", entityId=100001)
+            assert time.perf_counter() - started >= 0.2
+            events = conn.stats()["commands"]["getParent"]
+            assert events["retries"] == 1
+            assert events["retries_exhausted"] == 1
+        assert server.calls["getParent"] == 2
+        policy = RetryPolicy(deadline=0.1)
+        with bluecat_bam.BAM(server.url, "admin", "pw", retry=policy) as conn:
+            started = time.perf_counter()
+            with pytest.raises(requests.HTTPError):
+                conn.do("getParent", entityId=100001)
+            assert time.perf_counter() - started < 0.2
+        assert server.calls["getParent"] == 3
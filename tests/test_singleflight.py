@@ -0,0 +1,114 @@
+"""test_singleflight"""  # pylint requires docstring
+
+import threading
+import time
+
+import pytest
+import requests
+
+import bluecat_bam
+from bluecat_bam.singleflight import SingleFlight
+
+from .standin import StandinServer, generate
+
+
+def test_single_flight():
+    """callers during a flight share it, later ones fly again"""
+    flights = SingleFlight()
+    release = threading.Event()
+    results = []
+
+    def slow():
+        release.wait(5)
+        return "answer"
+
+    threads = [
+        threading.Thread(target=lambda: results.append(flights.do("key", slow)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    while flights.stats().get("coalesced", 0) < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert sorted(results) == [("answer", False)] + [("answer", True)] * 4
+    assert flights.do("key", lambda: "again") == ("again", False)
+    with pytest.raises(KeyError):
+        flights.do("key", lambda: {}["missing"])
+    assert flights.stats() == {"sent": 3, "coalesced": 4, "in_flight": 0}
+
+
+def test_coalesce_reads(bam_server):
+    """identical reads at the same time are sent once, writes every time"""
+    server = bam_server.url
+
+    def get_parent(params):  # pylint: disable=unused-argument
+        time.sleep(0.2)
+        return {"id": 20, "name": "Main", "type": "Configuration", "properties": None}
+
+    bam_server.handlers["getParent"] = get_parent
+    bam_server.handlers["getEntityById"] = lambda params: {"id": int(params["id"])}
+    bam_server.handlers["delete"] = lambda params: None
+    with bluecat_bam.BAM(server, "admin", "pw", coalesce=True) as conn:
+        parents = list(conn.do_many([("getParent", {"entityId": 30})] * 10, workers=10))
+        assert [result["id"] for _, result, _ in parents] == [20] * 10
+        assert parents[0][1] is not parents[1][1]  # each caller has its own
+        # different parameters are different reads
+        ids = list(
+            conn.do_many(
+                [("getEntityById", {"id": num}) for num in range(5)], workers=5
+            )
+        )
+        assert [result["id"] for _, result, _ in ids] == list(range(5))
+        list(conn.do_many([("delete", {"objectId": 5})] * 3, workers=3))
+        stats = conn.stats()
+    sent = bam_server.calls
+    assert sent["getParent"] + stats["coalesce"]["coalesced"] == 10
+    assert sent["getParent"] < 5
+    assert stats["commands"]["getParent"]["coalesced"] > 5
+    assert sent["getEntityById"] == 5
+    assert sent["delete"] == 3
+
+
+def test_coalesce_not_across_writes(bam_server):
+    """a read sent after a write does not share a read from before it"""
+    started, release = threading.Event(), threading.Event()
+
+    def get_entity(params):
+        started.set()
+        release.wait(5)
+        return {"id": int(params["id"])}
+
+    bam_server.handlers["getEntityById"] = get_entity
+    bam_server.handlers["update"] = lambda params: None
+    with bluecat_bam.BAM(bam_server.url, "admin", "pw", coalesce=True) as conn:
+        before = threading.Thread(
+            target=conn.do, args=("getEntityById",), kwargs={"id": 5}
+        )
+        before.start()
+        started.wait(5)
+        conn.do("update", method="put", data={"id": 5, "name": "x"})
+        after = threading.Thread(
+            target=conn.do, args=("getEntityById",), kwargs={"id": 5}
+        )
+        after.start()
+        time.sleep(0.2)  # would join the first read here, if it could
+        release.set()
+        before.join(5)
+        after.join(5)
+        assert "coalesced" not in conn.coalesce.stats()
+    assert bam_server.calls["getEntityById"] == 2
+
+
+def test_coalesce_errors():
+    """each caller sharing a failed read gets the error"""
+    tree = generate(networks=1, addresses=1)
+    with StandinServer(tree, latency=0.2, error_rates={"getParent": 1.0}) as server:
+        with bluecat_bam.BAM(server.url, "admin", "pw", coalesce=True) as conn:
+            results = list(
+                conn.do_many([("getParent", {"entityId": 100001})] * 4, workers=4)
+            )
+        assert server.calls["getParent"] < 4
+    assert all(isinstance(error, requests.HTTPError) for _, _, error in results)
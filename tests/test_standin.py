@@ -0,0 +1,181 @@
+"""test_standin"""  # pylint requires docstring
+
+import time
+
+import pytest
+import requests
+
+import bluecat_bam
+
+from .standin import StandinServer, generate
+
+
+@pytest.fixture
+def standin():
+    """stand-in server with 300 networks of 20 addresses,
+    returns (server, configuration id)"""
+    with StandinServer(generate(networks=300, addresses=20)) as server:
+        yield server, server.tree.children[0][0]
+
+
+def test_standin_reads(standin):  # pylint: disable=redefined-outer-name
+    """the helpers find what generate made"""
+    server, configuration_id = standin
+    with bluecat_bam.BAM(server.url, "admin", "pw") as conn:
+        config_id, view_id = conn.get_config_and_view("Main", "Internal")
+        assert config_id == configuration_id
+        assert conn.do("getEntityById", id=view_id)["name"] == "Internal"
+        # 300 networks need two /16 blocks
+        network = conn.get_obj("10.0.1.0/24", configuration_id, "IP4Network")[0]
+        assert network["properties"]["CIDR"] == "10.0.1.0/24"
+        assert conn.get_parent(network["id"])["properties"]["CIDR"] == "10.0.0.0/16"
+        other = conn.get_obj("10.1.0.0/24", configuration_id, "IP4Network")[0]
+        assert conn.get_parent(other["id"])["properties"]["CIDR"] == "10.1.0.0/16"
+        assert conn.get_obj("10.9.0.0/24", configuration_id, "IP4Network")[0] is None
+        ip_list = conn.get_ip_list(network["id"])
+        assert len(ip_list) == 20
+        assert ip_list[0]["properties"]["address"] == "10.0.1.1"
+        assert len(conn.get_ip_list(network["id"], states=["STATIC"])) == 5
+        address = conn.get_obj("10.0.1.7", configuration_id, "IP4Address")[0]
+        assert address["id"] == ip_list[6]["id"]
+        assert conn.get_obj("10.0.1.21", configuration_id, "IP4Address")[0]["id"] == 0
+        assert conn.get_parent(address["id"])["id"] == network["id"]
+        mac = conn.do(
+            "getMACAddress",
+            configurationId=configuration_id,
+            macAddress=address["properties"]["macAddress"],
+        )
+        assert mac["type"] == "MACAddress"
+        dhcp_range = conn.do(
+            "getIPRangedByIP",
+            containerId=configuration_id,
+            type="",
+            address="10.0.1.210",
+        )
+        assert dhcp_range["properties"]["start"] == "10.0.1.201"
+        assert conn.get_dhcp_ranges(network["id"]) == [dhcp_range]
+        found = conn.do(
+            "searchByObjectTypes", keyword="^net29*", types="IP4Network", count=100
+        )
+        assert len(found) == 11  # net29 and net290 to net299
+    assert server.calls["getEntities"] > 0
+
+
+def test_standin_changes(standin):  # pylint: disable=redefined-outer-name
+    """changes stick, also to generated addresses"""
+    server, configuration_id = standin
+    with bluecat_bam.BAM(server.url, "admin", "pw") as conn:
+        network = conn.get_obj("10.0.2.0/24", configuration_id, "IP4Network")[0]
+        first = conn.get_obj("10.0.2.1", configuration_id, "IP4Address")[0]
+        first["name"] = "gateway"
+        conn.do("update", method="put", body=first)
+        conn.do(
+            "changeStateIP4Address",
+            method="put",
+            addressId=first["id"],
+            targetState="MAKE_RESERVED",
+        )
+        first = conn.do("getEntityById", id=first["id"])
+        assert first["name"] == "gateway"
+        assert first["properties"]["state"] == "RESERVED"
+        second = conn.get_obj("10.0.2.2", configuration_id, "IP4Address")[0]
+        conn.do("delete", method="delete", objectId=second["id"])
+        assert conn.get_obj("10.0.2.2", configuration_id, "IP4Address")[0]["id"] == 0
+        assert len(conn.get_ip_list(network["id"])) == 19
+        new_id = conn.do(
+            "assignIP4Address",
+            method="post",
+            configurationId=configuration_id,
+            ip4Address="10.0.2.100",
+            macAddress="00:50:56:ab:cd:ef",
+            hostInfo="",
+            action="MAKE_DHCP_RESERVED",
+            properties="name=printer|",
+        )
+        assert (
+            conn.get_obj("10.0.2.100", configuration_id, "IP4Address")[0]["id"]
+            == new_id
+        )
+        assert (
+            conn.do(
+                "getMACAddress",
+                configurationId=configuration_id,
+                macAddress="00-50-56-AB-CD-EF",
+            )["properties"]["address"]
+            == "00-50-56-AB-CD-EF"
+        )
+        with pytest.raises(requests.HTTPError):
+            conn.do(
+                "assignIP4Address",
+                method="post",
+                configurationId=configuration_id,
+                ip4Address="10.0.2.100",
+                macAddress="",
+                hostInfo="",
+                action="MAKE_STATIC",
+                properties="",
+            )
+        range_id = conn.do(
+            "addDHCP4Range",
+            method="post",
+            networkId=network["id"],
+            start="10.0.2.150",
+            end="10.0.2.160",
+            properties="",
+        )
+        conn.do(
+            "resizeRange",
+            method="put",
+            objectId=range_id,
+            range="10.0.2.150-10.0.2.170",
+            options="",
+        )
+        assert (
+            conn.do(
+                "getIPRangedByIP",
+                containerId=network["id"],
+                type="DHCP4Range",
+                address="10.0.2.170",
+            )["id"]
+            == range_id
+        )
+        with pytest.raises(requests.HTTPError):  # overlaps .201 to .250
+            conn.do(
+                "resizeRange",
+                method="put",
+                objectId=range_id,
+                range="10.0.2.150-10.0.2.210",
+                options="",
+            )
+        conn.do("delete", method="delete", objectId=network["id"])
+        assert conn.do("getEntityById", id=first["id"])["id"] == 0
+        assert conn.get_obj("10.0.2.100", configuration_id, "IP4Address")[0]["id"] == 0
+
+
+def test_standin_latency_and_errors():
+    """requests wait, and fail as asked"""
+    tree = generate(networks=1, addresses=1)
+    with StandinServer(
+        tree, latency=0.05, error_rates={"getParent": 1.0}, seed=1
+    ) as server:
+        with bluecat_bam.BAM(server.url, "admin", "pw") as conn:
+            started = time.perf_counter()
+            conn.do("getEntityById", id=1)
+            assert time.perf_counter() - started >= 0.05
+            with pytest.raises(requests.HTTPError):
+                conn.do("getParent", entityId=1)
+            with pytest.raises(requests.HTTPError):
+                conn.do("getZonesByHint", containerId=1)
+
+
+def test_standin_scale():
+    """tens of thousands of networks, millions of addresses, made quickly"""
+    started = time.perf_counter()
+    tree = generate(networks=20000, addresses=100)
+    assert time.perf_counter() - started < 30
+    last = tree.children[0][0]
+    with StandinServer(tree) as server:
+        with bluecat_bam.BAM(server.url, "admin", "pw") as conn:
+            address = conn.get_obj("10.78.31.100", last, "IP4Address")[0]
+            assert address["properties"]["address"] == "10.78.31.100"
+            assert conn.get_obj("10.78.32.1", last, "IP4Address")[0]["id"] == 0
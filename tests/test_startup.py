@@ -0,0 +1,83 @@
+"""test_startup"""  # pylint requires docstring
+
+import os
+import subprocess  # nosec
+import sys
+
+import pytest
+
+import bluecat_bam
+
+# milliseconds for "import bluecat_bam.cli", which every "bam" call pays,
+# override with BLUECAT_STARTUP_BUDGET_MS on a slow machine
+BUDGET_MS = float(os.getenv("BLUECAT_STARTUP_BUDGET_MS", "50"))
+# milliseconds for "import bluecat_bam.api", past what requests takes, which a
+# "bam" call pays when no daemon answers, override with BLUECAT_API_BUDGET_MS
+API_BUDGET_MS = float(os.getenv("BLUECAT_API_BUDGET_MS", "25"))
+
+# only needed to talk to BAM directly, not for help, or a call to 'bam daemon'
+HEAVY = ("requests", "urllib3", "asyncio", "bluecat_bam.api", "bluecat_bam.async_api")
+
+# only needed by a session that uses them, not for each call to BAM
+OPTIONAL = (
+    "argparse",
+    "concurrent.futures",
+    "gzip",
+    "xml.etree.ElementTree",
+    "bluecat_bam.limiter",
+    "bluecat_bam.metrics",
+    "bluecat_bam.registry",
+    "bluecat_bam.retry",
+    "bluecat_bam.singleflight",
+    "bluecat_bam.token_cache",
+    "bluecat_bam.transport",
+)
+
+
+def import_times(module):
+    """{module: cumulative microseconds} from python -X importtime"""
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)  # time loading .pyc, not compiling
+    output = subprocess.run(  # nosec
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        stderr=subprocess.PIPE,
+        env=env,
+        check=True,
+        universal_newlines=True,
+    ).stderr
+    times = {}
+    for line in output.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_startup_budget():
+    """the CLI imports only what every call needs, within the budget"""
+    import_times("bluecat_bam.cli")  # compile .pyc files
+    runs = [import_times("bluecat_bam.cli") for _ in range(3)]
+    assert not [name for name in HEAVY if name in runs[0]]
+    best_ms = min(times["bluecat_bam.cli"] for times in runs) / 1000.0
+    assert best_ms < BUDGET_MS, "import took %.1f ms" % best_ms
+
+
+def test_api_startup_budget():
+    """BAM imports what a session uses when it uses it, within the budget"""
+    import_times("bluecat_bam.api")  # compile .pyc files
+    runs = [import_times("bluecat_bam.api") for _ in range(3)]
+    assert not [name for name in OPTIONAL if name in runs[0]]
+    best_ms = (
+        min(times["bluecat_bam.api"] - times["requests"] for times in runs) / 1000.0
+    )
+    assert best_ms < API_BUDGET_MS, "import took %.1f ms past requests" % best_ms
+
+
+def test_package_lazy_exports():
+    """names are imported from their modules on first use"""
+    assert "requests" not in import_times("bluecat_bam")
+    assert bluecat_bam.BAM is bluecat_bam.api.BAM
+    assert "RetryPolicy" in dir(bluecat_bam)
+    with pytest.raises(AttributeError):
+        bluecat_bam.NoSuchName  # pylint: disable=pointless-statement
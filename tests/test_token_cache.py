@@ -0,0 +1,66 @@
+"""test_token_cache"""  # pylint requires docstring
+
+import os
+import stat
+
+import bluecat_bam
+
+from .conftest import SERVER, MAINURL
+
+
+def count_calls(bam_mock, command):
+    """number of requests for command"""
+    return sum(
+        1 for request in bam_mock.request_history if request.path.endswith(command)
+    )
+
+
+def test_token_reused(bam_mock, tmp_path):
+    """second session skips login, neither logs out, file is 0600"""
+    bam_mock.get(MAINURL + "getEntityById", json={"id": 5})
+    path = str(tmp_path / "cache" / "tokens.json")
+    for _ in range(2):
+        with bluecat_bam.BAM(SERVER, "admin", "pw", token_cache=path) as conn:
+            assert conn.do("getEntityById", id=5) == {"id": 5}
+    assert count_calls(bam_mock, "login") == 1
+    assert count_calls(bam_mock, "logout") == 0
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert bam_mock.request_history[-1].headers["Authorization"] == (
+        "BAMAuthToken: abc123"
+    )
+    with open(path) as cache_file:
+        assert "pw" not in cache_file.read()
+
+
+def test_token_expired(bam_mock, tmp_path):
+    """ttl 0 means always login"""
+    cache = bluecat_bam.TokenCache(str(tmp_path / "tokens.json"), ttl=0)
+    for _ in range(2):
+        with bluecat_bam.BAM(SERVER, "admin", "pw", token_cache=cache):
+            pass
+    assert count_calls(bam_mock, "login") == 2
+
+
+def test_token_rejected(bam_mock, tmp_path):
+    """401 with a cached token logs in again and replays the request"""
+    cache = bluecat_bam.TokenCache(str(tmp_path / "tokens.json"))
+    cache.put("https://" + SERVER + "/Services/REST/v1/", "admin", "BAMAuthToken: old")
+    bam_mock.get(
+        MAINURL + "getEntityById",
+        [{"status_code": 401, "text": "expired"}, {"json": {"id": 5}}],
+    )
+    with bluecat_bam.BAM(SERVER, "admin", "pw", token_cache=cache) as conn:
+        assert conn.token == "BAMAuthToken: old"
+        assert conn.do("getEntityById", id=5) == {"id": 5}
+        assert conn.token == "BAMAuthToken: abc123"
+    assert count_calls(bam_mock, "login") == 1
+
+
+def test_token_cache_insecure_file_ignored(tmp_path):
+    """a cache readable by others is not trusted"""
+    path = str(tmp_path / "tokens.json")
+    cache = bluecat_bam.TokenCache(path)
+    cache.put("url", "admin", "BAMAuthToken: abc")
+    assert cache.get("url", "admin") == "BAMAuthToken: abc"
+    os.chmod(path, 0o644)
+    assert cache.get("url", "admin") is None
@@ -0,0 +1,69 @@
+"""test_tracing"""  # pylint requires docstring
+
+import json
+
+import bluecat_bam
+from bluecat_bam.tracing import Tracer
+
+from .conftest import SERVER, MAINURL
+from .test_api_parent_cache import get_parent
+
+
+def spans_by_name(tracer):
+    """name: list of spans"""
+    spans = {}
+    for span in tracer.spans:
+        spans.setdefault(span["name"], []).append(span)
+    return spans
+
+
+def test_helper_spans(bam_mock, tmp_path):
+    """each API call is a span inside the helpers that made it"""
+    bam_mock.get(MAINURL + "getParent", json=get_parent)
+    path = str(tmp_path / "trace.json")
+    tracer = Tracer(path)
+    with bluecat_bam.BAM(SERVER, "admin", "pw", tracer=tracer) as conn:
+        assert conn.getparentview(101) == 30
+    spans = spans_by_name(tracer)
+    view = spans["getparentview"][0]
+    find = spans["find_parent_of_type"][0]
+    assert view["parent"] is None
+    assert view["args"] == {"arg0": "101"}
+    assert find["parent"] == view["id"]
+    assert [span["parent"] for span in spans["get_parent"]] == [find["id"]] * 3
+    get_parent_ids = [span["id"] for span in spans["get_parent"]]
+    calls = spans["getParent"]
+    assert [span["parent"] for span in calls] == get_parent_ids
+    assert calls[0]["cat"] == "api"
+    assert calls[0]["args"]["status"] == 200
+    assert calls[0]["args"]["entityId"] == "101"
+    with open(path) as trace_file:
+        trace = json.load(trace_file)
+    events = trace["traceEvents"]
+    assert len(events) == 1 + 1 + 3 + 3
+    assert all(event["ph"] == "X" for event in events)
+    assert events[0]["name"] == "getparentview"
+    outer = events[0]
+    for event in events[1:]:  # drawn inside getparentview, by time
+        assert outer["ts"] <= event["ts"]
+        assert event["ts"] + event["dur"] <= outer["ts"] + outer["dur"]
+
+
+def test_threads_spans(bam_mock):
+    """calls in worker threads are inside the span that started them"""
+    bam_mock.get(MAINURL + "getEntityById", json={"id": 5})
+    tracer = Tracer()
+    with bluecat_bam.BAM(SERVER, "admin", "pw", tracer=tracer) as conn:
+        with tracer.span("delete all"):
+            calls = [("getEntityById", {"id": num}) for num in range(4)]
+            results = list(conn.do_many(calls, workers=2))
+    assert [error for _, _, error in results] == [None] * 4
+    spans = spans_by_name(tracer)
+    outer = spans["delete all"][0]
+    assert [span["parent"] for span in spans["getEntityById"]] == [outer["id"]] * 4
+    events = tracer.to_chrome()["traceEvents"]
+    flows = [event for event in events if event["cat"] == "flow"]
+    worker_spans = [
+        span for span in spans["getEntityById"] if span["tid"] != outer["tid"]
+    ]
+    assert len(flows) == 2 * len(worker_spans) > 0
@@ -0,0 +1,80 @@
+"""test_transport"""  # pylint requires docstring
+
+import gzip
+import time
+
+import pytest
+
+import bluecat_bam
+from bluecat_bam.transport import RecordingAdapter, ReplayAdapter, ReplayMiss
+
+
+def run_session(server, transport):
+    """a short script, returns what it read"""
+    with bluecat_bam.BAM(server, "admin", "secret", transport=transport) as conn:
+        first = conn.do("getEntityById", id=5)
+        second = conn.do("getEntityById", id=5)
+        ip_list = conn.get_ip_list(5)
+        conn.do("update", body={"id": 5, "name": "new", "type": "IP4Network"})
+    return first, second, ip_list
+
+
+def test_record_and_replay(bam_server, tmp_path):
+    """replay gives the same answers, without the server, or the password"""
+    server = bam_server.url
+    names = iter(["first", "second"])
+    bam_server.handlers["getEntityById"] = lambda params: {
+        "id": 5,
+        "name": next(names),
+        "type": "IP4Network",
+        "properties": "CIDR=10.0.0.0/24|",
+    }
+    ip_list = [
+        {"id": 6, "name": None, "type": "IP4Address", "properties": "state=STATIC|"}
+    ]
+    bam_server.handlers["getEntities"] = lambda params: (
+        ip_list if params["start"] == "0" else []
+    )
+    bam_server.handlers["update"] = lambda params: None
+    path = str(tmp_path / "run.jsonl.gz")
+    recorded = run_session(server, RecordingAdapter(path))
+    assert recorded[0]["name"] == "first"
+    assert recorded[1]["name"] == "second"
+    with gzip.open(path, "rt") as recording:
+        text = recording.read()
+    assert "secret" not in text
+    assert "BAMAuthToken: recorded" in text  # not the session token
+    sent = sum(bam_server.calls.values())
+
+    replay = ReplayAdapter(path)
+    # any server name, nothing is sent
+    assert run_session("http://nowhere.example.com", replay) == recorded
+    assert sum(bam_server.calls.values()) == sent
+    assert replay.counters["misses"] == 0
+    with bluecat_bam.BAM("nowhere", "admin", "pw", transport=replay) as conn:
+        # repeats the last recorded answer
+        assert conn.do("getEntityById", id=5)["name"] == "second"
+        with pytest.raises(ReplayMiss):
+            conn.do("getEntityById", id=6)
+
+
+def test_replay_latency(bam_server, tmp_path):
+    """replay waits as long as the server took, when asked to"""
+    server = bam_server.url
+
+    def slow(params):  # pylint: disable=unused-argument
+        time.sleep(0.05)
+        return {"id": 5}
+
+    bam_server.handlers["getEntityById"] = slow
+    path = str(tmp_path / "run.jsonl.gz")
+    with bluecat_bam.BAM(
+        server, "admin", "pw", transport=RecordingAdapter(path)
+    ) as conn:
+        conn.do("getEntityById", id=5)
+    for latency, shortest, longest in ((0, 0, 0.04), (1, 0.05, 1)):
+        transport = ReplayAdapter(path, latency=latency)
+        with bluecat_bam.BAM(server, "admin", "pw", transport=transport) as conn:
+            started = time.perf_counter()
+            conn.do("getEntityById", id=5)
+            assert shortest <= time.perf_counter() - started < longest